@@ -0,0 +1,212 @@
+"""
+Animated pedigrees (GIF or APNG).
+
+Two kinds of animation:
+
+  * reveal  - the pedigree appears column by column, Gen 0 -> Gen 3
+  * rerolls - one Gen 0 with its descendants re-rolled every frame
+              (through ``FamilyGraph``, so founders and other unchanged
+              cats are rendered once and only changed cells are repainted)
+
+Frames share one global palette, fitted once to a complete frame: a
+pedigree only holds its founders' coat colors, black outlines, connectors
+and label text, so 256 entries cover it. The palette frame is kept between
+frames and only the changed regions are re-quantized (and scaled) into it;
+Pillow's GIF / APNG writers then store each frame as the bounding box of
+what changed since the previous one.
+
+    python main.py --animate reveal -o family.gif
+    python main.py --load-seed 3 --animate rerolls --frames 12 -o rolls.png
+"""
+
+import math
+import logging
+from typing import Any, Dict, Iterator, List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+from config import ANIMATION_SETTINGS, GENERATION_PARAMS, RGB
+from family_graph import FamilyGraph
+from image_processing import (
+    Box, FamilyLayoutBuilder, PedigreeLayout, PEDIGREE_COLUMNS, PEDIGREE_PARENTS,
+)
+
+logger = logging.getLogger(__name__)
+
+MODES = ('reveal', 'rerolls')
+
+
+def build_palette(img: Image.Image, colors: int = 256) -> Image.Image:
+    """A P-mode image whose palette is fitted to ``img`` (for ``quantize``)."""
+    return img.convert('RGB').quantize(
+        colors=colors, method=Image.Quantize.MEDIANCUT, dither=Image.Dither.NONE,
+    )
+
+
+class PaletteFrame:
+    """
+    A palette frame kept in sync with a full-size RGB canvas region by region.
+
+    ``update`` re-quantizes (and scales) only the given box, so a frame
+    costs as much as what changed in it.
+    """
+
+    def __init__(self, size: Tuple[int, int], palette: Image.Image,
+                 scale: float = 1.0, background_color: RGB = None):
+        """
+        Args:
+            size: Full-size (unscaled) frame size
+            palette: Palette image from ``build_palette``
+            scale: Output size relative to ``size``
+            background_color: Color of areas no canvas covers
+        """
+        self.scale = scale
+        self.palette = palette
+        self.size = (max(1, round(size[0] * scale)), max(1, round(size[1] * scale)))
+        background_color = background_color or GENERATION_PARAMS['background_color']
+        self._background = Image.new('RGB', (1, 1), background_color).quantize(
+            palette=palette, dither=Image.Dither.NONE,
+        ).getpixel((0, 0))
+        self.frame = Image.new('P', self.size, self._background)
+        self.frame.putpalette(palette.getpalette())
+
+    def clear(self) -> None:
+        self.frame.paste(self._background, (0, 0) + self.size)
+
+    def update(self, canvas: Image.Image, box: Optional[Box] = None) -> None:
+        """Re-quantize ``box`` (x, y, w, h in canvas pixels; None = all)."""
+        if box is None:
+            box = (0, 0, canvas.width, canvas.height)
+        x, y, w, h = box
+        s = self.scale
+        # Scaled region, widened to whole pixels and clipped to both images
+        sx0, sy0 = max(0, math.floor(x * s)), max(0, math.floor(y * s))
+        sx1 = min(self.size[0], math.ceil((x + w) * s), round(canvas.width * s))
+        sy1 = min(self.size[1], math.ceil((y + h) * s), round(canvas.height * s))
+        if sx1 <= sx0 or sy1 <= sy0:
+            return
+        if s == 1:
+            region = canvas.crop((sx0, sy0, sx1, sy1))
+        else:
+            # Resampling a source box reads past its edges like a full resize
+            region = canvas.resize(
+                (sx1 - sx0, sy1 - sy0), Image.LANCZOS,
+                box=(sx0 / s, sy0 / s, min(sx1 / s, canvas.width),
+                     min(sy1 / s, canvas.height)),
+            )
+        self.frame.paste(
+            region.quantize(palette=self.palette, dither=Image.Dither.NONE),
+            (sx0, sy0),
+        )
+
+    def snapshot(self) -> Image.Image:
+        return self.frame.copy()
+
+
+def _column_region(layout: PedigreeLayout, column: int) -> Box:
+    """Box covering a column's cats and the brackets leading into it."""
+    children = [layout.boxes[idx] for idx in PEDIGREE_COLUMNS[column]]
+    parents = [
+        layout.boxes[p] for idx in PEDIGREE_COLUMNS[column]
+        for p in PEDIGREE_PARENTS.get(idx, ())
+    ]
+    # Brackets start at the parents' right edges
+    x0 = min([x for x, _y, _w, _h in children] + [x + w for x, _y, w, _h in parents])
+    y0 = min(y for _x, y, _w, _h in children + parents)
+    x1 = max(x + w for x, _y, w, _h in children)
+    y1 = max(y + h for _x, y, _w, h in children + parents)
+    # Connector strokes can spill a little past the boxes (not into Gen 0's)
+    pad = GENERATION_PARAMS.get('connector_width', 2) if column else 0
+    return (x0 - pad, y0 - pad, x1 - x0 + 2 * pad, y1 - y0 + 2 * pad)
+
+
+def reveal_frames(pedigree: Dict[str, Any], scale: float = 1.0,
+                  background_color: RGB = None) -> Iterator[Image.Image]:
+    """Frames revealing the pedigree one generation column at a time."""
+    background_color = background_color or GENERATION_PARAMS['background_color']
+    entries = FamilyLayoutBuilder.flatten_pedigree(pedigree)
+    layout = FamilyLayoutBuilder.plan_layout(
+        [FamilyLayoutBuilder.entry_size(entry) for entry in entries]
+    )
+    canvas = Image.new('RGB', (layout.width, layout.height), background_color)
+    draw = ImageDraw.Draw(canvas)
+
+    # Paint column by column, remembering what each step touched
+    regions = []
+    for column, indices in enumerate(PEDIGREE_COLUMNS):
+        if column > 0:
+            FamilyLayoutBuilder.draw_column_connectors(draw, layout, column)
+        for idx in indices:
+            x, y, _w, _h = layout.boxes[idx]
+            img = FamilyLayoutBuilder.render_entry(entries[idx])
+            canvas.paste(img, (x, y))
+            del img
+        regions.append(_column_region(layout, column))
+
+    # The finished canvas defines the palette; replay the steps into frames
+    frame = PaletteFrame(canvas.size, build_palette(canvas), scale, background_color)
+    for region in regions:
+        frame.update(canvas, region)
+        yield frame.snapshot()
+
+
+def reroll_frames(graph: FamilyGraph, frames: int, generation: int = 1,
+                  scale: float = 1.0,
+                  background_color: RGB = None) -> Iterator[Image.Image]:
+    """
+    The current pedigree, then ``frames - 1`` re-rolls of ``generation``.
+
+    Genomes are rolled first (cheap) to size the frame for the largest
+    layout; then each frame renders and repaints only the changed cats.
+    """
+    background_color = background_color or GENERATION_PARAMS['background_color']
+    rolls: List[List[Any]] = [list(graph.nodes)]
+    for _ in range(frames - 1):
+        graph.reroll_generation(generation)
+        graph.recompute()
+        rolls.append(list(graph.nodes))
+    layouts = [
+        FamilyLayoutBuilder.plan_layout([cat.image_size() for cat in nodes])
+        for nodes in rolls
+    ]
+    size = (max(l.width for l in layouts), max(l.height for l in layouts))
+
+    frame: Optional[PaletteFrame] = None
+    for nodes in rolls:
+        graph.assign(nodes)
+        canvas = graph.render(background_color)
+        if frame is None:
+            frame = PaletteFrame(size, build_palette(canvas), scale, background_color)
+        if len(graph.repainted) == len(graph.nodes):
+            # New layout: the whole canvas was redrawn
+            frame.clear()
+            frame.update(canvas)
+        else:
+            for idx in graph.repainted:
+                frame.update(canvas, graph.layout.boxes[idx])
+        yield frame.snapshot()
+
+
+def save_animation(frames: Iterator[Image.Image], output_path: str,
+                   frame_ms: int = ANIMATION_SETTINGS['frame_ms'],
+                   hold_ms: int = ANIMATION_SETTINGS['hold_ms'],
+                   loop: int = 0) -> Tuple[str, int]:
+    """
+    Encode frames as GIF (.gif) or APNG (anything else).
+
+    The last frame is held for ``hold_ms``. Returns (path, frame count).
+    """
+    frames = list(frames)
+    if not frames:
+        raise ValueError("No frames to save")
+    durations = [frame_ms] * (len(frames) - 1) + [hold_ms]
+    fmt = 'GIF' if output_path.lower().endswith('.gif') else 'PNG'
+    options: Dict[str, Any] = {'save_all': True, 'append_images': frames[1:],
+                               'duration': durations, 'loop': loop}
+    if fmt == 'GIF':
+        options['optimize'] = False  # keep the shared palette as is
+    else:
+        options['default_image'] = False
+    frames[0].save(output_path, format=fmt, **options)
+    logger.info(f"Saved {len(frames)}-frame {fmt} animation to {output_path}")
+    return output_path, len(frames)
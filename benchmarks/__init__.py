@@ -0,0 +1,9 @@
+"""
+Performance benchmarks for the rendering pipeline.
+
+Run from the repository root:
+
+    python -m benchmarks.suite                    # time every hot path
+    python -m benchmarks.suite --save             # store benchmarks/baseline.json
+    python -m benchmarks.suite --compare          # flag regressions vs baseline
+"""
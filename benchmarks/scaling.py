@@ -0,0 +1,176 @@
+"""
+Scaling scenarios on synthetic part libraries.
+
+For every (variants per locus, resolution scale) combination a library is
+generated with ``synthetic_parts`` and measured:
+
+  * load_ms / load_mb   - ``ImageLoader.load_all_parts`` time and the decoded
+                          library size (RGB bytes)
+  * choose_per_s        - ``choose_random_parts`` calls per second
+  * cats_per_s          - random cats rendered through a fresh RenderCache
+  * template_hit_rate   - share of renders that reused a cached gray template
+  * peak_rss_mb         - peak process RSS during the scenario (the
+                          high-water mark is reset per scenario on Linux;
+                          elsewhere it is the peak since process start)
+
+    python -m benchmarks.scaling --counts 8 64 256 --scales 1 2 --plot scaling.png
+
+``--plot`` needs matplotlib (optional; results are printed and saved as
+JSON without it).
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import shutil
+import logging
+import argparse
+import tempfile
+from typing import Any, Dict, List, Optional, Sequence
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic_parts import generate_library  # noqa: E402
+
+BENCH_SEED = 1234
+
+
+def run_scenario(root: str, cats: int = 50, choose_calls: int = 2000) -> Dict[str, float]:
+    """Measure one generated library (see module docstring for the fields)."""
+    from cat import Gene, Cat
+    from cats_colors import CATS_COLORS
+    from image_processing import ImageLoader, CatImageBuilder
+    from memory import peak_rss, reset_peak_rss
+    from render_cache import RenderCache
+
+    rng_state = random.getstate()
+    random.seed(BENCH_SEED)
+    reset_peak_rss()
+    try:
+        start = time.perf_counter()
+        parts_images = ImageLoader(root).load_all_parts()
+        load_ms = (time.perf_counter() - start) * 1000
+        load_bytes = sum(
+            img.width * img.height * 3
+            for by_id in parts_images.values() for img in by_id.values()
+        )
+
+        start = time.perf_counter()
+        for _ in range(choose_calls):
+            CatImageBuilder.choose_random_parts(parts_images)
+        choose_per_s = choose_calls / (time.perf_counter() - start)
+
+        cache = RenderCache()
+        colors = list(CATS_COLORS)
+        start = time.perf_counter()
+        for i in range(cats):
+            parts, _refs = CatImageBuilder.choose_random_parts(parts_images)
+            genes = [Gene(color, 1.0 + i % 3) for color in random.sample(colors, 3)]
+            cat = Cat(f"Cat {i}", {k: Gene(v, 1.0) for k, v in parts.items()},
+                      genes, generation=1)
+            cache.render(cat.parts, cat.color_map,
+                         cat._label_title(), cat._color_strengths(),
+                         cat._text_padding())
+        cats_per_s = cats / (time.perf_counter() - start)
+        templates = cache.stats()['templates']
+    finally:
+        random.setstate(rng_state)
+
+    lookups = templates['hits'] + templates['misses']
+    return {
+        'load_ms': load_ms,
+        'load_mb': load_bytes / 1024 ** 2,
+        'choose_per_s': choose_per_s,
+        'cats_per_s': cats_per_s,
+        'template_hit_rate': templates['hits'] / lookups if lookups else 0.0,
+        'peak_rss_mb': (peak_rss() or 0) / 1024 ** 2,
+    }
+
+
+def run_scaling(counts: Sequence[int], scales: Sequence[float], cats: int = 50,
+                distribution: str = 'uniform', workdir: str = None) -> List[Dict[str, Any]]:
+    """Generate and measure every (count, scale) library; one row each."""
+    rows = []
+    for scale in scales:
+        for count in counts:
+            root = tempfile.mkdtemp(prefix='catparts_', dir=workdir)
+            try:
+                generate_library(root, count, scale, distribution, seed=count)
+                row = {'count': count, 'scale': scale}
+                row.update(run_scenario(root, cats))
+            finally:
+                shutil.rmtree(root, ignore_errors=True)
+            rows.append(row)
+            print(format_row(row))
+    return rows
+
+
+def format_row(row: Dict[str, Any]) -> str:
+    return (
+        f"count={row['count']:<5} scale={row['scale']:<4g} "
+        f"load {row['load_ms']:8.1f} ms ({row['load_mb']:6.1f} MB)  "
+        f"choose {row['choose_per_s']:9.0f}/s  "
+        f"render {row['cats_per_s']:6.1f} cats/s  "
+        f"template hits {row['template_hit_rate']:5.1%}  "
+        f"peak RSS {row['peak_rss_mb']:7.1f} MB"
+    )
+
+
+def plot(rows: List[Dict[str, Any]], path: str) -> Optional[str]:
+    """Throughput and memory vs library size, one line per scale."""
+    try:
+        import matplotlib
+        matplotlib.use('Agg')
+        import matplotlib.pyplot as plt
+    except ImportError:
+        logging.warning("matplotlib not installed; skipping plot")
+        return None
+
+    metrics = [
+        ('load_ms', 'load_all_parts (ms)'),
+        ('cats_per_s', 'render throughput (cats/s)'),
+        ('template_hit_rate', 'template cache hit rate'),
+        ('load_mb', 'decoded library (MB)'),
+    ]
+    fig, axes = plt.subplots(2, 2, figsize=(11, 8))
+    for ax, (key, title) in zip(axes.flat, metrics):
+        for scale in sorted({row['scale'] for row in rows}):
+            points = [(r['count'], r[key]) for r in rows if r['scale'] == scale]
+            ax.plot(*zip(*points), marker='o', label=f"scale {scale:g}")
+        ax.set_title(title)
+        ax.set_xlabel('variants per locus')
+        ax.set_xscale('log')
+        ax.legend()
+    fig.tight_layout()
+    fig.savefig(path)
+    return path
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Scaling scenarios on synthetic parts")
+    parser.add_argument('--counts', type=int, nargs='+', default=[8, 32, 128],
+                        help="Variants per locus to try")
+    parser.add_argument('--scales', type=float, nargs='+', default=[1.0, 2.0],
+                        help="Resolution scales to try")
+    parser.add_argument('--cats', type=int, default=50,
+                        help="Random cats rendered per scenario")
+    parser.add_argument('--distribution', choices=['uniform', 'skewed'],
+                        default='uniform', help="Patch shade distribution")
+    parser.add_argument('--output', default='scaling.json', help="Results JSON")
+    parser.add_argument('--plot', metavar='PNG', help="Also plot the results")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    rows = run_scaling(args.counts, args.scales, args.cats, args.distribution)
+    with open(args.output, 'w', encoding='utf-8') as f:
+        json.dump(rows, f, indent=2)
+    print(f"Results written to: {args.output}")
+    if args.plot and plot(rows, args.plot):
+        print(f"Plot written to: {args.plot}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,115 @@
+"""
+CLI startup-time guard based on ``python -X importtime``.
+
+Runs metadata-only commands in a fresh interpreter, parses the import-time
+log and fails when a heavy module (Pillow, NumPy, the render stack) is
+imported or the commands exceed their import budget.
+
+    python -m benchmarks.startup                  # default commands, 150 ms budget
+    python -m benchmarks.startup --budget-ms 80 --top 10
+"""
+
+import os
+import sys
+import time
+import argparse
+import subprocess
+from typing import Dict, List, Optional, Sequence, Tuple
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules that must not load for metadata-only commands
+HEAVY_MODULES: Tuple[str, ...] = (
+    'PIL', 'numpy', 'image_processing', 'cat', 'render_cache', 'family_graph',
+)
+DEFAULT_COMMANDS: Tuple[Tuple[str, ...], ...] = (
+    ('--list-seeds',),
+    ('--show-seed', '1'),
+    ('--find-seeds', 'body_1'),
+    ('--validate-seeds',),
+)
+DEFAULT_BUDGET_MS = 150.0
+
+
+def parse_importtime(stderr: str) -> Dict[str, Tuple[int, int]]:
+    """Map module -> (self us, cumulative us) from ``-X importtime`` output."""
+    modules: Dict[str, Tuple[int, int]] = {}
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        try:
+            self_us, cumulative_us, name = line[len('import time:'):].split('|')
+            modules[name.strip()] = (int(self_us), int(cumulative_us))
+        except ValueError:
+            continue
+    return modules
+
+
+def measure_command(args: Sequence[str], script: str = 'main.py') -> Dict[str, object]:
+    """Run ``python -X importtime <script> <args>`` and summarize it."""
+    start = time.perf_counter()
+    result = subprocess.run(
+        [sys.executable, '-X', 'importtime', script, *args],
+        cwd=REPO_ROOT, capture_output=True, text=True,
+    )
+    wall_ms = (time.perf_counter() - start) * 1000
+    modules = parse_importtime(result.stderr)
+    heavy = sorted(
+        name for name in modules
+        if name.split('.')[0] in HEAVY_MODULES
+    )
+    return {
+        'command': ' '.join(args),
+        'returncode': result.returncode,
+        'wall_ms': wall_ms,
+        'import_ms': sum(self_us for self_us, _ in modules.values()) / 1000,
+        'modules': modules,
+        'heavy': sorted({name.split('.')[0] for name in heavy}),
+    }
+
+
+def check(commands: Sequence[Sequence[str]] = DEFAULT_COMMANDS,
+          budget_ms: float = DEFAULT_BUDGET_MS, top: int = 0) -> List[str]:
+    """Measure each command; return problems (empty when all pass)."""
+    problems = []
+    for args in commands:
+        row = measure_command(args)
+        print(f"{row['command']:<22} wall {row['wall_ms']:7.1f} ms   "
+              f"imports {row['import_ms']:6.1f} ms   "
+              f"{len(row['modules'])} modules")
+        if top:
+            slowest = sorted(row['modules'].items(), key=lambda kv: -kv[1][0])[:top]
+            for name, (self_us, cumulative_us) in slowest:
+                print(f"    {name:<30}{self_us / 1000:8.2f} ms self"
+                      f"{cumulative_us / 1000:9.2f} ms cumulative")
+        if row['returncode'] != 0:
+            problems.append(f"{row['command']}: exited with {row['returncode']}")
+        if row['heavy']:
+            problems.append(
+                f"{row['command']}: imports heavy modules {', '.join(row['heavy'])}"
+            )
+        if row['import_ms'] > budget_ms:
+            problems.append(
+                f"{row['command']}: imports took {row['import_ms']:.1f} ms "
+                f"(budget {budget_ms:g} ms)"
+            )
+    return problems
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Guard CLI startup time")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"Import-time budget per command "
+                             f"(default: {DEFAULT_BUDGET_MS:g} ms)")
+    parser.add_argument('--top', type=int, default=0,
+                        help="Also list the N slowest imports per command")
+    args = parser.parse_args(argv)
+
+    problems = check(budget_ms=args.budget_ms, top=args.top)
+    for problem in problems:
+        print(f"FAIL {problem}")
+    return 1 if problems else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
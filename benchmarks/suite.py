@@ -0,0 +1,340 @@
+"""
+Benchmark suite for the real hot paths on a part library.
+
+Each benchmark is a setup function registered with ``@benchmark``: it gets a
+shared ``BenchContext`` (loaded parts, a generated family) and returns the
+zero-argument callable to time. The RNG is reseeded before every call and
+the render cache is off unless ``--cache`` is given, so each run measures
+the actual work.
+
+Results are stored as baseline JSON; ``--compare`` reports the median time
+of every benchmark against a baseline and exits with status 1 when any of
+them got slower than ``--threshold`` percent.
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import platform
+import argparse
+import tempfile
+import statistics
+from typing import Any, Callable, Dict, List, Optional
+
+# Allow running as a script as well as ``python -m benchmarks.suite``
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from config import RENDER_CACHE_SETTINGS  # noqa: E402
+
+DEFAULT_BASELINE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                                'baseline.json')
+DEFAULT_THRESHOLD = 10.0  # percent slower than baseline that counts as a regression
+BENCH_SEED = 1234
+
+Setup = Callable[['BenchContext'], Callable[[], Any]]
+BENCHMARKS: Dict[str, Setup] = {}
+
+
+def benchmark(name: str) -> Callable[[Setup], Setup]:
+    """Register a benchmark setup function under ``name``."""
+    def register(setup: Setup) -> Setup:
+        BENCHMARKS[name] = setup
+        return setup
+    return register
+
+
+class BenchContext:
+    """Shared fixtures, built lazily so ``--only`` runs stay cheap."""
+
+    def __init__(self, parts_root: str = "."):
+        self.parts_root = parts_root
+        self._parts_images = None
+        self._names = None
+        self._family = None
+        self.tmpdir = tempfile.mkdtemp(prefix='catbench_')
+
+    @property
+    def parts_images(self) -> Dict[str, Dict[str, Any]]:
+        if self._parts_images is None:
+            from image_processing import ImageLoader
+            self._parts_images = ImageLoader(self.parts_root).load_all_parts()
+        return self._parts_images
+
+    @property
+    def names(self) -> List[str]:
+        if self._names is None:
+            from main import load_cat_names
+            self._names = load_cat_names()
+        return self._names
+
+    def generate(self):
+        """(pedigree, family) for a fixed RNG seed."""
+        from main import generate_cat_family
+
+        random.seed(BENCH_SEED)
+        pedigree, family, _seed_id = generate_cat_family(
+            save_new_seed=False, parts_images=self.parts_images, names=self.names,
+        )
+        return pedigree, family
+
+    @property
+    def family(self):
+        if self._family is None:
+            self._family = self.generate()
+        return self._family
+
+    def sample_cat(self):
+        """The great-grandkitten: most color genes, widest label."""
+        pedigree, _family = self.family
+        return pedigree['great_grandkitten']
+
+
+@benchmark('load_all_parts')
+def _bench_load_all_parts(ctx: BenchContext):
+    from image_processing import ImageLoader
+
+    loader = ImageLoader(ctx.parts_root)
+    return loader.load_all_parts
+
+
+@benchmark('combine_parts')
+def _bench_combine_parts(ctx: BenchContext):
+    from image_processing import CatImageBuilder
+
+    cat = ctx.sample_cat()
+    padding = cat._text_padding()
+    return lambda: CatImageBuilder.combine_parts(cat.parts, padding)
+
+
+@benchmark('apply_color_numpy')
+def _bench_apply_color_numpy(ctx: BenchContext):
+    from image_processing import CatImageBuilder
+
+    cat = ctx.sample_cat()
+    template = CatImageBuilder.combine_parts(cat.parts, cat._text_padding())
+    color_map = cat.color_map
+    return lambda: CatImageBuilder.apply_color_numpy(template, color_map)
+
+
+@benchmark('build_color_map')
+def _bench_build_color_map(ctx: BenchContext):
+    from cat import build_color_map
+
+    genes = ctx.sample_cat().color_genes
+    return lambda: build_color_map(genes)
+
+
+@benchmark('add_cat_label')
+def _bench_add_cat_label(ctx: BenchContext):
+    from image_processing import CatImageBuilder
+
+    cat = ctx.sample_cat()
+    body = cat.render_reference()
+    title, strengths = cat._label_title(), cat._color_strengths()
+    return lambda: CatImageBuilder.add_cat_label(body.copy(), title, strengths)
+
+
+@benchmark('inherit_color_genes')
+def _bench_inherit_color_genes(ctx: BenchContext):
+    from cat import inherit_color_genes
+
+    cat = ctx.sample_cat()
+    return lambda: inherit_color_genes(cat.parent1, cat.parent2, cat.generation)
+
+
+@benchmark('create_litter')
+def _bench_create_litter(ctx: BenchContext):
+    from cat import CatFamily
+
+    cat = ctx.sample_cat()
+    family = CatFamily(ctx.names)
+    return lambda: family.create_litter(cat.parent1, cat.parent2, 20)
+
+
+@benchmark('create_pedigree_image')
+def _bench_create_pedigree_image(ctx: BenchContext):
+    from image_processing import FamilyLayoutBuilder
+
+    pedigree, _family = ctx.family
+    return lambda: FamilyLayoutBuilder.create_pedigree_image(pedigree)
+
+
+@benchmark('generate_cat_family')
+def _bench_generate_cat_family(ctx: BenchContext):
+    return ctx.generate
+
+
+@benchmark('save_family_image')
+def _bench_save_family_image(ctx: BenchContext):
+    from main import save_family_image
+
+    pedigree, _family = ctx.family
+    path = os.path.join(ctx.tmpdir, 'family.png')
+    return lambda: save_family_image(pedigree, path)
+
+
+def _time_batch(fn: Callable[[], Any], number: int) -> float:
+    """Seconds for ``number`` calls, RNG reseeded before each call."""
+    total = 0.0
+    for _ in range(number):
+        random.seed(BENCH_SEED)
+        start = time.perf_counter()
+        fn()
+        total += time.perf_counter() - start
+    return total
+
+
+def measure(fn: Callable[[], Any], repeat: int = 5,
+            min_batch_seconds: float = 0.05) -> Dict[str, Any]:
+    """
+    Time ``fn`` in milliseconds per call.
+
+    Fast functions are called in batches (x10 until a batch takes at least
+    ``min_batch_seconds``) so timer noise does not dominate; the first batch
+    doubles as warm-up.
+    """
+    number = 1
+    while _time_batch(fn, number) < min_batch_seconds and number < 100000:
+        number *= 10
+    times = [_time_batch(fn, number) * 1000 / number for _ in range(repeat)]
+    return {
+        'runs': repeat,
+        'calls_per_run': number,
+        'min_ms': min(times),
+        'median_ms': statistics.median(times),
+        'mean_ms': statistics.fmean(times),
+        'max_ms': max(times),
+    }
+
+
+def run_suite(names: Optional[List[str]] = None, repeat: int = 5,
+              parts_root: str = ".", use_cache: bool = False) -> Dict[str, Any]:
+    """
+    Run the selected benchmarks (all by default).
+
+    Returns:
+        {'meta': {...}, 'results': {name: timing stats}}
+    """
+    names = names or list(BENCHMARKS)
+    unknown = [n for n in names if n not in BENCHMARKS]
+    if unknown:
+        raise KeyError(f"Unknown benchmark(s): {', '.join(unknown)}")
+
+    ctx = BenchContext(parts_root)
+    saved_cache = RENDER_CACHE_SETTINGS['enabled']
+    RENDER_CACHE_SETTINGS['enabled'] = use_cache
+    results = {}
+    try:
+        for name in names:
+            results[name] = measure(BENCHMARKS[name](ctx), repeat)
+            print(f"  {name:<24}{results[name]['median_ms']:>10.3f} ms")
+    finally:
+        RENDER_CACHE_SETTINGS['enabled'] = saved_cache
+
+    return {
+        'meta': {
+            'created': time.strftime('%Y-%m-%d %H:%M:%S'),
+            'python': platform.python_version(),
+            'platform': platform.platform(),
+            'parts_root': os.path.abspath(parts_root),
+            'render_cache': use_cache,
+            'repeat': repeat,
+        },
+        'results': results,
+    }
+
+
+def save_baseline(report: Dict[str, Any], path: str = DEFAULT_BASELINE) -> str:
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(report, f, indent=2)
+    return path
+
+
+def load_baseline(path: str = DEFAULT_BASELINE) -> Dict[str, Any]:
+    with open(path, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+def compare(baseline: Dict[str, Any], current: Dict[str, Any],
+            threshold: float = DEFAULT_THRESHOLD) -> List[Dict[str, Any]]:
+    """
+    Compare median times of two reports.
+
+    Each row has a status: 'regression' (slower by more than ``threshold``
+    percent), 'improved' (faster by more than ``threshold``), 'ok', or
+    'new' when the benchmark is missing from the baseline.
+    """
+    rows = []
+    for name, stats in current['results'].items():
+        now = stats['median_ms']
+        before = baseline['results'].get(name, {}).get('median_ms')
+        if before is None:
+            rows.append({'name': name, 'baseline_ms': None, 'current_ms': now,
+                         'change_pct': None, 'status': 'new'})
+            continue
+        change = (now - before) / before * 100 if before else 0.0
+        if change > threshold:
+            status = 'regression'
+        elif change < -threshold:
+            status = 'improved'
+        else:
+            status = 'ok'
+        rows.append({'name': name, 'baseline_ms': before, 'current_ms': now,
+                     'change_pct': change, 'status': status})
+    return rows
+
+
+def format_comparison(rows: List[Dict[str, Any]]) -> str:
+    lines = [f"{'benchmark':<24}{'baseline ms':>13}{'current ms':>12}"
+             f"{'change':>9}  status"]
+    for row in rows:
+        before = '-' if row['baseline_ms'] is None else f"{row['baseline_ms']:.3f}"
+        change = '-' if row['change_pct'] is None else f"{row['change_pct']:+.1f}%"
+        lines.append(
+            f"{row['name']:<24}{before:>13}{row['current_ms']:>12.3f}"
+            f"{change:>9}  {row['status']}"
+        )
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark the cat rendering pipeline")
+    parser.add_argument('--only', nargs='+', metavar='NAME',
+                        help=f"Benchmarks to run: {', '.join(BENCHMARKS)}")
+    parser.add_argument('--repeat', type=int, default=5,
+                        help="Timed runs per benchmark (default: 5)")
+    parser.add_argument('--parts-root', default='.',
+                        help="Directory containing the parts/ folders")
+    parser.add_argument('--cache', action='store_true',
+                        help="Keep the render cache enabled (warm-cache numbers)")
+    parser.add_argument('--save', nargs='?', const=DEFAULT_BASELINE, metavar='PATH',
+                        help="Store results as baseline JSON")
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE,
+                        metavar='PATH', help="Compare against a baseline JSON")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Regression threshold in percent "
+                             f"(default: {DEFAULT_THRESHOLD:g})")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    print("Running benchmarks...")
+    report = run_suite(args.only, args.repeat, args.parts_root, args.cache)
+
+    if args.save:
+        print(f"Baseline written to: {save_baseline(report, args.save)}")
+
+    if args.compare:
+        rows = compare(load_baseline(args.compare), report, args.threshold)
+        print(format_comparison(rows))
+        regressions = [row['name'] for row in rows if row['status'] == 'regression']
+        if regressions:
+            print(f"Regressions beyond {args.threshold:g}%: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
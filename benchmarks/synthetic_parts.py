@@ -0,0 +1,143 @@
+"""
+Synthetic part-library generator for scaling tests.
+
+Writes gray-template parts in the same layout as the bundled ``parts/``
+folders (``<root>/parts/<locus>/<n>.png``) so ``ImageLoader(root)`` loads
+them unchanged. Each part is a ``MAIN_BODY_GRAY`` silhouette with a black
+outline and patches drawn only in ``GRAY_COLORS`` on the bundled background
+color, so every pixel the recolor step looks at is a real template shade.
+
+    python -m benchmarks.synthetic_parts /tmp/big_lib --count 300 --scale 2
+"""
+
+import os
+import sys
+import random
+import argparse
+from typing import Dict, List, Optional, Sequence, Tuple, Union
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from PIL import Image, ImageDraw  # noqa: E402
+
+from cat import MAIN_BODY_GRAY  # noqa: E402
+from config import CAT_PARTS_FOLDERS, GRAY_COLORS, RGB  # noqa: E402
+
+BACKGROUND: RGB = (240, 255, 255)   # background of the bundled parts
+OUTLINE: RGB = (0, 0, 0)
+
+# Size of each locus in the bundled library (scale 1.0)
+BASE_SIZES: Dict[str, Tuple[int, int]] = {
+    'ear': (351, 153),
+    'eyes': (351, 98),
+    'body': (351, 86),
+    'tail': (142, 337),
+    'legs': (493, 169),
+}
+
+PATCH_SHADES: List[RGB] = [c for c in GRAY_COLORS if c != MAIN_BODY_GRAY]
+ShadeDistribution = Union[str, Dict[RGB, float]]
+
+
+def shade_weights(distribution: ShadeDistribution = 'uniform') -> Dict[RGB, float]:
+    """
+    Patch shade weights.
+
+    'uniform' draws every non-main gray equally; 'skewed' makes the first
+    shades of ``GRAY_COLORS`` far more common (weight 1/rank), like real
+    artwork where a few shades dominate. A dict is used as given.
+    """
+    if isinstance(distribution, dict):
+        unknown = [c for c in distribution if tuple(c) not in GRAY_COLORS]
+        if unknown:
+            raise ValueError(f"Shades not in GRAY_COLORS: {unknown}")
+        return {tuple(c): w for c, w in distribution.items()}
+    if distribution == 'uniform':
+        return {c: 1.0 for c in PATCH_SHADES}
+    if distribution == 'skewed':
+        return {c: 1.0 / rank for rank, c in enumerate(PATCH_SHADES, start=1)}
+    raise ValueError(f"Unknown shade distribution: {distribution!r}")
+
+
+def make_part(size: Tuple[int, int], weights: Dict[RGB, float],
+              rng: random.Random, patches: Tuple[int, int] = (3, 8)) -> Image.Image:
+    """One gray template: outlined main-body silhouette plus shaded patches."""
+    width, height = size
+    img = Image.new('RGB', size, BACKGROUND)
+    draw = ImageDraw.Draw(img)
+    outline = max(1, min(width, height) // 40)
+
+    margin_x, margin_y = width // 12, height // 12
+    silhouette = (margin_x, margin_y, width - 1 - margin_x, height - 1 - margin_y)
+    draw.ellipse(silhouette, fill=MAIN_BODY_GRAY, outline=OUTLINE, width=outline)
+
+    shades, shade_w = list(weights), list(weights.values())
+    inner_w = max(2, width - 4 * margin_x)
+    inner_h = max(2, height - 4 * margin_y)
+    for _ in range(rng.randint(*patches)):
+        w = rng.randint(max(1, inner_w // 8), max(1, inner_w // 3))
+        h = rng.randint(max(1, inner_h // 8), max(1, inner_h // 3))
+        x = 2 * margin_x + rng.randint(0, max(0, inner_w - w))
+        y = 2 * margin_y + rng.randint(0, max(0, inner_h - h))
+        shade = rng.choices(shades, shade_w)[0]
+        draw.ellipse((x, y, x + w, y + h), fill=shade)
+    return img
+
+
+def generate_library(root: str, count: int = 50, scale: float = 1.0,
+                     distribution: ShadeDistribution = 'uniform',
+                     seed: Optional[int] = 0,
+                     loci: Sequence[str] = tuple(CAT_PARTS_FOLDERS)) -> Dict[str, int]:
+    """
+    Write ``count`` synthetic variants per locus under ``root``.
+
+    Args:
+        root: Directory that will contain the parts/ folders
+        count: Variants per locus
+        scale: Size factor relative to the bundled parts
+        distribution: Patch shade distribution (see ``shade_weights``)
+        seed: RNG seed (same seed -> same library)
+        loci: Loci to generate (default: all of CAT_PARTS_FOLDERS)
+
+    Returns:
+        Bytes written per locus
+    """
+    rng = random.Random(seed)
+    weights = shade_weights(distribution)
+    written = {}
+    for locus in loci:
+        folder = os.path.join(root, CAT_PARTS_FOLDERS[locus])
+        os.makedirs(folder, exist_ok=True)
+        base_w, base_h = BASE_SIZES[locus]
+        size = (max(8, round(base_w * scale)), max(8, round(base_h * scale)))
+        total = 0
+        for n in range(1, count + 1):
+            path = os.path.join(folder, f"{n}.png")
+            make_part(size, weights, rng).save(path, format='PNG')
+            total += os.path.getsize(path)
+        written[locus] = total
+    return written
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a synthetic part library")
+    parser.add_argument('root', help="Output directory (gets a parts/ folder)")
+    parser.add_argument('--count', type=int, default=50, help="Variants per locus")
+    parser.add_argument('--scale', type=float, default=1.0,
+                        help="Size relative to the bundled parts")
+    parser.add_argument('--distribution', choices=['uniform', 'skewed'],
+                        default='uniform', help="Patch shade distribution")
+    parser.add_argument('--seed', type=int, default=0, help="RNG seed")
+    args = parser.parse_args(argv)
+
+    written = generate_library(
+        args.root, args.count, args.scale, args.distribution, args.seed
+    )
+    total_mb = sum(written.values()) / 1024 ** 2
+    print(f"Wrote {args.count} variants x {len(written)} loci "
+          f"({total_mb:.1f} MB) to {os.path.join(args.root, 'parts')}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -17,12 +17,16 @@ strength), so Gen 3's main fur is one of the two Gen 2 mains.
 import random
 import logging
 from dataclasses import dataclass
-from typing import Any, Dict, List, Optional, Set, Tuple
+from typing import Any, Dict, FrozenSet, List, Optional, Set, Tuple
 
 from PIL import Image
 
+import metrics
 from config import GRAY_COLORS, RGB, GENETICS_PARAMS, CHILD_COLOR_COUNT_WEIGHTS
 from image_processing import CatImageBuilder
+from render_cache import RenderCache, get_default_cache
+from profiling import stage
+from sampling import alias_table, weighted_sample
 
 logger = logging.getLogger(__name__)
 
@@ -42,16 +46,15 @@ def pick_child_color_count() -> int:
     Pick how many color alleles a child carries, using CHILD_COLOR_COUNT_WEIGHTS.
 
     Weights are treated as percentages (or any relative shares) and normalized.
-    Counts with weight 0 are skipped.
+    Counts with weight 0 are skipped. Draws from ``alias_table``, which caches
+    one table per distinct set of weights, so edits take effect immediately.
     """
     weights_map = GENETICS_PARAMS.get(
         'child_color_count_weights', CHILD_COLOR_COUNT_WEIGHTS
     )
-    options = [n for n, w in sorted(weights_map.items()) if w > 0]
-    if not options:
+    if not any(w > 0 for w in weights_map.values()):
         return 4
-    weights = [weights_map[n] for n in options]
-    return random.choices(options, weights=weights, k=1)[0]
+    return alias_table(weights_map).sample()
 
 
 def _weighted_choice(genes: List[Gene]) -> Gene:
@@ -62,23 +65,6 @@ def _weighted_choice(genes: List[Gene]) -> Gene:
     return random.choices(genes, weights=weights, k=1)[0]
 
 
-def _weighted_sample(pool: Dict[Any, float], k: int) -> List[Any]:
-    """Sample up to k distinct keys, weighted by their strength values."""
-    values = list(pool.keys())
-    weights = [max(pool[v], 0.0) for v in values]
-    chosen: List[Any] = []
-    for _ in range(min(k, len(values))):
-        if sum(weights) <= 0:
-            pick = random.choice(values)
-        else:
-            pick = random.choices(values, weights=weights, k=1)[0]
-        idx = values.index(pick)
-        chosen.append(pick)
-        values.pop(idx)
-        weights.pop(idx)
-    return chosen
-
-
 def _innate_strength() -> float:
     """Innate strength of a Gen 0 gene, with optional random jitter."""
     base = GENETICS_PARAMS['base_strength']
@@ -99,20 +85,42 @@ def collect_lineage_colors(cat: 'Cat', max_generation: int = 1) -> Set[RGB]:
 
     Used as the mutation pool: Gen 0 founders and Gen 1 kittens only
     (not Gen 2+), and never a fresh pick from the full CATS_COLORS palette.
-    """
-    colors: Set[RGB] = set()
 
-    def walk(node: Optional['Cat']) -> None:
-        if node is None:
-            return
+    Each cat's result is cached on it (genomes never change), so a pedigree
+    DAG is walked once per ancestor, and a cat whose pool is cached no
+    longer needs its ancestors.
+    """
+    local: Dict[int, FrozenSet[RGB]] = {}
+
+    def cached(node: 'Cat') -> Optional[FrozenSet[RGB]]:
+        store = getattr(node, '_lineage_colors', None)
+        if store is not None and max_generation in store:
+            return store[max_generation]
+        return local.get(id(node))
+
+    pending = [cat]
+    while pending:
+        node = pending[-1]
+        if cached(node) is not None:
+            pending.pop()
+            continue
+        parents = [p for p in (node.parent1, node.parent2) if p is not None]
+        missing = [p for p in parents if cached(p) is None]
+        if missing:
+            pending.extend(missing)
+            continue
+        pending.pop()
+        colors: Set[RGB] = set()
         if node.generation <= max_generation:
-            for gene in node.color_genes:
-                colors.add(gene.value)
-        walk(node.parent1)
-        walk(node.parent2)
-
-    walk(cat)
-    return colors
+            colors.update(gene.value for gene in node.color_genes)
+        for parent in parents:
+            colors |= cached(parent)
+        store = getattr(node, '_lineage_colors', None)
+        if store is not None:
+            store[max_generation] = frozenset(colors)
+        else:
+            local[id(node)] = frozenset(colors)
+    return set(cached(cat))
 
 
 def mutation_color_pool(parent1: 'Cat', parent2: 'Cat') -> Set[RGB]:
@@ -124,23 +132,29 @@ def maybe_add_mutation_gene(
     color_genes: List[Gene],
     parent1: 'Cat',
     parent2: 'Cat',
+    inheritance: Optional['PairInheritance'] = None,
 ) -> List[Gene]:
     """
     Rarely append one weak color gene from Gen 0/1 lineage colors.
 
     The mutation becomes a real allele in the genome (shows in the legend,
     can be inherited). It stays weak so it will not claim MAIN_BODY_GRAY.
-    Prefers a color not already carried by the child.
+    Prefers a color not already carried by the child. ``inheritance``
+    supplies the pair's cached lineage pool.
     """
     chance = GENETICS_PARAMS.get('mutation_chance', 0.0)
     if chance <= 0 or random.random() >= chance:
         return color_genes
 
+    lineage = (
+        inheritance.mutation_pool if inheritance is not None
+        else mutation_color_pool(parent1, parent2)
+    )
     carried = {g.value for g in color_genes}
-    pool = mutation_color_pool(parent1, parent2) - carried
+    pool = lineage - carried
     if not pool:
         # Fall back to any lineage color if everything is already carried
-        pool = mutation_color_pool(parent1, parent2)
+        pool = lineage
     if not pool:
         return color_genes
 
@@ -153,9 +167,129 @@ def maybe_add_mutation_gene(
     logger.info(
         f"Color mutation: added {mut_color} (strength {mut_strength})"
     )
+    metrics.inc('mutations_total')
     return list(color_genes) + [Gene(mut_color, mut_strength)]
 
 
+class PairInheritance:
+    """
+    Inheritance tables for one parent pair, computed once per pair.
+
+    Holds the per-locus part contests, the merged color-strength table,
+    the parents' mains (``must_keep``), the strength ranking and the
+    mutation pool. ``part_genes`` / ``color_genes`` then only sample, so a
+    litter of n siblings pays the setup once. Sampling consumes the RNG
+    exactly like one call of ``inherit_part_genes`` / ``inherit_color_genes``.
+    """
+
+    def __init__(self, parent1: 'Cat', parent2: 'Cat', generation: int = 1):
+        self.parent1 = parent1
+        self.parent2 = parent2
+        self.generation = generation
+        self._mutation_pool: Optional[Set[RGB]] = None
+
+        self._part_table: Optional[List[Tuple[str, Optional[Gene], List[Gene]]]] = None
+        self.match_bonus = match_bonus = GENETICS_PARAMS['match_bonus']
+        self.win_bonus = GENETICS_PARAMS['win_bonus']
+
+        def to_dict(genes: List[Gene]) -> Dict[RGB, float]:
+            d: Dict[RGB, float] = {}
+            for g in genes:
+                d[g.value] = max(d.get(g.value, 0.0), g.strength)
+            return d
+
+        d1 = to_dict(parent1.color_genes)
+        d2 = to_dict(parent2.color_genes)
+
+        self.merged: Dict[RGB, float] = {}
+        for color in set(d1) | set(d2):
+            if color in d1 and color in d2:
+                self.merged[color] = d1[color] + d2[color] + match_bonus
+            else:
+                self.merged[color] = d1.get(color, d2.get(color, 0.0))
+
+        # Parent mains must survive — these are the colors that painted (252,252,252)
+        self.must_keep: List[RGB] = []
+        for main in (_main_color(parent1), _main_color(parent2)):
+            if main not in self.must_keep:
+                self.must_keep.append(main)
+
+        self.remaining: Dict[RGB, float] = {
+            c: s for c, s in self.merged.items() if c not in self.must_keep
+        }
+        self._remaining_items = list(self.remaining)
+        self._remaining_weights = list(self.remaining.values())
+        # Stable sorts: ties keep merged order, matching max() on a dict
+        self.ranked_remaining: List[RGB] = sorted(
+            self.remaining, key=lambda c: self.remaining[c], reverse=True
+        )
+        self.ranked_all: List[RGB] = sorted(
+            self.merged, key=lambda c: self.merged[c], reverse=True
+        )
+
+    @property
+    def mutation_pool(self) -> Set[RGB]:
+        """Gen 0 + Gen 1 lineage colors of the pair (walked once)."""
+        if self._mutation_pool is None:
+            self._mutation_pool = mutation_color_pool(self.parent1, self.parent2)
+        return self._mutation_pool
+
+    @property
+    def part_table(self) -> List[Tuple[str, Optional[Gene], List[Gene]]]:
+        """Per locus: the sure allele when both parents share it, else the contest."""
+        if self._part_table is None:
+            table = []
+            for locus in PART_LOCI:
+                g1 = self.parent1.part_genes[locus]
+                g2 = self.parent2.part_genes[locus]
+                if g1.value is g2.value:
+                    fixed = Gene(g1.value, g1.strength + g2.strength + self.match_bonus)
+                    table.append((locus, fixed, []))
+                else:
+                    table.append((locus, None, [g1, g2]))
+            self._part_table = table
+        return self._part_table
+
+    def part_genes(self) -> Dict[str, Gene]:
+        """Sample one child's body-part genes."""
+        genes: Dict[str, Gene] = {}
+        for locus, fixed, contest in self.part_table:
+            if fixed is not None:
+                genes[locus] = fixed
+            else:
+                winner = _weighted_choice(contest)
+                genes[locus] = Gene(winner.value, winner.strength + self.win_bonus)
+        return genes
+
+    def color_genes(self) -> List[Gene]:
+        """Sample one child's color genes."""
+        strict_from = GENETICS_PARAMS.get('strict_color_from_generation', 2)
+        spillover_chance = GENETICS_PARAMS.get('spillover_chance', 0.0)
+
+        num = min(len(self.merged), max(pick_child_color_count(), len(self.must_keep)))
+        selected: List[RGB] = list(self.must_keep)
+        remaining_slots = num - len(selected)
+
+        if remaining_slots > 0 and self.remaining:
+            if self.generation >= strict_from:
+                selected.extend(self.ranked_remaining[:remaining_slots])
+            else:
+                selected.extend(weighted_sample(
+                    self._remaining_items, self._remaining_weights, remaining_slots
+                ))
+
+        # Occasional spillover: next color by strength after the normal quota
+        if (len(selected) < len(self.merged) and spillover_chance > 0
+                and random.random() < spillover_chance):
+            chosen = set(selected)
+            next_color = next(c for c in self.ranked_all if c not in chosen)
+            selected.append(next_color)
+            logger.debug(f"Color spillover: added {next_color} (rank by strength)")
+            metrics.inc('spillovers_total')
+
+        return [Gene(color, self.merged[color] + self.win_bonus) for color in selected]
+
+
 def inherit_part_genes(parent1: 'Cat', parent2: 'Cat') -> Dict[str, Gene]:
     """
     Inherit body-part genes from two parents using gene strength.
@@ -164,19 +298,7 @@ def inherit_part_genes(parent1: 'Cat', parent2: 'Cat') -> Dict[str, Gene]:
     the child inherits it for sure with combined + bonus strength. Otherwise
     the winner is chosen weighted by strength and gains ``win_bonus``.
     """
-    match_bonus = GENETICS_PARAMS['match_bonus']
-    win_bonus = GENETICS_PARAMS['win_bonus']
-
-    genes: Dict[str, Gene] = {}
-    for locus in PART_LOCI:
-        g1 = parent1.part_genes[locus]
-        g2 = parent2.part_genes[locus]
-        if g1.value is g2.value:
-            genes[locus] = Gene(g1.value, g1.strength + g2.strength + match_bonus)
-        else:
-            winner = _weighted_choice([g1, g2])
-            genes[locus] = Gene(winner.value, winner.strength + win_bonus)
-    return genes
+    return PairInheritance(parent1, parent2).part_genes()
 
 
 def inherit_color_genes(
@@ -199,53 +321,7 @@ def inherit_color_genes(
     quota (e.g. 5th when the quota is 4) may also enter — pure randomness,
     separate from Gen 0/1 mutations.
     """
-    match_bonus = GENETICS_PARAMS['match_bonus']
-    win_bonus = GENETICS_PARAMS['win_bonus']
-    strict_from = GENETICS_PARAMS.get('strict_color_from_generation', 2)
-    spillover_chance = GENETICS_PARAMS.get('spillover_chance', 0.0)
-
-    def to_dict(genes: List[Gene]) -> Dict[RGB, float]:
-        d: Dict[RGB, float] = {}
-        for g in genes:
-            d[g.value] = max(d.get(g.value, 0.0), g.strength)
-        return d
-
-    d1 = to_dict(parent1.color_genes)
-    d2 = to_dict(parent2.color_genes)
-
-    merged: Dict[RGB, float] = {}
-    for color in set(d1) | set(d2):
-        if color in d1 and color in d2:
-            merged[color] = d1[color] + d2[color] + match_bonus
-        else:
-            merged[color] = d1.get(color, d2.get(color, 0.0))
-
-    # Parent mains must survive — these are the colors that painted (252,252,252)
-    must_keep: List[RGB] = []
-    for main in (_main_color(parent1), _main_color(parent2)):
-        if main not in must_keep:
-            must_keep.append(main)
-
-    num = min(len(merged), max(pick_child_color_count(), len(must_keep)))
-    selected: List[RGB] = list(must_keep)
-    remaining_slots = num - len(selected)
-    remaining = {c: s for c, s in merged.items() if c not in selected}
-
-    if remaining_slots > 0 and remaining:
-        if generation >= strict_from:
-            ranked = sorted(remaining.keys(), key=lambda c: remaining[c], reverse=True)
-            selected.extend(ranked[:remaining_slots])
-        else:
-            selected.extend(_weighted_sample(remaining, remaining_slots))
-
-    # Occasional spillover: next color by strength after the normal quota
-    leftover = {c: s for c, s in merged.items() if c not in selected}
-    if leftover and spillover_chance > 0 and random.random() < spillover_chance:
-        next_color = max(leftover.keys(), key=lambda c: leftover[c])
-        selected.append(next_color)
-        logger.debug(f"Color spillover: added {next_color} (rank by strength)")
-
-    return [Gene(color, merged[color] + win_bonus) for color in selected]
+    return PairInheritance(parent1, parent2, generation).color_genes()
 
 
 def reinforce_main_body_gene(color_genes: List[Gene]) -> List[Gene]:
@@ -355,12 +431,16 @@ class Cat:
     """Represents a cat with a genome (color + body-part genes)."""
 
     def __init__(self, name: str, part_genes: Dict[str, Gene],
-                 color_genes: List[Gene], generation: int):
+                 color_genes: List[Gene], generation: int,
+                 reinforce: bool = True):
         self.name = name
         self.generation = generation
         self.part_genes = part_genes
-        # Main-body claim boosts strength before it is passed to children
-        self.color_genes = reinforce_main_body_gene(color_genes)
+        # Main-body claim boosts strength before it is passed to children.
+        # reinforce=False restores a stored genome whose bonus is already in.
+        self.color_genes = (
+            reinforce_main_body_gene(color_genes) if reinforce else list(color_genes)
+        )
         self.parts: Dict[str, Image.Image] = {
             loc: gene.value for loc, gene in part_genes.items()
         }
@@ -369,6 +449,9 @@ class Cat:
         self.parent1: Optional['Cat'] = None
         self.parent2: Optional['Cat'] = None
         self.image: Optional[Image.Image] = None
+        self._color_map: Optional[Dict[RGB, RGB]] = None
+        # max_generation -> collect_lineage_colors result
+        self._lineage_colors: Dict[int, FrozenSet[RGB]] = {}
         logger.debug(f"Created cat: {name} (Gen {generation})")
 
     def _label_title(self) -> str:
@@ -379,13 +462,53 @@ class Cat:
         ranked = sorted(self.color_genes, key=lambda g: g.strength, reverse=True)
         return [(g.value, g.strength) for g in ranked]
 
-    def generate_image(self) -> Image.Image:
-        """Render the cat from its genome (parts + strength-weighted colors)."""
-        img = CatImageBuilder.combine_parts(self.parts)
-        color_map = build_color_map(self.color_genes)
-        img = CatImageBuilder.apply_color_numpy(img, color_map)
+    def _text_padding(self, layout_mode: Optional[str] = None) -> int:
+        return CatImageBuilder.text_padding(
+            self._label_title(), self._color_strengths(), layout_mode
+        )
+
+    def image_size(self, layout_mode: Optional[str] = None) -> Tuple[int, int]:
+        """Size of the rendered image, from part dimensions only (no pixels)."""
+        return CatImageBuilder.combined_size(
+            self.parts, self._text_padding(layout_mode)
+        )
+
+    @property
+    def color_map(self) -> Dict[RGB, RGB]:
+        """Gray -> color map, drawn once so every re-render shows the same coat."""
+        if self._color_map is None:
+            self._color_map = build_color_map(self.color_genes)
+        return self._color_map
+
+    def render_reference(self) -> Image.Image:
+        """Render straight through combine_parts / recolor / label (no cache)."""
+        img = CatImageBuilder.combine_parts(self.parts, self._text_padding())
+        img = CatImageBuilder.apply_color_numpy(img, self.color_map)
         CatImageBuilder.add_cat_label(img, self._label_title(), self._color_strengths())
-        self.image = img
+        return img
+
+    def generate_image(self, retain: bool = True,
+                       cache: Optional[RenderCache] = None) -> Image.Image:
+        """
+        Render the cat from its genome (parts + strength-weighted colors).
+
+        Uses the layered render cache (``cache`` or the process default) when
+        enabled; the result is identical to ``render_reference``. With
+        ``retain=False`` the image is only returned, not kept on
+        ``self.image`` — the pedigree canvas pastes and drops it.
+        """
+        cache = cache or get_default_cache()
+        with stage('render_cat', cat=self.name, generation=self.generation):
+            if cache is None:
+                img = self.render_reference()
+            else:
+                img = cache.render(
+                    self.parts, self.color_map, self._label_title(),
+                    self._color_strengths(), self._text_padding(),
+                )
+        metrics.inc('cats_rendered_total')
+        if retain:
+            self.image = img
         logger.info(f"Generated image for {self.name} (Gen {self.generation})")
         return img
 
@@ -404,18 +527,100 @@ class ParentCat(Cat):
         super().__init__(name, part_genes, color_genes, generation=0)
 
 
+def offspring_generation(parent1: Cat, parent2: Cat) -> int:
+    """
+    Pedigree generation of a kitten of two cats: Gen 1 from two Gen 0
+    parents, Gen 3 (great-grandkitten) from two Gen 2+ parents, else Gen 2.
+    The pedigree has four generations, so nothing is filed past Gen 3.
+    """
+    if parent1.generation == 0 and parent2.generation == 0:
+        return 1
+    return 3 if parent1.generation >= 2 and parent2.generation >= 2 else 2
+
+
 class OffspringCat(Cat):
     """A cat whose genome is inherited from two parents with gene strength."""
 
-    def __init__(self, name: str, parent1: Cat, parent2: Cat, generation: int):
-        part_genes = inherit_part_genes(parent1, parent2)
-        color_genes = inherit_color_genes(parent1, parent2, generation)
-        color_genes = maybe_add_mutation_gene(color_genes, parent1, parent2)
+    def __init__(self, name: str, parent1: Cat, parent2: Cat, generation: int,
+                 inheritance: Optional[PairInheritance] = None):
+        # Siblings of a litter share one PairInheritance
+        inheritance = inheritance or PairInheritance(parent1, parent2, generation)
+        part_genes = inheritance.part_genes()
+        color_genes = inheritance.color_genes()
+        color_genes = maybe_add_mutation_gene(
+            color_genes, parent1, parent2, inheritance
+        )
         super().__init__(name, part_genes, color_genes, generation)
         self.parent1 = parent1
         self.parent2 = parent2
 
 
+def cat_to_genome(cat: Cat) -> Dict[str, Any]:
+    """
+    JSON-friendly genome of a cat: part refs, colors and strengths.
+
+    Part refs come from ``img.info['part_ref']`` set by ``ImageLoader``.
+    """
+    return {
+        'name': cat.name,
+        'generation': cat.generation,
+        'parts': {
+            loc: gene.value.info.get('part_ref')
+            for loc, gene in cat.part_genes.items()
+        },
+        'part_strengths': {
+            loc: gene.strength for loc, gene in cat.part_genes.items()
+        },
+        'colors': [
+            {'color': list(g.value), 'strength': g.strength}
+            for g in cat.color_genes
+        ],
+    }
+
+
+def cat_from_genome(
+    genome: Dict[str, Any],
+    parts_images: Dict[str, Dict[str, Image.Image]],
+) -> Cat:
+    """
+    Rebuild a Cat from a genome dict (see ``cat_to_genome``).
+
+    Strengths are taken as stored (no main-body bonus is re-applied).
+    Missing part strengths default to the innate strength.
+    Raises ValueError / KeyError on malformed genomes or unknown parts.
+    """
+    refs = genome.get('parts') or {}
+    missing = [loc for loc in PART_LOCI if loc not in refs]
+    if missing:
+        raise ValueError(f"Genome is missing parts: {missing}")
+    colors = genome.get('colors') or []
+    if not colors:
+        raise ValueError("Genome must carry at least one color")
+
+    parts = CatImageBuilder.resolve_parts(
+        parts_images, {loc: refs[loc] for loc in PART_LOCI}
+    )
+    part_strengths = genome.get('part_strengths') or {}
+    part_genes = {
+        loc: Gene(parts[loc], float(part_strengths.get(loc, _innate_strength())))
+        for loc in PART_LOCI
+    }
+    color_genes = []
+    for entry in colors:
+        color = tuple(int(v) for v in entry['color'])
+        if len(color) != 3 or not all(0 <= v <= 255 for v in color):
+            raise ValueError(f"Invalid RGB color: {entry['color']!r}")
+        color_genes.append(Gene(color, float(entry['strength'])))
+
+    return Cat(
+        genome.get('name') or 'Cat',
+        part_genes,
+        color_genes,
+        int(genome.get('generation', 0)),
+        reinforce=False,
+    )
+
+
 class CatFamily:
     """Manages a family tree of cats"""
 
@@ -481,14 +686,56 @@ class CatFamily:
 
     def create_grandkitten(self, parent1: Cat, parent2: Cat,
                            name: str = None) -> OffspringCat:
-        """Create a grandkitten (Gen 2) or great-grandkitten (Gen 3)."""
+        """
+        Create a grandkitten (Gen 2) or great-grandkitten (Gen 3); the
+        generation follows ``offspring_generation``, as for litters.
+        """
+        generation = offspring_generation(parent1, parent2)
         if name is None:
-            name = self.get_random_name("GrandKitten ")
+            name = self.get_random_name("" if generation == 1 else "GrandKitten ")
 
-        generation = 3 if parent1.generation >= 2 and parent2.generation >= 2 else 2
         grandkitten = OffspringCat(name, parent1, parent2, generation)
-        self.grandkittens.append(grandkitten)
+        (self.kittens if generation == 1 else self.grandkittens).append(grandkitten)
         self.all_cats.append(grandkitten)
 
         logger.info(f"Created grandkitten: {name} (Gen {generation})")
         return grandkitten
+
+    def create_litter(self, parent1: Cat, parent2: Cat, n: int,
+                      names: Optional[List[str]] = None) -> List[OffspringCat]:
+        """
+        Create ``n`` siblings from one pair.
+
+        The pair's inheritance tables are built once and sampled per
+        sibling. The generation is ``offspring_generation`` of the pair.
+        """
+        generation = offspring_generation(parent1, parent2)
+        inheritance = PairInheritance(parent1, parent2, generation)
+        prefix = "" if generation == 1 else "GrandKitten "
+
+        litter = []
+        for i in range(n):
+            name = names[i] if names and i < len(names) else self.get_random_name(prefix)
+            kitten = OffspringCat(name, parent1, parent2, generation, inheritance)
+            (self.kittens if generation == 1 else self.grandkittens).append(kitten)
+            self.all_cats.append(kitten)
+            litter.append(kitten)
+
+        logger.info(
+            f"Created litter of {n} (Gen {generation}) from "
+            f"{parent1.name} x {parent2.name}"
+        )
+        return litter
+
+
+def render_litter(cats: List[Cat],
+                  cache: Optional[RenderCache] = None) -> List[Image.Image]:
+    """
+    Render siblings as one batch through a shared render cache.
+
+    Siblings often inherit the same parts, so composed gray templates are
+    built once and only recolored per cat. Uses ``cache``, else the process
+    cache, else a cache private to this batch.
+    """
+    cache = cache or get_default_cache() or RenderCache()
+    return [cat.generate_image(retain=False, cache=cache) for cat in cats]
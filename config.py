@@ -27,6 +27,9 @@ GENERATION_PARAMS = {
     'text_padding_bottom': 200,     # Space for name + up to 5 color strength lines
     'swatch_size': 18,              # Color swatch side length (px)
     'column_gap': 48,               # Gap between pedigree generation columns
+    'layout_mode': 'grid',          # 'grid' (uniform cells) or 'tight' (packed by cat size)
+    'label_margin_top': 8,          # Tight layout: space between cat and its label
+    'row_gap': 16,                  # Tight layout: vertical gap between cats in a column
     'connector_color': (80, 80, 80),  # Pedigree link line color
     'connector_width': 2,           # Pedigree link line width
 }
@@ -73,6 +76,106 @@ CAT_PARTS_FOLDERS: Dict[str, str] = {
 }
 
 
+# Layered render cache: part templates, recolored bodies and label strips.
+# Layers are bounded by pixel bytes (width * height * bands); 0 turns a layer
+# off. Random cats rarely repeat a body or label, so the process cache only
+# keeps templates.
+RENDER_CACHE_SETTINGS = {
+    'enabled': True,
+    'max_template_bytes': 64 * 1024 ** 2,   # combined gray part templates
+    'max_body_bytes': 0,                    # recolored cat bodies (no label area)
+    'max_label_bytes': 0,                   # label strips (name + color legend)
+}
+
+# Caches for replay workloads that re-render the same cats (FamilyGraph
+# restyles, golden checks): body and label layers on
+REPLAY_CACHE_SETTINGS = {
+    'max_template_bytes': 64 * 1024 ** 2,
+    'max_body_bytes': 128 * 1024 ** 2,
+    'max_label_bytes': 16 * 1024 ** 2,
+}
+
+
+# Local HTTP render service (python main.py --serve)
+SERVICE_SETTINGS = {
+    'host': '127.0.0.1',
+    'port': 8765,
+    'workers': 4,           # renders running at once
+    'max_queue': 16,        # renders waiting for a worker before 503
+    'timeout': 120,         # seconds a request waits for its render
+    'max_body_bytes': 64 * 1024,  # larger POST /cat bodies get 413
+    'parts_poll_interval': 2.0,  # seconds between parts/ reload checks (0 = off)
+}
+
+
+# Contact sheets (python main.py --montage N)
+MONTAGE_SETTINGS = {
+    'scale': 0.25,          # pedigree size relative to the full image
+    'columns': 6,           # families per sheet row
+    'rows': 4,              # rows per page; more families start a new page
+    'gutter': 24,           # px between and around families
+    'max_scaled_bytes': 32 * 1024 ** 2,  # scaled cats kept for reuse (pixel bytes)
+}
+
+
+# Animated pedigrees (python main.py --animate reveal|rerolls)
+ANIMATION_SETTINGS = {
+    'scale': 0.5,           # frame size relative to the full pedigree
+    'frames': 8,            # frames for --animate rerolls
+    'frame_ms': 700,        # display time per frame
+    'hold_ms': 2000,        # display time of the last frame
+}
+
+
+# Seed gallery export (python gallery.py)
+GALLERY_SETTINGS = {
+    'out_dir': 'gallery',
+    'thumb_width': 640,     # px; the 4 x 2 founder sheet is scaled to this
+    'workers': 4,           # render processes
+}
+
+
+# Kinship / ancestry over DAG pedigrees (lineage.py)
+LINEAGE_SETTINGS = {
+    'depth': 6,             # generations of ancestry kept in bitsets / kinship
+    'max_memo': 1_000_000,  # memoized kinship pairs before the table is reset
+}
+
+
+# Open-population breeding simulator (python simulation.py)
+SIMULATION_SETTINGS = {
+    'out_dir': 'simulation',
+    'population': 200,      # cats per generation
+    'generations': 50,
+    'mating': 'random',     # random | assortative | kinship
+    'candidates': 8,        # mates considered per pairing (assortative / kinship)
+    'max_kinship': 0.0625,  # kinship mating: first candidate at or below wins
+    'litter_size': 2,       # kittens per pair
+    'checkpoint_every': 5,  # generations between checkpoints
+    'sample_every': 10,     # generations between rendered samples
+    'samples': 4,           # cats rendered per sampled generation
+}
+
+
+# Genome archives (--archive): small families are batched into larger chunks
+ARCHIVE_SETTINGS = {
+    'pedigree_chunk_cats': 4096,  # queued cats written as one chunk
+}
+
+
+# Trait search over genome archives (python trait_index.py)
+TRAIT_INDEX_SETTINGS = {
+    'max_distance': 40,     # RGB (Euclidean) distance for color matches
+    'limit': 50,            # matches listed / rendered by the CLI
+}
+
+
+# Cumulative metrics export (--metrics-file)
+METRICS_SETTINGS = {
+    'interval': 10,         # seconds between metrics file rewrites
+}
+
+
 OUTPUT_SETTINGS = {
     'default_filename': 'cats_family.png',
     'format': 'PNG',
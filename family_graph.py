@@ -0,0 +1,207 @@
+"""
+Incremental pedigree recomputation.
+
+The 15-cat pedigree is a dependency graph: founder -> kitten -> grandkitten
+-> great-grandkitten. ``FamilyGraph`` tracks which nodes are dirty, so
+changing one Gen 0 cat (or re-rolling one generation) recomputes only the
+affected descendants' genomes and images and repaints only their canvas
+regions. Everything else is reused.
+
+Nodes are addressed by pedigree entry index (layout order, see
+``FamilyLayoutBuilder.flatten_pedigree``): 0, 1, 3, 4, 6, 7, 9, 10 are Gen 0,
+2, 5, 8, 11 Gen 1, 12 and 13 Gen 2, 14 the Gen 3 great-grandkitten.
+"""
+
+import logging
+from typing import Any, Dict, List, Optional, Set
+
+from PIL import Image, ImageDraw
+
+from config import (
+    GENERATION_PARAMS, RENDER_CACHE_SETTINGS, REPLAY_CACHE_SETTINGS, RGB,
+)
+from image_processing import (
+    FamilyLayoutBuilder, PedigreeLayout, PEDIGREE_COLUMNS, PEDIGREE_PARENTS,
+)
+from cat import Cat, CatFamily, OffspringCat, ParentCat
+from render_cache import RenderCache
+
+logger = logging.getLogger(__name__)
+
+# Parent entry index -> child entry indices
+PEDIGREE_CHILDREN: Dict[int, List[int]] = {}
+for _child, _parents in PEDIGREE_PARENTS.items():
+    for _parent in _parents:
+        PEDIGREE_CHILDREN.setdefault(_parent, []).append(_child)
+
+
+class FamilyGraph:
+    """A rendered pedigree that recomputes only what changed."""
+
+    def __init__(self, family: CatFamily, pedigree: Dict[str, Any]):
+        """
+        Wrap a pedigree of cats (as returned by ``generate_cat_family``).
+
+        Args:
+            family: The CatFamily that owns the cats (kept in sync on change)
+            pedigree: Pedigree dict whose entries are Cat objects
+        """
+        self.family = family
+        self.nodes: List[Cat] = FamilyLayoutBuilder.flatten_pedigree(pedigree)
+        self.images: List[Optional[Image.Image]] = [None] * len(self.nodes)
+        self.canvas: Optional[Image.Image] = None
+        self.layout: Optional[PedigreeLayout] = None
+        # Entry indices painted by the last render (all of them on a redraw)
+        self.repainted: List[int] = []
+        # Nodes whose genome must be re-inherited from their parents
+        self._stale_genomes: Set[int] = set()
+        # Nodes whose image must be re-rendered and repainted
+        self._stale_images: Set[int] = set(range(len(self.nodes)))
+        # Restyles re-render the same cats, so keep bodies and labels too
+        self.cache: Optional[RenderCache] = (
+            RenderCache(REPLAY_CACHE_SETTINGS)
+            if RENDER_CACHE_SETTINGS.get('enabled', True) else None
+        )
+
+    @staticmethod
+    def descendants(idx: int) -> Set[int]:
+        """All entry indices downstream of ``idx`` (excluding itself)."""
+        found: Set[int] = set()
+        stack = list(PEDIGREE_CHILDREN.get(idx, []))
+        while stack:
+            child = stack.pop()
+            if child not in found:
+                found.add(child)
+                stack.extend(PEDIGREE_CHILDREN.get(child, []))
+        return found
+
+    @property
+    def dirty(self) -> Set[int]:
+        """Entry indices that the next ``render`` will recompute."""
+        return self._stale_genomes | self._stale_images
+
+    def pedigree(self) -> Dict[str, Any]:
+        """The current cats as a pedigree dict."""
+        nodes = self.nodes
+        return {
+            'pairs': [tuple(nodes[i * 3:i * 3 + 3]) for i in range(4)],
+            'grandkittens': nodes[12:14],
+            'great_grandkitten': nodes[14],
+        }
+
+    def _replace_cat(self, idx: int, new_cat: Cat) -> None:
+        """Swap a node's cat, keeping the CatFamily lists in sync."""
+        old_cat = self.nodes[idx]
+        self.nodes[idx] = new_cat
+        for group in (
+            self.family.all_cats, self.family.parents,
+            self.family.kittens, self.family.grandkittens,
+        ):
+            for pos, cat in enumerate(group):
+                if cat is old_cat:
+                    group[pos] = new_cat
+
+    def set_founder(self, idx: int, color: Optional[RGB] = None,
+                    parts: Optional[Dict[str, Image.Image]] = None) -> None:
+        """
+        Change a Gen 0 cat's color and/or parts (name is kept).
+
+        The founder's image and all its descendants' genomes become dirty.
+        """
+        if idx not in PEDIGREE_COLUMNS[0]:
+            raise ValueError(f"Entry {idx} is not a Gen 0 founder")
+        old = self.nodes[idx]
+        founder = ParentCat(
+            old.name,
+            color if color is not None else old.color_genes[0].value,
+            parts if parts is not None else old.parts,
+        )
+        self._replace_cat(idx, founder)
+        self._stale_images.add(idx)
+        self._stale_genomes |= self.descendants(idx)
+        logger.info(f"Founder {old.name} changed; {len(self.dirty)} cats dirty")
+
+    def assign(self, nodes: List[Cat]) -> None:
+        """
+        Replace the cats wholesale (e.g. a stored re-roll).
+
+        Only entries whose cat object differs are marked for re-rendering.
+        """
+        if len(nodes) != len(self.nodes):
+            raise ValueError(f"Expected {len(self.nodes)} cats, got {len(nodes)}")
+        for idx, cat in enumerate(nodes):
+            if cat is not self.nodes[idx]:
+                self._replace_cat(idx, cat)
+                self._stale_images.add(idx)
+
+    def reroll(self, idx: int) -> None:
+        """Re-inherit one offspring (and everything downstream of it)."""
+        if idx not in PEDIGREE_PARENTS:
+            raise ValueError(f"Entry {idx} is a founder; use set_founder")
+        self._stale_genomes |= {idx} | self.descendants(idx)
+
+    def reroll_generation(self, generation: int) -> None:
+        """Re-inherit every cat of a generation (1-3) and its descendants."""
+        if not 1 <= generation < len(PEDIGREE_COLUMNS):
+            raise ValueError(f"Cannot re-roll generation {generation}")
+        for idx in PEDIGREE_COLUMNS[generation]:
+            self.reroll(idx)
+
+    def recompute(self) -> Set[int]:
+        """
+        Re-inherit dirty genomes, parents before children.
+
+        Returns the entry indices whose genome was recomputed.
+        """
+        recomputed: Set[int] = set()
+        for generation, column in enumerate(PEDIGREE_COLUMNS[1:], start=1):
+            for idx in column:
+                if idx not in self._stale_genomes:
+                    continue
+                p1, p2 = (self.nodes[i] for i in PEDIGREE_PARENTS[idx])
+                child = OffspringCat(self.nodes[idx].name, p1, p2, generation)
+                self._replace_cat(idx, child)
+                recomputed.add(idx)
+        self._stale_images |= self._stale_genomes
+        self._stale_genomes.clear()
+        return recomputed
+
+    def render(self, background_color: RGB = None) -> Image.Image:
+        """
+        Bring the canvas up to date and return it.
+
+        Only dirty cats are rendered. If the layout is unchanged their boxes
+        are repainted in place; otherwise the canvas is redrawn from the
+        cached images of clean cats.
+        """
+        self.recompute()
+        background_color = background_color or GENERATION_PARAMS['background_color']
+
+        for idx in sorted(self._stale_images):
+            self.images[idx] = self.nodes[idx].generate_image(
+                retain=False, cache=self.cache
+            )
+
+        layout = FamilyLayoutBuilder.plan_layout(
+            [img.size for img in self.images]
+        )
+        if self.canvas is None or layout != self.layout:
+            self.canvas = Image.new(
+                'RGB', (layout.width, layout.height), background_color
+            )
+            FamilyLayoutBuilder.draw_connectors(ImageDraw.Draw(self.canvas), layout)
+            repaint = range(len(self.nodes))
+        else:
+            repaint = sorted(self._stale_images)
+
+        for idx in repaint:
+            x, y, _w, _h = layout.boxes[idx]
+            self.canvas.paste(self.images[idx], (x, y))
+
+        logger.info(
+            f"Repainted {len(repaint)} of {len(self.nodes)} pedigree cells"
+        )
+        self.repainted = list(repaint)
+        self.layout = layout
+        self._stale_images.clear()
+        return self.canvas
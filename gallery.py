@@ -0,0 +1,340 @@
+"""
+Incremental gallery export of saved Gen 0 seeds.
+
+Every seed in the seeds file becomes a thumbnail of its eight founders
+(rendered through ``_build_parents_from_snapshots`` and ``generate_image``)
+and a card on ``index.html``. Thumbnails are rendered on a process pool;
+each worker loads the part library once.
+
+Each entry is keyed by the seed's content hash and founder names, the
+stamps of the part files it uses and a fingerprint of the render settings.
+``manifest.json`` remembers the keys, so a rerun only renders seeds that
+are new or whose key changed, and deletes thumbnails of removed seeds.
+
+    python gallery.py                          # -> gallery/index.html
+    python gallery.py --out-dir catalog --workers 8
+"""
+
+import os
+import sys
+import json
+import html
+import hashlib
+import logging
+import argparse
+from concurrent.futures import ProcessPoolExecutor, as_completed
+from typing import Any, Dict, List, Optional, Tuple
+
+from config import (
+    CAT_PARTS_FOLDERS, GALLERY_SETTINGS, GENERATION_PARAMS, GENETICS_PARAMS,
+    GRAY_COLORS, SEEDS_FILE,
+)
+from seed_index import color_key, content_hash
+from seeds import PART_ORDER, list_seeds, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_FILE = 'manifest.json'
+INDEX_FILE = 'index.html'
+GALLERY_VERSION = 1  # bump when the thumbnail layout changes
+
+# Per-process state of pool workers (see _init_worker)
+_worker_parts: Optional[Dict[str, Dict[str, Any]]] = None
+_worker_names: List[str] = []
+
+
+def _font_stamp(font_name: str, font_size: int) -> List[Any]:
+    """The font file labels actually use at this size, with its stamp."""
+    from image_processing import CatImageBuilder
+
+    path = getattr(CatImageBuilder._load_font(font_name, font_size), 'path', None)
+    if not isinstance(path, str):
+        return [font_name, font_size, 'default']
+    try:
+        st = os.stat(path)
+        return [path, font_size, st.st_mtime_ns, st.st_size]
+    except OSError:
+        return [path, font_size]
+
+
+def config_fingerprint(thumb_width: int) -> str:
+    """Hash of every setting that changes how a thumbnail looks."""
+    from image_processing import LABEL_GAP, LABEL_ROW_GAP
+    from render_cache import LABEL_CONFIG_KEYS
+
+    settings = {
+        'version': GALLERY_VERSION,
+        'thumb_width': thumb_width,
+        'generation': GENERATION_PARAMS,
+        'genetics': GENETICS_PARAMS,
+        'grays': GRAY_COLORS,
+        # Label layout, and the fonts it resolves to on this machine
+        'label': {key: GENERATION_PARAMS.get(key) for key in LABEL_CONFIG_KEYS},
+        'label_gaps': [LABEL_GAP, LABEL_ROW_GAP],
+        'fonts': [
+            _font_stamp(GENERATION_PARAMS['font_name'], GENERATION_PARAMS[key])
+            for key in ('font_size', 'gene_font_size')
+        ],
+    }
+    data = json.dumps(settings, sort_keys=True, default=str).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+
+def _parts_stamps(cats: List[Dict[str, Any]], base_path: str) -> List[Any]:
+    """(mtime_ns, size) of every part file a seed uses, in order."""
+    stamps = []
+    for cat in cats:
+        for locus in PART_ORDER:
+            ref = cat.get('parts', {}).get(locus, '')
+            path = os.path.join(
+                base_path, CAT_PARTS_FOLDERS[locus], f"{ref[len(locus) + 1:]}.png"
+            )
+            try:
+                st = os.stat(path)
+                stamps.append([st.st_mtime_ns, st.st_size])
+            except OSError:
+                stamps.append(None)
+    return stamps
+
+
+def entry_key(seed: Dict[str, Any], fingerprint: str, base_path: str = ".") -> str:
+    """Cache key of one gallery entry."""
+    cats = seed['cats']
+    data = json.dumps([
+        content_hash(cats),
+        [cat.get('name') for cat in cats],
+        _parts_stamps(cats, base_path),
+        fingerprint,
+    ]).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+
+def _init_worker(base_path: str) -> None:
+    global _worker_parts, _worker_names
+    from image_processing import ImageLoader
+    from main import load_cat_names
+
+    logging.getLogger().setLevel(logging.WARNING)
+    _worker_parts = ImageLoader(base_path).load_all_parts()
+    _worker_names = load_cat_names()
+
+
+def render_thumbnail(cats: List[Dict[str, Any]], path: str, thumb_width: int,
+                     parts_images: Optional[Dict[str, Dict[str, Any]]] = None,
+                     names: Optional[List[str]] = None) -> str:
+    """
+    Render a seed's founders as a 4 x 2 sheet scaled to ``thumb_width``.
+
+    Pairs sit side by side, as in the pedigree. Written atomically.
+    """
+    from PIL import Image
+    from cat import CatFamily
+    from main import _build_parents_from_snapshots
+
+    parts_images = parts_images if parts_images is not None else _worker_parts
+    names = names if names is not None else _worker_names
+    family = CatFamily(names or ['Cat'])
+    parents = _build_parents_from_snapshots(family, parts_images, cats)
+
+    images = [cat.generate_image(retain=False) for cat in parents]
+    cell_w = max(img.width for img in images)
+    cell_h = max(img.height for img in images)
+    columns = 4
+    rows = (len(images) + columns - 1) // columns
+    sheet = Image.new('RGB', (cell_w * columns, cell_h * rows),
+                      GENERATION_PARAMS['background_color'])
+    for i, img in enumerate(images):
+        x = (i % columns) * cell_w + (cell_w - img.width) // 2
+        y = (i // columns) * cell_h + (cell_h - img.height)
+        sheet.paste(img, (x, y))
+    del images
+
+    height = max(1, round(sheet.height * thumb_width / sheet.width))
+    thumb = sheet.resize((thumb_width, height), Image.LANCZOS)
+
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    thumb.save(tmp_path, format='PNG', optimize=True)
+    os.replace(tmp_path, path)
+    return path
+
+
+def _render_job(cats: List[Dict[str, Any]], path: str, thumb_width: int) -> str:
+    return render_thumbnail(cats, path, thumb_width)
+
+
+def load_manifest(out_dir: str) -> Dict[str, Any]:
+    try:
+        with open(os.path.join(out_dir, MANIFEST_FILE), 'r', encoding='utf-8') as f:
+            manifest = json.load(f)
+        if manifest.get('version') == GALLERY_VERSION:
+            return manifest
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError) as e:
+        logger.warning(f"Ignoring unreadable gallery manifest: {e}")
+    return {'version': GALLERY_VERSION, 'entries': {}}
+
+
+def write_index(out_dir: str, seeds: List[Dict[str, Any]],
+                entries: Dict[str, Dict[str, Any]]) -> str:
+    """Write index.html with one card per seed, newest first."""
+    cards = []
+    for seed in sorted(seeds, key=lambda s: s['id'], reverse=True):
+        entry = entries.get(str(seed['id']))
+        if entry is None:
+            continue
+        names = ', '.join(html.escape(cat.get('name', '?')) for cat in seed['cats'])
+        swatches = ''.join(
+            f'<span class="swatch" style="background:{color_key(cat["color"])}" '
+            f'title="{color_key(cat["color"])}"></span>'
+            for cat in seed['cats']
+        )
+        cards.append(
+            f'<figure id="seed-{seed["id"]}">'
+            f'<img src="{html.escape(entry["file"])}" loading="lazy" alt="Seed #{seed["id"]}">'
+            f'<figcaption><b>#{seed["id"]}</b> {names}<br>{swatches}</figcaption>'
+            f'</figure>'
+        )
+    page = (
+        '<!DOCTYPE html>\n<html><head><meta charset="utf-8">'
+        '<title>Gen 0 seeds</title><style>'
+        'body{font-family:sans-serif;background:#f0ffff;margin:16px}'
+        '.grid{display:grid;grid-template-columns:repeat(auto-fill,minmax(320px,1fr));gap:16px}'
+        'figure{margin:0;background:#fff;padding:8px;border-radius:6px}'
+        'img{width:100%;height:auto}'
+        '.swatch{display:inline-block;width:14px;height:14px;margin-right:2px;'
+        'border:1px solid #555}'
+        '</style></head><body>'
+        f'<h1>Gen 0 seeds ({len(cards)})</h1><div class="grid">\n'
+        + '\n'.join(cards)
+        + '\n</div></body></html>\n'
+    )
+    path = os.path.join(out_dir, INDEX_FILE)
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(page)
+    return path
+
+
+def export_gallery(out_dir: str = GALLERY_SETTINGS['out_dir'],
+                   seeds_file: str = SEEDS_FILE, base_path: str = ".",
+                   workers: int = GALLERY_SETTINGS['workers'],
+                   thumb_width: int = GALLERY_SETTINGS['thumb_width']) -> Dict[str, int]:
+    """
+    Bring the gallery in ``out_dir`` up to date with the seeds file.
+
+    Returns:
+        {'rendered': n, 'reused': n, 'removed': n, 'failed': n}
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    seeds = list_seeds(seeds_file)
+    manifest = load_manifest(out_dir)
+    old_entries: Dict[str, Dict[str, Any]] = manifest['entries']
+    fingerprint = config_fingerprint(thumb_width)
+
+    entries: Dict[str, Dict[str, Any]] = {}
+    todo: List[Tuple[str, Dict[str, Any], str]] = []
+    for seed in seeds:
+        seed_id = str(seed['id'])
+        key = entry_key(seed, fingerprint, base_path)
+        old = old_entries.get(seed_id)
+        if (old is not None and old['key'] == key
+                and os.path.exists(os.path.join(out_dir, old['file']))):
+            entries[seed_id] = old
+        else:
+            todo.append((seed_id, seed, key))
+
+    stats = {'rendered': 0, 'reused': len(entries), 'removed': 0, 'failed': 0}
+
+    def finish(seed_id: str, key: str, filename: str) -> None:
+        entries[seed_id] = {'key': key, 'file': filename}
+        stats['rendered'] += 1
+
+    def fail(seed_id: str, error: Exception) -> None:
+        logger.error(f"Thumbnail for seed #{seed_id} failed: {error}")
+        stats['failed'] += 1
+        # Keep the last good thumbnail (and its old key, so a rerun retries)
+        old = old_entries.get(seed_id)
+        if old is not None and os.path.exists(os.path.join(out_dir, old['file'])):
+            entries[seed_id] = old
+
+    jobs = [
+        (seed_id, key, f"seed_{seed_id}_{key[:12]}.png", seed['cats'])
+        for seed_id, seed, key in todo
+    ]
+    if jobs and workers > 1:
+        with ProcessPoolExecutor(max_workers=min(workers, len(jobs)),
+                                 initializer=_init_worker,
+                                 initargs=(base_path,)) as pool:
+            futures = {
+                pool.submit(_render_job, cats, os.path.join(out_dir, filename),
+                            thumb_width): (seed_id, key, filename)
+                for seed_id, key, filename, cats in jobs
+            }
+            for future in as_completed(futures):
+                seed_id, key, filename = futures[future]
+                try:
+                    future.result()
+                    finish(seed_id, key, filename)
+                except Exception as e:
+                    fail(seed_id, e)
+    elif jobs:
+        from image_processing import ImageLoader
+        from main import load_cat_names
+
+        parts_images = ImageLoader(base_path).load_all_parts()
+        names = load_cat_names()
+        for seed_id, key, filename, cats in jobs:
+            try:
+                render_thumbnail(cats, os.path.join(out_dir, filename),
+                                 thumb_width, parts_images, names)
+                finish(seed_id, key, filename)
+            except Exception as e:
+                fail(seed_id, e)
+
+    # Drop thumbnails of removed seeds and superseded renders
+    keep = {entry['file'] for entry in entries.values()}
+    for entry in old_entries.values():
+        if entry['file'] not in keep:
+            try:
+                os.remove(os.path.join(out_dir, entry['file']))
+                stats['removed'] += 1
+            except FileNotFoundError:
+                pass
+
+    write_json_atomic({'version': GALLERY_VERSION, 'entries': entries},
+                      os.path.join(out_dir, MANIFEST_FILE))
+    write_index(out_dir, seeds, entries)
+    logger.info(
+        f"Gallery {out_dir}: {stats['rendered']} rendered, {stats['reused']} reused, "
+        f"{stats['removed']} removed, {stats['failed']} failed"
+    )
+    return stats
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Export a browsable gallery of saved Gen 0 seeds"
+    )
+    parser.add_argument('--out-dir', default=GALLERY_SETTINGS['out_dir'],
+                        help=f"Gallery directory (default: {GALLERY_SETTINGS['out_dir']})")
+    parser.add_argument('--seeds-file', default=SEEDS_FILE,
+                        help=f"Seeds file (default: {SEEDS_FILE})")
+    parser.add_argument('--workers', type=int, default=GALLERY_SETTINGS['workers'],
+                        help=f"Render processes (default: {GALLERY_SETTINGS['workers']})")
+    parser.add_argument('--thumb-width', type=int,
+                        default=GALLERY_SETTINGS['thumb_width'],
+                        help=f"Thumbnail width in px "
+                             f"(default: {GALLERY_SETTINGS['thumb_width']})")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    stats = export_gallery(args.out_dir, args.seeds_file, ".", args.workers,
+                           args.thumb_width)
+    print(f"{stats['rendered']} rendered, {stats['reused']} up to date, "
+          f"{stats['removed']} removed, {stats['failed']} failed")
+    print(f"Gallery written to: {os.path.join(args.out_dir, INDEX_FILE)}")
+    return 1 if stats['failed'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,351 @@
+"""
+Columnar binary archive of cat genomes for large populations.
+
+An archive is a directory:
+
+    population.genomes/
+        meta.json           vocabularies, palette and the chunk table
+        chunk_00000.npz     one chunk per appended generation or batch of
+                            queued families (uncompressed)
+        chunk_00001.npz
+        ...
+
+Every chunk holds fixed-width NumPy columns, one row per cat:
+
+    parent1, parent2   int64    archive index of each parent (-1 = founder)
+    generation         int16
+    name               uint32   index into meta['names']
+    parts              uint16   [n, 5] index into meta['part_ids'][locus]
+    part_strength      float32  [n, 5]
+    colors             uint16   [n, k] index into meta['palette'] (NO_COLOR pads)
+    color_strength     float32  [n, k]
+
+``k`` is the most colors any cat of that chunk carries. Chunks are stored
+uncompressed, so their columns are memory-mapped straight out of the .npz
+(nothing is read until used). Appending a generation writes one new chunk
+and rewrites the small meta.json; existing chunks are never touched (only
+``truncate`` drops them, bumping meta['epoch'], which every later chunk
+records so readers can tell a re-appended chunk from the old one). Rows
+convert back to ``cat_to_genome`` dicts and to ``Cat`` objects (with
+``reinforce=False``) for re-rendering. One writer at a time.
+"""
+
+import os
+import json
+import bisect
+import zipfile
+import logging
+from collections import OrderedDict
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from cat import PART_LOCI, cat_from_genome
+from config import ARCHIVE_SETTINGS
+from seeds import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_VERSION = 1
+META_FILE = 'meta.json'
+LOCI = list(PART_LOCI)
+NO_PARENT = -1
+NO_COLOR = np.iinfo(np.uint16).max
+
+
+def _mmap_npz(path: str) -> Dict[str, np.ndarray]:
+    """Memory-map every member of an uncompressed .npz."""
+    arrays: Dict[str, np.ndarray] = {}
+    with zipfile.ZipFile(path) as zf, open(path, 'rb') as f:
+        for info in zf.infolist():
+            if info.compress_type != zipfile.ZIP_STORED:
+                raise ValueError(f"{path}: {info.filename} is compressed")
+            # The local header can differ from the central directory's copy
+            f.seek(info.header_offset + 26)
+            name_len, extra_len = np.frombuffer(f.read(4), dtype='<u2')
+            f.seek(info.header_offset + 30 + int(name_len) + int(extra_len))
+            if np.lib.format.read_magic(f) == (1, 0):
+                shape, fortran, dtype = np.lib.format.read_array_header_1_0(f)
+            else:
+                shape, fortran, dtype = np.lib.format.read_array_header_2_0(f)
+            arrays[info.filename[:-len('.npy')]] = np.memmap(
+                path, dtype=dtype, mode='r', offset=f.tell(), shape=shape,
+                order='F' if fortran else 'C',
+            )
+    return arrays
+
+
+class GenomeArchive:
+    """Append-only, memory-mapped population archive."""
+
+    def __init__(self, path: str, max_open_chunks: int = 16,
+                 chunk_cats: int = ARCHIVE_SETTINGS['pedigree_chunk_cats']):
+        """
+        Open (or create) the archive directory at ``path``.
+
+        Args:
+            path: Archive directory
+            max_open_chunks: Chunks kept memory-mapped at once
+            chunk_cats: Queued pedigree cats written as one chunk
+        """
+        self.path = path
+        self.max_open_chunks = max_open_chunks
+        self.chunk_cats = chunk_cats
+        # Cats of pedigrees queued by queue_pedigree, oldest generation first
+        self._queued: List[Any] = []
+        self._open: 'OrderedDict[int, Dict[str, np.ndarray]]' = OrderedDict()
+        meta_path = os.path.join(path, META_FILE)
+        if os.path.exists(meta_path):
+            with open(meta_path, 'r', encoding='utf-8') as f:
+                self.meta = json.load(f)
+            if self.meta.get('version') != ARCHIVE_VERSION:
+                raise ValueError(
+                    f"Unsupported genome archive version {self.meta.get('version')}"
+                )
+        else:
+            os.makedirs(path, exist_ok=True)
+            self.meta = {
+                'version': ARCHIVE_VERSION,
+                'loci': LOCI,
+                'part_ids': {locus: [] for locus in LOCI},
+                'palette': [],
+                'names': [],
+                'epoch': 0,    # truncations so far
+                'chunks': [],  # {'file', 'start', 'count', 'generation', 'epoch'}
+            }
+        # Reverse lookups for appending
+        self._part_index = {
+            locus: {fid: i for i, fid in enumerate(ids)}
+            for locus, ids in self.meta['part_ids'].items()
+        }
+        self._palette_index = {tuple(c): i for i, c in enumerate(self.meta['palette'])}
+        self._name_index = {n: i for i, n in enumerate(self.meta['names'])}
+        self._starts = [chunk['start'] for chunk in self.meta['chunks']]
+        # Archive indices of the last appended generation's cats (by identity)
+        self._last_generation: Dict[int, int] = {}
+
+    def __len__(self) -> int:
+        chunks = self.meta['chunks']
+        return chunks[-1]['start'] + chunks[-1]['count'] if chunks else 0
+
+    # -- writing ---------------------------------------------------------
+
+    def _intern(self, table: Dict[Any, int], values: List[Any], key: Any,
+                stored: Any) -> int:
+        index = table.get(key)
+        if index is None:
+            index = table[key] = len(values)
+            values.append(stored)
+        return index
+
+    def _unintern(self, names: int, palette: int, parts: Dict[str, int]) -> None:
+        """Drop vocabulary entries added after the given sizes."""
+        for name in self.meta['names'][names:]:
+            del self._name_index[name]
+        del self.meta['names'][names:]
+        for color in self.meta['palette'][palette:]:
+            del self._palette_index[tuple(color)]
+        del self.meta['palette'][palette:]
+        for locus, count in parts.items():
+            ids = self.meta['part_ids'][locus]
+            for file_id in ids[count:]:
+                del self._part_index[locus][file_id]
+            del ids[count:]
+
+    def append_generation(self, cats: Sequence[Any],
+                          parents: Optional[Sequence[Tuple[int, int]]] = None) -> range:
+        """
+        Append cats as one chunk; return their archive indices.
+
+        Args:
+            cats: Cat objects whose parts carry ``part_ref`` info (a
+                generation, or any batch with parents before children)
+            parents: (parent1, parent2) archive indices per cat. If None,
+                each cat's ``parent1``/``parent2`` is looked up among the
+                previous chunk and earlier cats of this one (founders get -1).
+        """
+        n = len(cats)
+        if n == 0:
+            return range(len(self), len(self))
+        start = len(self)
+        width = max(len(cat.color_genes) for cat in cats)
+        columns = {
+            'parent1': np.full(n, NO_PARENT, dtype=np.int64),
+            'parent2': np.full(n, NO_PARENT, dtype=np.int64),
+            'generation': np.empty(n, dtype=np.int16),
+            'name': np.empty(n, dtype=np.uint32),
+            'parts': np.empty((n, len(LOCI)), dtype=np.uint16),
+            'part_strength': np.empty((n, len(LOCI)), dtype=np.float32),
+            'colors': np.full((n, width), NO_COLOR, dtype=np.uint16),
+            'color_strength': np.zeros((n, width), dtype=np.float32),
+        }
+        part_ids = self.meta['part_ids']
+        # Vocabulary sizes, to undo this batch's interning if it fails
+        marks = (len(self.meta['names']), len(self.meta['palette']),
+                 {locus: len(ids) for locus, ids in part_ids.items()})
+        try:
+            known = dict(self._last_generation)
+            for row, cat in enumerate(cats):
+                known[id(cat)] = start + row
+                if parents is not None:
+                    columns['parent1'][row], columns['parent2'][row] = parents[row]
+                else:
+                    for column in ('parent1', 'parent2'):
+                        parent = getattr(cat, column, None)
+                        if parent is not None:
+                            if known.get(id(parent), start + row) >= start + row:
+                                raise ValueError(
+                                    f"Parent of {cat.name} is not archived before it; "
+                                    f"pass parents explicitly"
+                                )
+                            columns[column][row] = known[id(parent)]
+                columns['generation'][row] = cat.generation
+                columns['name'][row] = self._intern(
+                    self._name_index, self.meta['names'], cat.name, cat.name
+                )
+                for col, locus in enumerate(LOCI):
+                    gene = cat.part_genes[locus]
+                    ref = gene.value.info.get('part_ref')
+                    if not ref or not ref.startswith(f"{locus}_"):
+                        raise ValueError(f"{cat.name}: {locus} part has no part_ref")
+                    file_id = ref[len(locus) + 1:]
+                    columns['parts'][row, col] = self._intern(
+                        self._part_index[locus], part_ids[locus], file_id, file_id
+                    )
+                    columns['part_strength'][row, col] = gene.strength
+                for col, gene in enumerate(cat.color_genes):
+                    color = tuple(int(v) for v in gene.value)
+                    if (color not in self._palette_index
+                            and len(self.meta['palette']) >= NO_COLOR):
+                        raise ValueError("Genome archive palette is full")
+                    columns['colors'][row, col] = self._intern(
+                        self._palette_index, self.meta['palette'], color, list(color)
+                    )
+                    columns['color_strength'][row, col] = gene.strength
+
+            filename = f"chunk_{len(self.meta['chunks']):05d}.npz"
+            tmp_path = os.path.join(self.path, f".{filename}.tmp")
+            with open(tmp_path, 'wb') as f:
+                np.savez(f, **columns)
+            os.replace(tmp_path, os.path.join(self.path, filename))
+        except BaseException:
+            self._unintern(*marks)
+            raise
+
+        self.meta['chunks'].append({
+            'file': filename, 'start': start, 'count': n,
+            'generation': int(columns['generation'].max()),
+            'epoch': self.meta.get('epoch', 0),
+        })
+        self._starts.append(start)
+        write_json_atomic(self.meta, os.path.join(self.path, META_FILE), indent=None)
+        self._last_generation = {id(cat): start + row for row, cat in enumerate(cats)}
+        logger.info(f"Archived {n} cats as {filename} ({len(self)} total)")
+        return range(start, start + n)
+
+    def queue_pedigree(self, pedigree: Dict[str, Any]) -> None:
+        """
+        Queue one family's 15 cats (oldest generation first). Queued
+        families are written together as one chunk once ``chunk_cats`` cats
+        are waiting, or by ``flush``, so a run of many small families does
+        not cost a chunk file and a meta.json rewrite per family.
+        """
+        from image_processing import FamilyLayoutBuilder
+
+        self._queued.extend(sorted(FamilyLayoutBuilder.flatten_pedigree(pedigree),
+                                   key=lambda cat: cat.generation))
+        if len(self._queued) >= self.chunk_cats:
+            self.flush()
+
+    def flush(self) -> range:
+        """Write the queued families as one chunk; return their indices."""
+        cats, self._queued = self._queued, []
+        indices = self.append_generation(cats)
+        self._last_generation = {}  # the next family is unrelated
+        return indices
+
+    def append_pedigree(self, pedigree: Dict[str, Any]) -> range:
+        """Append one family (and any queued ones) as a chunk now."""
+        self.queue_pedigree(pedigree)
+        return self.flush()
+
+    def truncate(self, length: int) -> None:
+        """
+        Drop every chunk past the first ``length`` cats (e.g. generations
+        appended after the last checkpoint). ``length`` must end a chunk.
+        """
+        if length == len(self):
+            return
+        keep = [chunk for chunk in self.meta['chunks'] if chunk['start'] < length]
+        if (keep[-1]['start'] + keep[-1]['count'] if keep else 0) != length:
+            raise ValueError(f"Archive length {length} is not a chunk boundary")
+        for chunk in self.meta['chunks'][len(keep):]:
+            try:
+                os.remove(os.path.join(self.path, chunk['file']))
+            except FileNotFoundError:
+                pass
+        self.meta['chunks'] = keep
+        self.meta['epoch'] = self.meta.get('epoch', 0) + 1
+        self._starts = self._starts[:len(keep)]
+        self._open.clear()
+        self._last_generation = {}
+        write_json_atomic(self.meta, os.path.join(self.path, META_FILE), indent=None)
+        logger.info(f"Truncated genome archive {self.path} to {length} cats")
+
+    # -- reading ---------------------------------------------------------
+
+    def chunk(self, number: int) -> Dict[str, np.ndarray]:
+        """Memory-mapped columns of one chunk (a small LRU keeps them open)."""
+        if number in self._open:
+            self._open.move_to_end(number)
+            return self._open[number]
+        arrays = _mmap_npz(os.path.join(self.path, self.meta['chunks'][number]['file']))
+        self._open[number] = arrays
+        while len(self._open) > self.max_open_chunks:
+            self._open.popitem(last=False)
+        return arrays
+
+    def iter_chunks(self) -> Iterator[Tuple[int, Dict[str, np.ndarray]]]:
+        """(first archive index, columns) for every chunk, in order."""
+        for number, meta in enumerate(self.meta['chunks']):
+            yield meta['start'], self.chunk(number)
+
+    def locate(self, index: int) -> Tuple[Dict[str, np.ndarray], int]:
+        """Chunk columns and row holding archive ``index``."""
+        if not 0 <= index < len(self):
+            raise IndexError(f"Cat {index} not in archive of {len(self)}")
+        number = bisect.bisect_right(self._starts, index) - 1
+        return self.chunk(number), index - self._starts[number]
+
+    def parents(self, index: int) -> Tuple[int, int]:
+        columns, row = self.locate(index)
+        return int(columns['parent1'][row]), int(columns['parent2'][row])
+
+    def genome(self, index: int) -> Dict[str, Any]:
+        """Genome dict of one cat (the ``cat_to_genome`` format)."""
+        columns, row = self.locate(index)
+        part_ids = self.meta['part_ids']
+        parts = columns['parts'][row]
+        strengths = columns['part_strength'][row]
+        colors = []
+        for color, strength in zip(columns['colors'][row], columns['color_strength'][row]):
+            if color == NO_COLOR:
+                break
+            colors.append({'color': list(self.meta['palette'][color]),
+                           'strength': float(strength)})
+        return {
+            'name': self.meta['names'][columns['name'][row]],
+            'generation': int(columns['generation'][row]),
+            'parts': {
+                locus: f"{locus}_{part_ids[locus][parts[col]]}"
+                for col, locus in enumerate(LOCI)
+            },
+            'part_strengths': {
+                locus: float(strengths[col]) for col, locus in enumerate(LOCI)
+            },
+            'colors': colors,
+        }
+
+    def cat(self, index: int, parts_images: Dict[str, Dict[str, Any]]) -> Any:
+        """Rebuild one cat for rendering (strengths as stored)."""
+        return cat_from_genome(self.genome(index), parts_images)
@@ -0,0 +1,323 @@
+"""
+Golden-image equivalence checker for fast rendering paths.
+
+Renders a corpus of families (saved Gen 0 seeds and random founders, each
+under a fixed RNG seed) and optional JSON genomes through the reference path
+(``Cat.render_reference``: combine_parts -> apply_color_numpy ->
+add_cat_label) and through every selected engine, then compares the images.
+
+Engines are registered in ``ENGINES``. Exact engines must match the
+reference pixel for pixel; lossy engines pass when the mean absolute channel
+difference stays within their tolerance (max difference is always reported).
+Failures are written as [reference | candidate | amplified diff] PNGs.
+
+    python golden.py                        # all seeds + 5 random families
+    python golden.py --seeds 1 2 --random 0 --engines render_cache
+    python golden.py --genomes genomes.json --out-dir golden_failures
+"""
+
+import io
+import os
+import sys
+import json
+import random
+import logging
+import argparse
+from dataclasses import dataclass, field
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+from PIL import Image
+
+from config import GENERATION_PARAMS, OUTPUT_SETTINGS, REPLAY_CACHE_SETTINGS
+from image_processing import ImageLoader, FamilyLayoutBuilder
+from cat import Cat, cat_from_genome
+from render_cache import RenderCache
+from seeds import list_seeds
+
+logger = logging.getLogger(__name__)
+
+CORPUS_SEED = 20240601
+DIFF_GAIN = 8  # amplification of the diff panel
+
+
+@dataclass
+class Engine:
+    """
+    A rendering path checked against the reference.
+
+    ``kind`` is 'cat' (render(cat) -> image, compared with render_reference)
+    or 'canvas' (render(pedigree) -> image, compared with the pedigree
+    composed from reference renders).
+    """
+    name: str
+    kind: str
+    render: Callable[[Any], Image.Image]
+    lossy: bool = False
+    tolerance: float = 0.0
+
+
+@dataclass
+class Comparison:
+    case: str
+    engine: str
+    passed: bool
+    max_diff: int = 0
+    mean_diff: float = 0.0
+    mismatched: int = 0
+    detail: str = ''
+    diff_path: Optional[str] = None
+
+
+@dataclass
+class GoldenReport:
+    comparisons: List[Comparison] = field(default_factory=list)
+
+    @property
+    def failures(self) -> List[Comparison]:
+        return [c for c in self.comparisons if not c.passed]
+
+    @property
+    def passed(self) -> bool:
+        return not self.failures
+
+
+def _decode(data: bytes) -> Image.Image:
+    with Image.open(io.BytesIO(data)) as img:
+        return img.convert('RGB')
+
+
+def _encode_roundtrip(img: Image.Image, fmt: str, **kwargs: Any) -> Image.Image:
+    buffer = io.BytesIO()
+    img.save(buffer, format=fmt, **kwargs)
+    return _decode(buffer.getvalue())
+
+
+# One cache (all layers on) for the whole run, so cache hits are checked too
+_CHECK_CACHE = RenderCache(REPLAY_CACHE_SETTINGS)
+
+ENGINES: Dict[str, Engine] = {
+    engine.name: engine for engine in (
+        Engine('render_cache', 'cat',
+               lambda cat: cat.generate_image(retain=False, cache=_CHECK_CACHE)),
+        Engine('pedigree_canvas', 'canvas',
+               lambda pedigree: FamilyLayoutBuilder.create_pedigree_image(pedigree)),
+        Engine('png_encode', 'canvas',
+               lambda pedigree: _encode_roundtrip(
+                   FamilyLayoutBuilder.create_pedigree_image(pedigree),
+                   OUTPUT_SETTINGS['format'],
+               )),
+        Engine('jpeg_encode', 'canvas',
+               lambda pedigree: _encode_roundtrip(
+                   FamilyLayoutBuilder.create_pedigree_image(pedigree),
+                   'JPEG', quality=OUTPUT_SETTINGS['quality'],
+               ),
+               lossy=True, tolerance=2.0),
+    )
+}
+EXACT_ENGINES = [name for name, engine in ENGINES.items() if not engine.lossy]
+
+
+def map_pedigree(pedigree: Dict[str, Any], fn: Callable[[Cat], Any]) -> Dict[str, Any]:
+    """Same-shaped pedigree with every cat replaced by ``fn(cat)``."""
+    return {
+        'pairs': [tuple(fn(cat) for cat in pair) for pair in pedigree['pairs']],
+        'grandkittens': [fn(cat) for cat in pedigree['grandkittens']],
+        'great_grandkitten': fn(pedigree['great_grandkitten']),
+    }
+
+
+def compare_images(reference: Image.Image, candidate: Image.Image,
+                   case: str, engine: Engine) -> Comparison:
+    """Pixel comparison; exact for lossless engines, mean diff for lossy ones."""
+    if reference.size != candidate.size:
+        return Comparison(
+            case, engine.name, False,
+            detail=f"size {candidate.size} != reference {reference.size}",
+        )
+    ref = np.asarray(reference.convert('RGB'), dtype=np.int16)
+    out = np.asarray(candidate.convert('RGB'), dtype=np.int16)
+    diff = np.abs(ref - out)
+    mismatched = int(np.count_nonzero(diff.any(axis=-1)))
+    mean_diff = float(diff.mean())
+    passed = mean_diff <= engine.tolerance if engine.lossy else mismatched == 0
+    return Comparison(
+        case, engine.name, passed,
+        max_diff=int(diff.max()), mean_diff=mean_diff, mismatched=mismatched,
+    )
+
+
+def write_diff_image(reference: Image.Image, candidate: Image.Image,
+                     path: str) -> str:
+    """Save reference, candidate and an amplified difference side by side."""
+    width = max(reference.width, candidate.width)
+    height = max(reference.height, candidate.height)
+    panels = []
+    for img in (reference, candidate):
+        panel = Image.new('RGB', (width, height), (255, 0, 255))
+        panel.paste(img.convert('RGB'), (0, 0))
+        panels.append(panel)
+    ref, out = (np.asarray(p, dtype=np.int16) for p in panels)
+    diff = np.clip(np.abs(ref - out) * DIFF_GAIN, 0, 255).astype(np.uint8)
+    panels.append(Image.fromarray(diff))
+
+    sheet = Image.new('RGB', (width * 3, height), (255, 255, 255))
+    for i, panel in enumerate(panels):
+        sheet.paste(panel, (i * width, 0))
+    os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+    sheet.save(path)
+    return path
+
+
+def build_corpus(parts_images: Dict[str, Dict[str, Image.Image]],
+                 names: List[str], seed_ids: Optional[Sequence[int]] = None,
+                 random_families: int = 5) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Families to check as (case name, pedigree).
+
+    Saved seeds replay their Gen 0; later generations (and random founders)
+    come from a fixed RNG seed per case, so every run checks the same cats.
+    """
+    from main import generate_cat_family
+
+    seeds = list_seeds()
+    if seed_ids is not None:
+        wanted = set(seed_ids)
+        seeds = [s for s in seeds if s['id'] in wanted]
+
+    cases: List[Tuple[str, Optional[List[Dict[str, Any]]], int]] = [
+        (f"seed{s['id']}", s['cats'], CORPUS_SEED + s['id']) for s in seeds
+    ]
+    cases += [
+        (f"random{i}", None, CORPUS_SEED - 1 - i) for i in range(random_families)
+    ]
+
+    corpus = []
+    state = random.getstate()
+    try:
+        for case, snapshots, rng_seed in cases:
+            random.seed(rng_seed)
+            pedigree, _family, _seed_id = generate_cat_family(
+                gen0_snapshots=snapshots, save_new_seed=False,
+                parts_images=parts_images, names=names,
+            )
+            corpus.append((case, pedigree))
+    finally:
+        random.setstate(state)
+    return corpus
+
+
+def run_check(corpus: Sequence[Tuple[str, Dict[str, Any]]],
+              engines: Sequence[str] = None,
+              genomes: Sequence[Cat] = (),
+              out_dir: Optional[str] = None) -> GoldenReport:
+    """
+    Compare every engine against the reference for the corpus and genomes.
+
+    Args:
+        corpus: (case, pedigree) pairs, e.g. from ``build_corpus``
+        engines: Engine names (default: all exact engines)
+        genomes: Extra single cats checked by the 'cat' engines
+        out_dir: Where to write diff images for failures (None: don't)
+    """
+    selected = [ENGINES[name] for name in (engines or EXACT_ENGINES)]
+    report = GoldenReport()
+
+    def record(case: str, engine: Engine, reference: Image.Image,
+               candidate: Image.Image) -> None:
+        result = compare_images(reference, candidate, case, engine)
+        if not result.passed and out_dir:
+            result.diff_path = write_diff_image(
+                reference, candidate,
+                os.path.join(out_dir, f"{case}_{engine.name}.png"),
+            )
+        report.comparisons.append(result)
+
+    for case, pedigree in corpus:
+        references: Dict[int, Image.Image] = {}
+
+        def reference_of(cat: Cat) -> Image.Image:
+            if id(cat) not in references:
+                references[id(cat)] = cat.render_reference()
+            return references[id(cat)]
+
+        cats = FamilyLayoutBuilder.flatten_pedigree(pedigree)
+        for engine in selected:
+            if engine.kind == 'cat':
+                for index, cat in enumerate(cats):
+                    record(f"{case}_cat{index}", engine, reference_of(cat),
+                           engine.render(cat))
+            else:
+                reference = FamilyLayoutBuilder.create_pedigree_image(
+                    map_pedigree(pedigree, reference_of)
+                )
+                record(case, engine, reference, engine.render(pedigree))
+
+    for index, cat in enumerate(genomes):
+        for engine in selected:
+            if engine.kind == 'cat':
+                record(f"genome{index}", engine, cat.render_reference(),
+                       engine.render(cat))
+    return report
+
+
+def format_report(report: GoldenReport) -> str:
+    lines = []
+    by_engine: Dict[str, List[Comparison]] = {}
+    for comparison in report.comparisons:
+        by_engine.setdefault(comparison.engine, []).append(comparison)
+    for name, rows in by_engine.items():
+        failed = [r for r in rows if not r.passed]
+        worst_max = max(r.max_diff for r in rows)
+        worst_mean = max(r.mean_diff for r in rows)
+        lines.append(
+            f"{name:<16}{len(rows) - len(failed):>4}/{len(rows):<4} passed  "
+            f"max diff {worst_max:>3}  mean diff {worst_mean:.3f}"
+        )
+    for failure in report.failures:
+        where = f" -> {failure.diff_path}" if failure.diff_path else ''
+        detail = failure.detail or (
+            f"{failure.mismatched} px differ, max {failure.max_diff}, "
+            f"mean {failure.mean_diff:.3f}"
+        )
+        lines.append(f"FAIL {failure.case} [{failure.engine}]: {detail}{where}")
+    return "\n".join(lines)
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Check fast rendering paths against the reference renderer"
+    )
+    parser.add_argument('--seeds', type=int, nargs='*', metavar='ID',
+                        help="Saved seed ids to check (default: all)")
+    parser.add_argument('--random', type=int, default=5, metavar='N',
+                        help="Random-founder families to check (default: 5)")
+    parser.add_argument('--genomes', metavar='JSON',
+                        help="JSON list of genomes (see cat_from_genome) to check")
+    parser.add_argument('--engines', nargs='+', choices=list(ENGINES),
+                        help=f"Engines to check (default: {', '.join(EXACT_ENGINES)})")
+    parser.add_argument('--layout', choices=['grid', 'tight'],
+                        default=GENERATION_PARAMS.get('layout_mode', 'grid'))
+    parser.add_argument('--out-dir', default='golden_failures',
+                        help="Directory for diff images of failures")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.WARNING)
+    GENERATION_PARAMS['layout_mode'] = args.layout
+
+    from main import load_cat_names
+
+    parts_images = ImageLoader('.').load_all_parts()
+    corpus = build_corpus(parts_images, load_cat_names(), args.seeds, args.random)
+    genomes: List[Cat] = []
+    if args.genomes:
+        with open(args.genomes, 'r', encoding='utf-8') as f:
+            genomes = [cat_from_genome(g, parts_images) for g in json.load(f)]
+
+    report = run_check(corpus, args.engines, genomes, args.out_dir)
+    print(format_report(report))
+    return 0 if report.passed else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -5,6 +5,8 @@ Image Processing Module for Cat Family Generator
 import os
 import random
 import logging
+from dataclasses import dataclass
+from functools import lru_cache
 from typing import List, Dict, Tuple, Any, Sequence
 from PIL import Image, ImageDraw, ImageFont
 import numpy as np
@@ -12,9 +14,14 @@ import numpy as np
 from config import (
     CAT_PARTS_FOLDERS, GENERATION_PARAMS, RGB
 )
+from profiling import profiled
 
 logger = logging.getLogger(__name__)
 
+# Spacing inside a cat label: title -> legend, and between legend rows
+LABEL_GAP = 4
+LABEL_ROW_GAP = 3
+
 
 class ImageLoader:
     """Loads and manages cat part images from folders"""
@@ -61,8 +68,7 @@ class ImageLoader:
                 img_path = os.path.join(full_path, filename)
                 file_id = os.path.splitext(filename)[0]
                 try:
-                    with Image.open(img_path) as img:
-                        images[file_id] = img.convert('RGB').copy()
+                    images[file_id] = self.load_image(img_path)
                     logger.debug(f"Loaded image: {filename}")
                 except IOError as e:
                     logger.warning(f"Cannot load image {filename}: {e}")
@@ -73,6 +79,43 @@ class ImageLoader:
         logger.info(f"Loaded {len(images)} images from {folder_path}")
         return images
 
+    @staticmethod
+    def load_image(img_path: str) -> Image.Image:
+        """
+        Decode one part file to RGB (raises IOError if unreadable).
+
+        ``info['part_source']`` records the file it came from and that
+        file's (mtime_ns, size), so render caches never mix up two
+        libraries that use the same part refs, or two versions of a
+        reloaded part. A file that changes while it is read raises IOError.
+        """
+        with open(img_path, 'rb') as f:
+            before = os.fstat(f.fileno())
+            with Image.open(f) as img:
+                rgb = img.convert('RGB').copy()
+            after = os.fstat(f.fileno())
+        stamp = (before.st_mtime_ns, before.st_size)
+        if (after.st_mtime_ns, after.st_size) != stamp:
+            raise IOError(f"{img_path} changed while loading")
+        rgb.info['part_source'] = (os.path.realpath(img_path),) + stamp
+        return rgb
+
+    def load_part(self, part_name: str, file_id: str,
+                  filename: str = None) -> Image.Image:
+        """
+        Load a single part file, tagged with its part ref like load_all_parts.
+
+        ``filename`` is the file's real name when its extension is not
+        lower-case ('3.PNG'); default '<file_id>.png'.
+        """
+        img_path = os.path.join(
+            self.base_path, CAT_PARTS_FOLDERS[part_name], filename or f"{file_id}.png"
+        )
+        img = self.load_image(img_path)
+        img.info['part_ref'] = CatImageBuilder.part_ref(part_name, file_id)
+        return img
+
+    @profiled('load_all_parts')
     def load_all_parts(self) -> Dict[str, Dict[str, Image.Image]]:
         """
         Load all cat parts from configured folders
@@ -83,7 +126,11 @@ class ImageLoader:
         """
         parts_images = {}
         for part_name, folder_path in CAT_PARTS_FOLDERS.items():
-            parts_images[part_name] = self.load_images_from_folder(folder_path)
+            images = self.load_images_from_folder(folder_path)
+            # Tag each image with its ref so caches can key on it
+            for file_id, img in images.items():
+                img.info['part_ref'] = CatImageBuilder.part_ref(part_name, file_id)
+            parts_images[part_name] = images
 
         logger.info(f"Loaded all {len(parts_images)} cat parts")
         return parts_images
@@ -144,7 +191,29 @@ class CatImageBuilder:
         return parts
     
     @staticmethod
-    def combine_parts(parts: Dict[str, Image.Image]) -> Image.Image:
+    def combined_size(parts: Dict[str, Image.Image],
+                      text_padding: int = None) -> Tuple[int, int]:
+        """
+        Size of the image ``combine_parts`` would produce, without rendering.
+
+        Only part dimensions are read, so layouts can be planned before
+        any cat pixels exist.
+        """
+        ear, eyes, body = parts['ear'], parts['eyes'], parts['body']
+        tail, legs = parts['tail'], parts['legs']
+        vertical_height = ear.height + eyes.height + body.height
+        vertical_width = max(ear.width, eyes.width, body.width)
+        if text_padding is None:
+            text_padding = GENERATION_PARAMS.get('text_padding_bottom', 35)
+        return (
+            vertical_width + tail.width,
+            vertical_height + legs.height + text_padding,
+        )
+
+    @staticmethod
+    @profiled('combine_parts')
+    def combine_parts(parts: Dict[str, Image.Image],
+                      text_padding: int = None) -> Image.Image:
         """
         Combine cat parts into a single image
         
@@ -156,6 +225,7 @@ class CatImageBuilder:
         
         Args:
             parts: Dictionary with keys: 'ear', 'eyes', 'body', 'tail', 'legs'
+            text_padding: Label space below the cat (default: text_padding_bottom)
             
         Returns:
             Combined cat image
@@ -195,7 +265,8 @@ class CatImageBuilder:
         final_image.paste(legs, ((final_width - legs.width) // 2, vertical_height))
         
         # Add padding at bottom for text (name + generation)
-        text_padding = GENERATION_PARAMS.get('text_padding_bottom', 35)
+        if text_padding is None:
+            text_padding = GENERATION_PARAMS.get('text_padding_bottom', 35)
         final_height = vertical_height + legs.height + text_padding
         padded_image = Image.new('RGB', (final_width, final_height), (255, 255, 255))
         padded_image.paste(final_image, (0, 0))
@@ -204,6 +275,7 @@ class CatImageBuilder:
         return padded_image
     
     @staticmethod
+    @profiled('apply_color_numpy')
     def apply_color_numpy(img: Image.Image, color_map: Dict[RGB, RGB]) -> Image.Image:
         """
         Apply color mapping to image using NumPy for better performance
@@ -276,6 +348,7 @@ class CatImageBuilder:
         logger.debug(f"Added text: {text.replace(chr(10), ' | ')}")
 
     @staticmethod
+    @lru_cache(maxsize=None)
     def _load_font(font_name: str, font_size: int) -> ImageFont.ImageFont:
         try:
             return ImageFont.truetype(font_name, size=font_size)
@@ -284,17 +357,12 @@ class CatImageBuilder:
             return ImageFont.load_default()
 
     @staticmethod
-    def add_cat_label(
-        img: Image.Image,
+    def _measure_label(
+        draw: ImageDraw.ImageDraw,
         title: str,
         color_strengths: Sequence[Tuple[RGB, float]],
-    ) -> None:
-        """
-        Draw name/generation and a color-strength legend under the cat.
-
-        ``color_strengths`` should already be sorted strongest-first.
-        Each entry is drawn as a color swatch + strength value.
-        """
+    ) -> Dict[str, Any]:
+        """Fonts, text sizes and block size of a cat label (no drawing)."""
         font_name = GENERATION_PARAMS['font_name']
         title_font = CatImageBuilder._load_font(
             font_name, GENERATION_PARAMS['font_size']
@@ -302,13 +370,8 @@ class CatImageBuilder:
         gene_font = CatImageBuilder._load_font(
             font_name, GENERATION_PARAMS.get('gene_font_size', 14)
         )
-        text_color = GENERATION_PARAMS['text_color']
         swatch = GENERATION_PARAMS.get('swatch_size', 12)
-        x_offset, y_offset = GENERATION_PARAMS['text_position']
-        gap = 4
-        row_gap = 3
 
-        draw = ImageDraw.Draw(img)
         title_bbox = draw.textbbox((0, 0), title, font=title_font)
         title_w = title_bbox[2] - title_bbox[0]
         title_h = title_bbox[3] - title_bbox[1]
@@ -323,32 +386,99 @@ class CatImageBuilder:
 
         gene_row_h = max([swatch] + gene_heights) if color_strengths else 0
         gene_row_w = (
-            max((swatch + gap + w for w in gene_widths), default=0)
+            max((swatch + LABEL_GAP + w for w in gene_widths), default=0)
             if color_strengths else 0
         )
 
         block_w = max(title_w, gene_row_w)
         block_h = title_h
         if color_strengths:
-            block_h += gap + len(color_strengths) * gene_row_h
+            block_h += LABEL_GAP + len(color_strengths) * gene_row_h
             if len(color_strengths) > 1:
-                block_h += (len(color_strengths) - 1) * row_gap
+                block_h += (len(color_strengths) - 1) * LABEL_ROW_GAP
+
+        return {
+            'title_font': title_font,
+            'gene_font': gene_font,
+            'swatch': swatch,
+            'title_w': title_w,
+            'title_h': title_h,
+            'strength_labels': strength_labels,
+            'gene_widths': gene_widths,
+            'gene_heights': gene_heights,
+            'gene_row_h': gene_row_h,
+            'block_w': block_w,
+            'block_h': block_h,
+        }
+
+    @staticmethod
+    def label_block_size(
+        title: str,
+        color_strengths: Sequence[Tuple[RGB, float]],
+    ) -> Tuple[int, int]:
+        """(width, height) of the label block ``add_cat_label`` would draw."""
+        draw = ImageDraw.Draw(Image.new('RGB', (1, 1)))
+        metrics = CatImageBuilder._measure_label(draw, title, color_strengths)
+        return metrics['block_w'], metrics['block_h']
+
+    @staticmethod
+    def text_padding(
+        title: str,
+        color_strengths: Sequence[Tuple[RGB, float]],
+        layout_mode: str = None,
+    ) -> int:
+        """
+        Bottom padding reserved for a cat's label.
+
+        Grid layout uses the fixed ``text_padding_bottom``; tight layout
+        sizes the padding to this cat's actual label block.
+        """
+        layout_mode = layout_mode or GENERATION_PARAMS.get('layout_mode', 'grid')
+        if layout_mode != 'tight':
+            return GENERATION_PARAMS.get('text_padding_bottom', 35)
+        _block_w, block_h = CatImageBuilder.label_block_size(title, color_strengths)
+        _x_offset, y_offset = GENERATION_PARAMS['text_position']
+        return block_h + y_offset + 5 + GENERATION_PARAMS.get('label_margin_top', 8)
+
+    @staticmethod
+    @profiled('add_cat_label')
+    def add_cat_label(
+        img: Image.Image,
+        title: str,
+        color_strengths: Sequence[Tuple[RGB, float]],
+    ) -> None:
+        """
+        Draw name/generation and a color-strength legend under the cat.
+
+        ``color_strengths`` should already be sorted strongest-first.
+        Each entry is drawn as a color swatch + strength value.
+        """
+        text_color = GENERATION_PARAMS['text_color']
+        x_offset, y_offset = GENERATION_PARAMS['text_position']
+
+        draw = ImageDraw.Draw(img)
+        metrics = CatImageBuilder._measure_label(draw, title, color_strengths)
+        swatch = metrics['swatch']
+        gene_row_h = metrics['gene_row_h']
+        block_w = metrics['block_w']
+        title_w = metrics['title_w']
 
         x0 = (img.width - block_w) // 2 + x_offset
-        y = img.height - block_h - y_offset - 5
+        y = img.height - metrics['block_h'] - y_offset - 5
 
         draw.text(
             (x0 + (block_w - title_w) // 2, y),
             title,
-            font=title_font,
+            font=metrics['title_font'],
             fill=text_color,
         )
-        y += title_h + gap
+        y += metrics['title_h'] + LABEL_GAP
 
         for (color, _strength), label, label_w, label_h in zip(
-            color_strengths, strength_labels, gene_widths, gene_heights
+            color_strengths, metrics['strength_labels'],
+            metrics['gene_widths'], metrics['gene_heights'],
         ):
-            row_w = swatch + gap + label_w
+            row_w = swatch + LABEL_GAP + label_w
             row_x = x0 + (block_w - row_w) // 2
             swatch_y = y + (gene_row_h - swatch) // 2
             label_y = y + (gene_row_h - label_h) // 2
@@ -358,37 +488,71 @@ class CatImageBuilder:
                 outline=(80, 80, 80),
             )
             draw.text(
-                (row_x + swatch + gap, label_y),
+                (row_x + swatch + LABEL_GAP, label_y),
                 label,
-                font=gene_font,
+                font=metrics['gene_font'],
                 fill=text_color,
             )
-            y += gene_row_h + row_gap
+            y += gene_row_h + LABEL_ROW_GAP
 
         logger.debug(f"Added cat label: {title} ({len(color_strengths)} colors)")
 
 
+Box = Tuple[int, int, int, int]
+
+
+@dataclass
+class PedigreeLayout:
+    """
+    Planned geometry of a pedigree canvas.
+
+    ``boxes`` are (x, y, w, h) in pedigree order: for each of the 4 pairs
+    (parent1, parent2, kitten), then grandkitten 1, 2, great-grandkitten.
+    """
+    width: int
+    height: int
+    boxes: List[Box]
+    stem_xs: List[int]  # x of the bracket stems in the 3 column gaps
+
+
+# Entry indices (layout order) per generation column, top to bottom
+PEDIGREE_COLUMNS: List[List[int]] = [
+    [0, 1, 3, 4, 6, 7, 9, 10],
+    [2, 5, 8, 11],
+    [12, 13],
+    [14],
+]
+
+# Child entry index -> its two parents' entry indices
+PEDIGREE_PARENTS: Dict[int, Tuple[int, int]] = {
+    2: (0, 1), 5: (3, 4), 8: (6, 7), 11: (9, 10),
+    12: (2, 5), 13: (8, 11),
+    14: (12, 13),
+}
+
+
 class FamilyLayoutBuilder:
     """Builds the final family pedigree image"""
 
     @staticmethod
     def _cell_box(
-        img: Image.Image,
+        size: Tuple[int, int],
         cell_x: int,
         center_y: float,
         cell_w: int,
-    ) -> Tuple[int, int, int, int]:
+    ) -> Box:
         """Compute centered paste box (x, y, w, h) inside a column cell."""
-        x = cell_x + (cell_w - img.width) // 2
-        y = int(center_y - img.height / 2)
-        return (x, y, img.width, img.height)
+        width, height = size
+        x = cell_x + (cell_w - width) // 2
+        y = int(center_y - height / 2)
+        return (x, y, width, height)
 
     @staticmethod
     def _draw_bracket(
         draw: ImageDraw.ImageDraw,
-        parent_a: Tuple[int, int, int, int],
-        parent_b: Tuple[int, int, int, int],
-        child: Tuple[int, int, int, int],
+        parent_a: Box,
+        parent_b: Box,
+        child: Box,
         color: RGB,
         line_width: int,
         stem_x: int = None,
@@ -407,131 +571,246 @@ class FamilyLayoutBuilder:
 
         draw.line([a_right, (stem_x, a_right[1])], fill=color, width=line_width)
         draw.line([b_right, (stem_x, b_right[1])], fill=color, width=line_width)
+        if abs(child_left[1] - mid_y) <= 1:
+            draw.line(
+                [(stem_x, a_right[1]), (stem_x, b_right[1])],
+                fill=color,
+                width=line_width,
+            )
+            draw.line([(stem_x, mid_y), child_left], fill=color, width=line_width)
+            return
+
+        # Child was pushed off the parents' midpoint (tight layout): extend
+        # the stem to the child's row so the link stays horizontal.
+        ys = (a_right[1], b_right[1], child_left[1])
         draw.line(
-            [(stem_x, a_right[1]), (stem_x, b_right[1])],
+            [(stem_x, min(ys)), (stem_x, max(ys))],
             fill=color,
             width=line_width,
         )
-        draw.line([(stem_x, mid_y), child_left], fill=color, width=line_width)
+        draw.line([(stem_x, child_left[1]), child_left], fill=color, width=line_width)
 
     @staticmethod
-    def create_pedigree_image(pedigree: Dict[str, Any],
-                              background_color: RGB = None) -> Image.Image:
+    def flatten_pedigree(pedigree: Dict[str, Any]) -> List[Any]:
         """
-        Create a left-to-right pedigree tree with connector lines.
+        List the 15 pedigree entries in layout order.
 
         Expected pedigree keys:
-            pairs: list of (parent1_img, parent2_img, kitten_img) x4
-            grandkittens: [gk1_img, gk2_img]
-            great_grandkitten: ggk_img
+            pairs: list of (parent1, parent2, kitten) x4
+            grandkittens: [gk1, gk2]
+            great_grandkitten: ggk
         """
-        background_color = background_color or GENERATION_PARAMS['background_color']
-        column_gap = GENERATION_PARAMS.get('column_gap', 48)
-        connector_color = GENERATION_PARAMS.get('connector_color', (80, 80, 80))
-        connector_width = GENERATION_PARAMS.get('connector_width', 2)
-
         pairs = pedigree['pairs']
         grandkittens = pedigree['grandkittens']
-        great_grandkitten = pedigree['great_grandkitten']
-
         if len(pairs) != 4 or len(grandkittens) != 2:
             raise ValueError("Pedigree must have 4 parent pairs and 2 grandkittens")
 
-        all_images = []
+        entries: List[Any] = []
         for p1, p2, kitten in pairs:
-            all_images.extend([p1, p2, kitten])
-        all_images.extend(grandkittens)
-        all_images.append(great_grandkitten)
+            entries.extend([p1, p2, kitten])
+        entries.extend(grandkittens)
+        entries.append(pedigree['great_grandkitten'])
+        return entries
+
+    @staticmethod
+    def entry_size(entry: Any, layout_mode: str = None) -> Tuple[int, int]:
+        """Size of a pedigree entry: a rendered image or a lazily rendered cat."""
+        if isinstance(entry, Image.Image):
+            return entry.size
+        return entry.image_size(layout_mode)
 
-        cell_w = max(img.width for img in all_images)
-        cell_h = max(img.height for img in all_images)
+    @staticmethod
+    def render_entry(entry: Any, cache: Any = None) -> Image.Image:
+        """
+        Pixels for a pedigree entry; cats are rendered without retaining,
+        through ``cache`` (a RenderCache) or the process default.
+        """
+        if isinstance(entry, Image.Image):
+            return entry
+        return entry.generate_image(retain=False, cache=cache)
+
+    @staticmethod
+    def plan_layout(sizes: Sequence[Tuple[int, int]],
+                    layout_mode: str = None) -> PedigreeLayout:
+        """Plan the pedigree from entry sizes using the configured layout mode."""
+        layout_mode = layout_mode or GENERATION_PARAMS.get('layout_mode', 'grid')
+        if layout_mode == 'tight':
+            return FamilyLayoutBuilder._plan_tight_layout(sizes)
+        if layout_mode != 'grid':
+            raise ValueError(f"Unknown layout mode: {layout_mode!r}")
+        return FamilyLayoutBuilder._plan_grid_layout(sizes)
+
+    @staticmethod
+    def _plan_grid_layout(sizes: Sequence[Tuple[int, int]]) -> PedigreeLayout:
+        """
+        Plan the pedigree grid from entry sizes (layout order, 15 entries).
+
+        Every slot is sized to the largest cat; Gen 0 fills 8 slots and each
+        child sits vertically between its two parents.
+        """
+        column_gap = GENERATION_PARAMS.get('column_gap', 48)
+        cell_w = max(w for w, _h in sizes)
+        cell_h = max(h for _w, h in sizes)
         num_slots = 8
         num_columns = 4
 
         total_width = num_columns * cell_w + (num_columns - 1) * column_gap
         total_height = num_slots * cell_h
 
-        canvas = Image.new('RGB', (total_width, total_height), background_color)
-        draw = ImageDraw.Draw(canvas)
-
         def col_x(col: int) -> int:
             return col * (cell_w + column_gap)
 
-        def gap_stem_x(after_col: int) -> int:
-            """X in the middle of the gap after the given column."""
-            return col_x(after_col) + cell_w + column_gap // 2
-
         def slot_center_y(slot: float) -> float:
             return (slot + 0.5) * cell_h
 
-        # Compute boxes for all cats (Gen 0 parents in slots 0..7)
-        parent_boxes = []
-        for pair_idx, (p1, p2, _kitten) in enumerate(pairs):
+        boxes: List[Box] = []
+        for pair_idx in range(4):
+            p1, p2, kitten = sizes[pair_idx * 3:pair_idx * 3 + 3]
             slot_a = pair_idx * 2
-            slot_b = slot_a + 1
-            box_a = FamilyLayoutBuilder._cell_box(
+            boxes.append(FamilyLayoutBuilder._cell_box(
                 p1, col_x(0), slot_center_y(slot_a), cell_w
-            )
-            box_b = FamilyLayoutBuilder._cell_box(
-                p2, col_x(0), slot_center_y(slot_b), cell_w
-            )
-            parent_boxes.append((box_a, box_b))
-
-        kitten_boxes = []
-        for pair_idx, (_p1, _p2, kitten) in enumerate(pairs):
-            slot_mid = pair_idx * 2 + 0.5
-            kitten_boxes.append(
-                FamilyLayoutBuilder._cell_box(
-                    kitten, col_x(1), slot_center_y(slot_mid), cell_w
-                )
-            )
+            ))
+            boxes.append(FamilyLayoutBuilder._cell_box(
+                p2, col_x(0), slot_center_y(slot_a + 1), cell_w
+            ))
+            boxes.append(FamilyLayoutBuilder._cell_box(
+                kitten, col_x(1), slot_center_y(slot_a + 0.5), cell_w
+            ))
 
         # GK1 from kittens 0+1, GK2 from 2+3
-        gk_boxes = []
         gk_parent_slots = [(0.5, 2.5), (4.5, 6.5)]
-        for gk_idx, gk_img in enumerate(grandkittens):
-            s1, s2 = gk_parent_slots[gk_idx]
+        for gk_size, (s1, s2) in zip(sizes[12:14], gk_parent_slots):
             center = (slot_center_y(s1) + slot_center_y(s2)) / 2
-            gk_boxes.append(
-                FamilyLayoutBuilder._cell_box(gk_img, col_x(2), center, cell_w)
+            boxes.append(
+                FamilyLayoutBuilder._cell_box(gk_size, col_x(2), center, cell_w)
             )
 
         ggk_center = (slot_center_y(1.5) + slot_center_y(5.5)) / 2
-        ggk_box = FamilyLayoutBuilder._cell_box(
-            great_grandkitten, col_x(3), ggk_center, cell_w
-        )
+        boxes.append(FamilyLayoutBuilder._cell_box(
+            sizes[14], col_x(3), ggk_center, cell_w
+        ))
 
-        # Draw connectors first (in gaps), then paste cats on top
-        for pair_idx, (box_a, box_b) in enumerate(parent_boxes):
+        # Stems sit in the middle of the gap after each column
+        stem_xs = [col_x(col) + cell_w + column_gap // 2 for col in range(3)]
+        return PedigreeLayout(total_width, total_height, boxes, stem_xs)
+
+    @staticmethod
+    def _plan_tight_layout(sizes: Sequence[Tuple[int, int]]) -> PedigreeLayout:
+        """
+        Pack each column by actual cat sizes instead of a uniform cell.
+
+        Gen 0 is stacked top to bottom with ``row_gap``; every child is
+        centered between its parents and pushed down only if it would
+        overlap the cat above it. Columns are as wide as their widest cat.
+        """
+        column_gap = GENERATION_PARAMS.get('column_gap', 48)
+        row_gap = GENERATION_PARAMS.get('row_gap', 16)
+
+        col_widths = [
+            max(sizes[idx][0] for idx in column) for column in PEDIGREE_COLUMNS
+        ]
+        col_xs = []
+        x = 0
+        for width in col_widths:
+            col_xs.append(x)
+            x += width + column_gap
+        total_width = x - column_gap
+
+        boxes: List[Box] = [None] * len(sizes)
+        for col, column in enumerate(PEDIGREE_COLUMNS):
+            prev_bottom = None
+            for idx in column:
+                width, height = sizes[idx]
+                if idx in PEDIGREE_PARENTS:
+                    pa, pb = (boxes[i] for i in PEDIGREE_PARENTS[idx])
+                    center = (pa[1] + pa[3] // 2 + pb[1] + pb[3] // 2) / 2
+                    top = int(center - height / 2)
+                else:
+                    top = 0
+                if prev_bottom is not None:
+                    top = max(top, prev_bottom + row_gap)
+                top = max(top, 0)
+                x = col_xs[col] + (col_widths[col] - width) // 2
+                boxes[idx] = (x, top, width, height)
+                prev_bottom = top + height
+
+        total_height = max(y + h for _x, y, _w, h in boxes)
+        stem_xs = [
+            col_xs[col] + col_widths[col] + column_gap // 2 for col in range(3)
+        ]
+        return PedigreeLayout(total_width, total_height, boxes, stem_xs)
+
+    @staticmethod
+    def draw_column_connectors(draw: ImageDraw.ImageDraw, layout: PedigreeLayout,
+                               column: int, line_width: int = None) -> None:
+        """Draw the brackets from generation ``column - 1`` into ``column``."""
+        connector_color = GENERATION_PARAMS.get('connector_color', (80, 80, 80))
+        connector_width = line_width or GENERATION_PARAMS.get('connector_width', 2)
+        boxes = layout.boxes
+        for child in PEDIGREE_COLUMNS[column]:
+            parent_a, parent_b = PEDIGREE_PARENTS[child]
             FamilyLayoutBuilder._draw_bracket(
-                draw, box_a, box_b, kitten_boxes[pair_idx],
-                connector_color, connector_width, gap_stem_x(0),
+                draw, boxes[parent_a], boxes[parent_b], boxes[child],
+                connector_color, connector_width, layout.stem_xs[column - 1],
             )
-        FamilyLayoutBuilder._draw_bracket(
-            draw, kitten_boxes[0], kitten_boxes[1], gk_boxes[0],
-            connector_color, connector_width, gap_stem_x(1),
+
+    @staticmethod
+    def draw_connectors(draw: ImageDraw.ImageDraw, layout: PedigreeLayout,
+                        line_width: int = None) -> None:
+        """Draw all parent -> child brackets of a planned layout."""
+        for column in range(1, len(PEDIGREE_COLUMNS)):
+            FamilyLayoutBuilder.draw_column_connectors(draw, layout, column, line_width)
+
+    @staticmethod
+    def _log_layout_savings(entries: List[Any], layout: PedigreeLayout) -> None:
+        """Report the tight canvas against the grid canvas for the same cats."""
+        if any(isinstance(entry, Image.Image) for entry in entries):
+            return
+        grid = FamilyLayoutBuilder.plan_layout(
+            [FamilyLayoutBuilder.entry_size(entry, 'grid') for entry in entries],
+            'grid',
         )
-        FamilyLayoutBuilder._draw_bracket(
-            draw, kitten_boxes[2], kitten_boxes[3], gk_boxes[1],
-            connector_color, connector_width, gap_stem_x(1),
+        tight_area = layout.width * layout.height
+        grid_area = grid.width * grid.height
+        logger.info(
+            f"Tight layout: {layout.width}x{layout.height} vs grid "
+            f"{grid.width}x{grid.height} "
+            f"({100 * (1 - tight_area / grid_area):.1f}% less canvas area)"
         )
-        FamilyLayoutBuilder._draw_bracket(
-            draw, gk_boxes[0], gk_boxes[1], ggk_box,
-            connector_color, connector_width, gap_stem_x(2),
+
+    @staticmethod
+    @profiled('create_pedigree_image')
+    def create_pedigree_image(pedigree: Dict[str, Any],
+                              background_color: RGB = None) -> Image.Image:
+        """
+        Create a left-to-right pedigree tree with connector lines.
+
+        Entries may be rendered images or cats (anything with
+        ``image_size()`` and ``generate_image(retain=...)``). The layout is
+        planned from sizes first; cats are then rendered one at a time,
+        pasted into their slot and dropped, so peak memory is the canvas
+        plus a single cat image.
+        """
+        background_color = background_color or GENERATION_PARAMS['background_color']
+
+        entries = FamilyLayoutBuilder.flatten_pedigree(pedigree)
+        layout = FamilyLayoutBuilder.plan_layout(
+            [FamilyLayoutBuilder.entry_size(entry) for entry in entries]
         )
 
-        placements = []
-        for (p1, p2, kitten), (box_a, box_b), k_box in zip(
-            pairs, parent_boxes, kitten_boxes
-        ):
-            placements.extend([(p1, box_a), (p2, box_b), (kitten, k_box)])
-        for gk_img, gk_box in zip(grandkittens, gk_boxes):
-            placements.append((gk_img, gk_box))
-        placements.append((great_grandkitten, ggk_box))
+        if GENERATION_PARAMS.get('layout_mode', 'grid') == 'tight':
+            FamilyLayoutBuilder._log_layout_savings(entries, layout)
+
+        canvas = Image.new('RGB', (layout.width, layout.height), background_color)
+        draw = ImageDraw.Draw(canvas)
+
+        # Draw connectors first (in gaps), then paste cats on top
+        FamilyLayoutBuilder.draw_connectors(draw, layout)
 
-        for img, (x, y, _w, _h) in placements:
+        for entry, (x, y, _w, _h) in zip(entries, layout.boxes):
+            img = FamilyLayoutBuilder.render_entry(entry)
             canvas.paste(img, (x, y))
+            del img
 
-        logger.info(f"Created pedigree image: {total_width}x{total_height} pixels")
+        logger.info(f"Created pedigree image: {layout.width}x{layout.height} pixels")
         return canvas
-
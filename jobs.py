@@ -0,0 +1,374 @@
+"""
+Resumable batch runner for JSONL job files.
+
+Each line of a job file is one job:
+
+    {"id": "a1", "seed": 3, "output": "out/a1.png"}
+    {"output": "out/r.jpg", "encoder": "jpeg", "rng_seed": 7,
+     "overrides": {"layout_mode": "tight", "column_gap": 24}}
+    {"seed": 2, "output": "out/s2.gif", "animate": "reveal"}
+
+  id        - label for reports (default: the line number)
+  seed      - Gen 0 seed id; omitted/null means random founders
+  save_seed - append random founders to the seeds file (default: false)
+  output    - image path (required)
+  encoder   - 'png', 'jpeg' or 'webp' (default: from the output extension,
+              which must then be one of those)
+  animate   - 'reveal' or 'rerolls' to write an animation instead
+  rng_seed  - seeds ``random`` for a reproducible family
+  overrides - GENERATION_PARAMS values for this job only
+
+The file is streamed and at most ``max_in_flight`` jobs are queued on the
+worker pool, so memory stays flat however long the file is. Each finished
+job is appended to a journal (``<jobs>.journal``) with its timings and the
+watermark: the line number below which every job is done. A rerun skips
+those lines and the few finished jobs above the watermark, so an
+interrupted run resumes where it stopped.
+
+    python main.py --run-jobs batch.jsonl --workers 8
+"""
+
+import os
+import json
+import time
+import random
+import logging
+from concurrent.futures import FIRST_COMPLETED, Future, ProcessPoolExecutor, wait
+from dataclasses import asdict, dataclass
+from typing import Any, Callable, Dict, Iterator, List, Optional, Set, Tuple
+
+from config import GENERATION_PARAMS, OUTPUT_SETTINGS, RENDER_CACHE_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+ENCODERS = {'png': 'PNG', 'jpeg': 'JPEG', 'jpg': 'JPEG', 'webp': 'WEBP'}
+JOB_KEYS = {'id', 'seed', 'save_seed', 'output', 'encoder', 'animate',
+            'rng_seed', 'overrides'}
+
+# Per-process state of pool workers (see _init_worker)
+_worker_parts: Optional[Dict[str, Dict[str, Any]]] = None
+_worker_names: List[str] = []
+_worker_seeds: Dict[int, List[Dict[str, Any]]] = {}
+
+
+@dataclass
+class JobResult:
+    line: int
+    id: str
+    status: str  # 'ok' or 'failed'
+    output: Optional[str] = None
+    total_ms: float = 0.0
+    generate_ms: float = 0.0
+    render_ms: float = 0.0  # rendering cats (lazy) + encoding
+    error: Optional[str] = None
+
+
+def journal_path(jobs_file: str) -> str:
+    return f"{jobs_file}.journal"
+
+
+def validate_job(job: Any) -> Dict[str, Any]:
+    """Check one parsed job line; raises ValueError with the reason."""
+    if not isinstance(job, dict):
+        raise ValueError("job must be a JSON object")
+    unknown = set(job) - JOB_KEYS
+    if unknown:
+        raise ValueError(f"unknown keys: {', '.join(sorted(unknown))}")
+    if not isinstance(job.get('output'), str) or not job['output']:
+        raise ValueError("'output' is required")
+    for key in ('seed', 'rng_seed'):
+        value = job.get(key)
+        if value is not None and (isinstance(value, bool) or not isinstance(value, int)):
+            raise ValueError(f"'{key}' must be an integer")
+    if job.get('encoder') is not None and not isinstance(job['encoder'], str):
+        raise ValueError("'encoder' must be a string")
+    if job.get('animate') is not None:
+        if job['animate'] not in ('reveal', 'rerolls'):
+            raise ValueError(f"unknown animation {job['animate']!r}")
+    elif job_encoder(job) not in ENCODERS:
+        raise ValueError(
+            f"unknown encoder {job_encoder(job)!r} "
+            f"(use one of {', '.join(sorted(ENCODERS))})"
+        )
+    overrides = job.get('overrides')
+    if overrides is not None and not isinstance(overrides, dict):
+        raise ValueError("'overrides' must be an object")
+    unknown = set(overrides or {}) - set(GENERATION_PARAMS)
+    if unknown:
+        raise ValueError(f"unknown overrides: {', '.join(sorted(unknown))}")
+    return job
+
+
+def job_encoder(job: Dict[str, Any]) -> str:
+    """Encoder of a still-image job: 'encoder', else the output extension."""
+    return (job.get('encoder')
+            or os.path.splitext(job['output'])[1].lstrip('.') or 'png').lower()
+
+
+def iter_jobs(jobs_file: str) -> Iterator[Tuple[int, Any]]:
+    """(line number, parsed job or the ValueError) for each non-blank line."""
+    with open(jobs_file, 'r', encoding='utf-8') as f:
+        for line_no, line in enumerate(f, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_no, validate_job(json.loads(line))
+            except ValueError as e:
+                yield line_no, e
+
+
+def read_journal(path: str) -> Tuple[int, Set[int]]:
+    """
+    Progress recorded in a journal: (watermark, done lines above it).
+
+    Streams the journal, so memory is bounded by the jobs that were in
+    flight, not by its length. A torn last line (crash mid-write) is ignored.
+    """
+    watermark, done = 1, set()
+    try:
+        f = open(path, 'r', encoding='utf-8')
+    except FileNotFoundError:
+        return watermark, done
+    with f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except ValueError:
+                continue
+            watermark = max(watermark, record.get('watermark', 1))
+            if record['line'] >= watermark:
+                done.add(record['line'])
+            if len(done) > 1024:
+                done = {n for n in done if n >= watermark}
+    return watermark, {n for n in done if n >= watermark}
+
+
+class Journal:
+    """
+    Append-only completion log with a contiguous-progress watermark.
+
+    Jobs are submitted in file order, so every line below the lowest job
+    still in flight (or below the next line to read) is done.
+    """
+
+    def __init__(self, path: str, watermark: int = 1, done: Set[int] = None):
+        self.path = path
+        self.watermark = watermark
+        self._done = set(done or ())  # finished above the watermark last run
+        self._in_flight: Set[int] = set()
+        self._next_line = watermark
+        self._file = open(path, 'a', encoding='utf-8')
+
+    def is_done(self, line: int) -> bool:
+        return line < self.watermark or line in self._done
+
+    def started(self, line: int) -> None:
+        self._in_flight.add(line)
+        self._next_line = max(self._next_line, line + 1)
+
+    def record(self, result: JobResult) -> None:
+        self._in_flight.discard(result.line)
+        self.watermark = max(
+            self.watermark, min(self._in_flight, default=self._next_line)
+        )
+        entry = asdict(result)
+        entry['watermark'] = self.watermark
+        self._file.write(json.dumps(entry) + '\n')
+        self._file.flush()
+        os.fsync(self._file.fileno())
+
+    def close(self) -> None:
+        self._file.close()
+
+
+def _init_worker(base_path: str = ".", pooled: bool = False) -> None:
+    global _worker_parts, _worker_names
+    from image_processing import ImageLoader
+    from main import load_cat_names
+    from render_cache import reset_default_cache
+
+    logging.getLogger().setLevel(logging.WARNING)
+    if pooled:
+        # Jobs rarely render the same cat twice: keep only the byte-bounded
+        # template layer, whatever the parent process had cached (fork)
+        RENDER_CACHE_SETTINGS.update(max_body_bytes=0, max_label_bytes=0)
+        reset_default_cache()
+    _worker_parts = ImageLoader(base_path).load_all_parts()
+    _worker_names = load_cat_names()
+
+
+def _seed_cats(seed_id: int) -> List[Dict[str, Any]]:
+    """Gen 0 of a seed, loading the seeds file once per worker."""
+    from seeds import list_seeds
+
+    if seed_id not in _worker_seeds:
+        # Reload on a miss: the seed may have been added since the last load
+        _worker_seeds.clear()
+        _worker_seeds.update({s['id']: s['cats'] for s in list_seeds()})
+    if seed_id not in _worker_seeds:
+        raise KeyError(f"Seed id {seed_id} not found")
+    return _worker_seeds[seed_id]
+
+
+def run_job(line: int, job: Dict[str, Any]) -> JobResult:
+    """Generate and write one job (in a worker process)."""
+    from main import generate_cat_family, save_family_animation
+
+    job_id = str(job.get('id', line))
+    output = job['output']
+    start = time.perf_counter()
+    saved_params = dict(GENERATION_PARAMS)
+    try:
+        GENERATION_PARAMS.update(job.get('overrides') or {})
+        if job.get('rng_seed') is not None:
+            random.seed(job['rng_seed'])
+        snapshots = _seed_cats(job['seed']) if job.get('seed') is not None else None
+        pedigree, family, _seed_id = generate_cat_family(
+            gen0_snapshots=snapshots,
+            save_new_seed=bool(job.get('save_seed')) and snapshots is None,
+            parts_images=_worker_parts, names=_worker_names,
+        )
+        generated = time.perf_counter()
+
+        output_dir = os.path.dirname(output)
+        if output_dir:
+            os.makedirs(output_dir, exist_ok=True)
+        if job.get('animate'):
+            save_family_animation(pedigree, family, output, job['animate'])
+        else:
+            from image_processing import FamilyLayoutBuilder
+
+            fmt = ENCODERS[job_encoder(job)]
+            image = FamilyLayoutBuilder.create_pedigree_image(pedigree)
+            image.save(output, format=fmt, quality=OUTPUT_SETTINGS['quality'])
+            del image
+        done = time.perf_counter()
+        return JobResult(line, job_id, 'ok', output,
+                         total_ms=(done - start) * 1000,
+                         generate_ms=(generated - start) * 1000,
+                         render_ms=(done - generated) * 1000)
+    except Exception as e:
+        return JobResult(line, job_id, 'failed', output,
+                         total_ms=(time.perf_counter() - start) * 1000,
+                         error=f"{type(e).__name__}: {e}")
+    finally:
+        GENERATION_PARAMS.clear()
+        GENERATION_PARAMS.update(saved_params)
+
+
+def _percentile(values: List[float], q: float) -> float:
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))] if ordered else 0.0
+
+
+def run_jobs(jobs_file: str, workers: int = 4, max_in_flight: int = None,
+             journal_file: str = None, base_path: str = ".",
+             on_result: Callable[[JobResult], None] = None) -> Dict[str, Any]:
+    """
+    Run (or resume) every job in ``jobs_file``.
+
+    Args:
+        jobs_file: JSONL job file (see module docstring)
+        workers: Worker processes (<= 1 runs jobs in this process)
+        max_in_flight: Jobs queued at once (default: 2 per worker)
+        journal_file: Completion journal (default: <jobs_file>.journal)
+        on_result: Called with each JobResult as it finishes
+
+    Returns:
+        Summary with counts, timing percentiles and failed job ids
+    """
+    if not os.path.isfile(jobs_file):
+        raise FileNotFoundError(f"Job file not found: {jobs_file}")
+    journal_file = journal_file or journal_path(jobs_file)
+    watermark, done = read_journal(journal_file)
+    journal = Journal(journal_file, watermark, done)
+    max_in_flight = max_in_flight or max(1, 2 * workers)
+    if watermark > 1 or done:
+        logger.info(f"Resuming {jobs_file} from line {watermark}")
+
+    executor = None
+    if workers > 1:
+        executor = ProcessPoolExecutor(
+            max_workers=workers, initializer=_init_worker, initargs=(base_path, True)
+        )
+    elif _worker_parts is None:
+        _init_worker(base_path)
+
+    # Only a bounded sample of timings is kept for the percentiles
+    timings: List[float] = []
+    summary: Dict[str, Any] = {'ok': 0, 'failed': 0, 'skipped': 0,
+                               'failed_ids': []}
+    in_flight: Set[Future] = set()
+    started = time.perf_counter()
+
+    def finish(result: JobResult) -> None:
+        journal.record(result)
+        summary[result.status] += 1
+        if result.status == 'failed':
+            logger.error(f"Job {result.id} (line {result.line}) failed: {result.error}")
+            if len(summary['failed_ids']) < 100:
+                summary['failed_ids'].append(result.id)
+        if len(timings) < 10000:
+            timings.append(result.total_ms)
+        else:
+            timings[random.randrange(len(timings))] = result.total_ms
+        if on_result is not None:
+            on_result(result)
+
+    def drain(limit: int) -> None:
+        while len(in_flight) > limit:
+            finished, _ = wait(in_flight, return_when=FIRST_COMPLETED)
+            for future in finished:
+                in_flight.discard(future)
+                finish(future.result())
+
+    try:
+        for line, job in iter_jobs(jobs_file):
+            if journal.is_done(line):
+                summary['skipped'] += 1
+                continue
+            journal.started(line)
+            if isinstance(job, ValueError):
+                finish(JobResult(line, str(line), 'failed', error=str(job)))
+            elif executor is None:
+                finish(run_job(line, job))
+            else:
+                drain(max_in_flight - 1)
+                in_flight.add(executor.submit(run_job, line, job))
+        drain(0)
+    finally:
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+        journal.close()
+
+    elapsed = time.perf_counter() - started
+    ran = summary['ok'] + summary['failed']
+    summary.update({
+        'elapsed_s': elapsed,
+        'jobs_per_s': ran / elapsed if elapsed > 0 else 0.0,
+        'p50_ms': _percentile(timings, 0.5),
+        'p95_ms': _percentile(timings, 0.95),
+        'max_ms': max(timings, default=0.0),
+    })
+    return summary
+
+
+def format_result(result: JobResult) -> str:
+    if result.status == 'ok':
+        return (f"  {result.id:<12} ok      {result.total_ms:8.0f} ms "
+                f"(generate {result.generate_ms:.0f}, render + encode {result.render_ms:.0f})"
+                f"  {result.output}")
+    return f"  {result.id:<12} FAILED  {result.error}"
+
+
+def format_summary(summary: Dict[str, Any]) -> str:
+    lines = [
+        f"{summary['ok']} ok, {summary['failed']} failed, "
+        f"{summary['skipped']} already done "
+        f"in {summary['elapsed_s']:.1f} s ({summary['jobs_per_s']:.2f} jobs/s)",
+        f"job time p50 {summary['p50_ms']:.0f} ms, p95 {summary['p95_ms']:.0f} ms, "
+        f"max {summary['max_ms']:.0f} ms",
+    ]
+    if summary['failed_ids']:
+        lines.append(f"failed: {', '.join(summary['failed_ids'])}")
+    return "\n".join(lines)
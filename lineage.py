@@ -0,0 +1,366 @@
+"""
+Ancestry and kinship over DAG pedigrees.
+
+Once related cats may breed, ``parent1`` / ``parent2`` no longer form a
+tree. ``Lineage`` gives every cat a compact integer id (parents always
+before children) and answers, for populations of 100k+ cats:
+
+  * kinship(a, b)     - coefficient of kinship (memoized per pair)
+  * inbreeding(i)     - kinship of i's parents, computed when i is added
+  * is_ancestor(a, b) - one bit test in b's ancestor bitset
+
+Kinship uses the L D L' decomposition of the relationship matrix
+(Meuwissen & Luo): each cat keeps a sparse row of path coefficients to
+its ancestors, built as half the sum of its parents' rows, plus a
+Mendelian-sampling variance D. Then
+
+    kinship(a, b) = 1/2 sum_k L[a,k] L[b,k] D[k]    (k: shared ancestors)
+    F(i)          = kinship(parent1, parent2)
+
+so adding a cat costs one merge of its parents' rows and a kinship
+query is a sparse dot product, not a recursion over ancestor pairs.
+
+Everything is windowed to ``depth`` generations (LINEAGE_SETTINGS): rows
+and bitsets only hold ancestors that close, older relationships are
+ignored. ``is_ancestor`` stays exact beyond the window by walking parents.
+``release`` drops the rows and bitsets of cats that will not breed or be
+queried again; they are rebuilt from the ancestors in their window if
+needed (and kept). ``save`` / ``load`` persist the per-cat columns, and
+the rows of the cats that breed next, for checkpoints.
+
+    lineage = Lineage()
+    a, b = lineage.add(), lineage.add()
+    kitten = lineage.add(a, b)
+    lineage.kinship(a, kitten)  # 0.25
+"""
+
+import os
+import logging
+import weakref
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+import numpy as np
+
+from config import LINEAGE_SETTINGS
+
+logger = logging.getLogger(__name__)
+
+NO_PARENT = -1
+
+# (ancestor ids ascending, then the cat itself; path coefficients)
+Row = Tuple[np.ndarray, np.ndarray]
+
+
+class Lineage:
+    """Compact ids, parent links, kinship and ancestor bitsets."""
+
+    def __init__(self, depth: int = LINEAGE_SETTINGS['depth'],
+                 max_memo: int = LINEAGE_SETTINGS['max_memo']):
+        """
+        Args:
+            depth: Generations of ancestry kept for kinship and bitsets
+            max_memo: Kinship pairs memoized before the table is reset
+        """
+        self.depth = depth
+        self.max_memo = max_memo
+        self._size = 0
+        # Flat columns indexed by id, grown by doubling
+        self._parents = np.empty((1024, 2), dtype=np.int64)
+        self._generation = np.empty(1024, dtype=np.int32)
+        self._inbreeding = np.empty(1024, dtype=np.float64)
+        self._mendelian = np.empty(1024, dtype=np.float64)
+        self._rows: Dict[int, Row] = {}
+        # id -> (base id, bitset of ancestors at base + bit). The bitset spans
+        # only the cat's own in-window ancestors; bases are multiples of 8
+        self._bits: Dict[int, Tuple[int, np.ndarray]] = {}
+        self._kinship: Dict[Tuple[int, int], float] = {}
+        self._cats: 'weakref.WeakKeyDictionary[Any, int]' = weakref.WeakKeyDictionary()
+
+    def __len__(self) -> int:
+        return self._size
+
+    def _grow(self) -> None:
+        capacity = 2 * len(self._generation)
+        for name in ('_parents', '_generation', '_inbreeding', '_mendelian'):
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            setattr(self, name, new)
+
+    # -- building --------------------------------------------------------
+
+    def add(self, parent1: int = NO_PARENT, parent2: int = NO_PARENT,
+            generation: Optional[int] = None) -> int:
+        """
+        Register a cat and return its id.
+
+        Parents must already be registered (-1 = unknown). ``generation``
+        must be above both parents' and defaults to one more than the
+        older parent's.
+        """
+        new_id = self._size
+        for parent in (parent1, parent2):
+            if not NO_PARENT <= parent < new_id:
+                raise ValueError(f"Unknown parent id {parent}")
+        parents = [p for p in (parent1, parent2) if p != NO_PARENT]
+        known = [int(self._generation[p]) for p in parents]
+        if generation is None:
+            generation = max(known) + 1 if known else 0
+        elif known and generation <= max(known):
+            raise ValueError(
+                f"Generation {generation} is not after its parents' {known}"
+            )
+
+        if new_id == len(self._generation):
+            self._grow()
+        self._parents[new_id] = (parent1, parent2)
+        self._generation[new_id] = generation
+        # Mendelian sampling variance: what the parents do not explain
+        self._mendelian[new_id] = 1.0 - sum(
+            0.25 * (1.0 + self._inbreeding[p]) for p in parents
+        )
+        self._size += 1
+
+        parent_rows = [self._row(p, generation - self.depth) for p in parents]
+        self._inbreeding[new_id] = (
+            self._row_kinship(*parent_rows) if len(parent_rows) == 2 else 0.0
+        )
+        row = self._merge_rows(new_id, parent_rows)
+        self._rows[new_id] = row
+        self._bits[new_id] = self._build_bits(new_id, row[0][:-1])
+        return new_id
+
+    def register(self, cat: Any) -> int:
+        """
+        Id of a ``Cat``, adding it (and any unregistered ancestors) if new.
+
+        Cats are tracked by identity and forgotten when garbage-collected.
+        """
+        pending = [cat]
+        while pending:
+            node = pending[-1]
+            if node in self._cats:
+                pending.pop()
+                continue
+            parents = [getattr(node, attr, None) for attr in ('parent1', 'parent2')]
+            missing = [p for p in parents if p is not None and p not in self._cats]
+            if missing:
+                pending.extend(missing)
+                continue
+            pending.pop()
+            self._cats[node] = self.add(
+                *(self._cats[p] if p is not None else NO_PARENT for p in parents)
+            )
+        return self._cats[cat]
+
+    def save(self, path: str, rows: Iterable[int] = ()) -> None:
+        """
+        Write parents, generations and coefficients to an .npz (atomically),
+        plus the rows of ``rows`` (e.g. the cats that breed next).
+        """
+        n = self._size
+        row_ids = np.array(sorted(rows), dtype=np.int64)
+        saved = [self._row(int(i)) for i in row_ids]
+        tmp_path = f"{path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f, depth=np.array(self.depth), parents=self._parents[:n],
+                generation=self._generation[:n], inbreeding=self._inbreeding[:n],
+                mendelian=self._mendelian[:n], row_ids=row_ids,
+                row_offsets=np.cumsum([0] + [len(ids) for ids, _ in saved]),
+                row_ancestors=np.concatenate(
+                    [ids for ids, _ in saved] or [np.empty(0, dtype=np.int64)]
+                ),
+                row_coeffs=np.concatenate([c for _, c in saved] or [np.empty(0)]),
+            )
+        os.replace(tmp_path, path)
+
+    @classmethod
+    def load(cls, path: str, size: Optional[int] = None,
+             max_memo: int = LINEAGE_SETTINGS['max_memo']) -> 'Lineage':
+        """
+        Lineage saved by ``save``, cut to its first ``size`` cats.
+
+        Rows passed to ``save`` are restored; other rows and all bitsets
+        are rebuilt (windowed) when a cat is queried or has children.
+        """
+        with np.load(path) as data:
+            lineage = cls(int(data['depth']), max_memo)
+            n = len(data['generation']) if size is None else size
+            if n > len(data['generation']):
+                raise ValueError(f"{path} holds {len(data['generation'])} cats, not {n}")
+            while len(lineage._generation) < n:
+                lineage._grow()
+            for name in ('parents', 'generation', 'inbreeding', 'mendelian'):
+                getattr(lineage, f"_{name}")[:n] = data[name][:n]
+            if 'row_ids' in data:
+                offsets = data['row_offsets']
+                ancestors, coeffs = data['row_ancestors'], data['row_coeffs']
+                for k, i in enumerate(data['row_ids']):
+                    if i < n:
+                        span = slice(offsets[k], offsets[k + 1])
+                        lineage._rows[int(i)] = (ancestors[span], coeffs[span])
+        lineage._size = n
+        return lineage
+
+    def release(self, ids: Iterable[int]) -> None:
+        """Drop rows and bitsets of cats that will not breed or be queried."""
+        for i in ids:
+            self._rows.pop(i, None)
+            self._bits.pop(i, None)
+
+    # -- queries ---------------------------------------------------------
+
+    def parents(self, i: int) -> Tuple[int, int]:
+        p1, p2 = self._parents[i]
+        return int(p1), int(p2)
+
+    def generation(self, i: int) -> int:
+        return int(self._generation[i])
+
+    def inbreeding(self, i: int) -> float:
+        """Inbreeding coefficient F (kinship of the parents)."""
+        return float(self._inbreeding[i])
+
+    def kinship(self, a: int, b: int) -> float:
+        """
+        Coefficient of kinship: the chance that alleles drawn at random
+        from ``a`` and ``b`` are identical by descent (1/2 (1 + F) for
+        ``a == b``).
+        """
+        if a < b:
+            a, b = b, a
+        key = (a, b)
+        cached = self._kinship.get(key)
+        if cached is not None:
+            return cached
+        if a == b:
+            value = 0.5 * (1.0 + float(self._inbreeding[a]))
+        else:
+            value = self._row_kinship(self._row(a), self._row(b))
+        if len(self._kinship) >= self.max_memo:
+            self._kinship.clear()
+        self._kinship[key] = value
+        return value
+
+    def is_ancestor(self, a: int, b: int) -> bool:
+        """Whether ``a`` is a (strict) ancestor of ``b``."""
+        if a >= b:
+            return False
+        entry = self._bits.get(b)
+        if entry is not None:
+            base, bits = entry
+            offset = a - base
+            if 0 <= offset < 8 * len(bits) and bits[offset >> 3] >> (offset & 7) & 1:
+                return True
+            if self._generation[a] >= self._generation[b] - self.depth:
+                # The bitset holds every ancestor this close
+                return False
+        return a in self._walk_ancestors(b, int(self._generation[a]), until=a)
+
+    def ancestors(self, i: int) -> List[int]:
+        """Ids of every ancestor within ``depth`` generations, ascending."""
+        return [int(a) for a in self._row(i)[0][:-1]]
+
+    # -- rows and bitsets ------------------------------------------------
+
+    def _row(self, i: int, floor: Optional[int] = None) -> Row:
+        """
+        Row of ``i``, restricted to ancestors of generation >= ``floor``
+        (default: i's own window). Released rows are rebuilt and kept.
+        """
+        row = self._rows.get(i)
+        if row is None:
+            row = self._rows[i] = self._rebuild_row(i)
+        if floor is not None:
+            row = self._restrict(row, floor)
+        return row
+
+    def _restrict(self, row: Row, floor: int) -> Row:
+        ids, coeffs = row
+        keep = self._generation[ids] >= floor
+        return row if keep.all() else (ids[keep], coeffs[keep])
+
+    def _rebuild_row(self, i: int) -> Row:
+        """
+        Row of a released (or loaded) cat, merged up from the ancestors in
+        its window only. Restricting every partial row to i's floor keeps
+        the walk to ``depth`` generations (a row's ancestors inside the
+        window are reached only through cats inside it).
+        """
+        floor = int(self._generation[i]) - self.depth
+        built: Dict[int, Row] = {}
+        stack = [i]
+        while stack:
+            node = stack[-1]
+            if node in built:
+                stack.pop()
+                continue
+            parents = [
+                int(p) for p in self._parents[node]
+                if p != NO_PARENT and self._generation[p] >= floor
+            ]
+            pending = [p for p in parents if p not in built and p not in self._rows]
+            if pending:
+                stack.extend(pending)
+                continue
+            stack.pop()
+            built[node] = self._merge_rows(node, [
+                built[p] if p in built else self._restrict(self._rows[p], floor)
+                for p in parents
+            ])
+        return built[i]
+
+    def _row_kinship(self, row_a: Row, row_b: Row) -> float:
+        """1/2 sum over shared ancestors of L[a,k] L[b,k] D[k]."""
+        ids_a, coeffs_a = row_a
+        ids_b, coeffs_b = row_b
+        _common, ia, ib = np.intersect1d(
+            ids_a, ids_b, assume_unique=True, return_indices=True,
+        )
+        return 0.5 * float(np.dot(
+            coeffs_a[ia] * coeffs_b[ib], self._mendelian[ids_a[ia]]
+        ))
+
+    def _merge_rows(self, i: int, parent_rows: List[Row]) -> Row:
+        """Half the sum of the parents' rows, then i itself (coefficient 1)."""
+        if not parent_rows:
+            return np.array([i], dtype=np.int64), np.ones(1)
+        ids = np.concatenate([ids for ids, _ in parent_rows])
+        coeffs = 0.5 * np.concatenate([coeffs for _, coeffs in parent_rows])
+        if len(parent_rows) > 1:
+            ids, inverse = np.unique(ids, return_inverse=True)
+            coeffs = np.bincount(inverse, weights=coeffs, minlength=len(ids))
+        return np.append(ids, i), np.append(coeffs, 1.0)
+
+    def _build_bits(self, i: int, ancestors: np.ndarray) -> Tuple[int, np.ndarray]:
+        """
+        Bitset from the lowest to the highest of ``ancestors`` (ascending),
+        so its size follows the cat's own family, not the population.
+        """
+        if not len(ancestors):
+            return i & ~7, np.zeros(0, dtype=np.uint8)
+        base = int(ancestors[0]) & ~7
+        bits = np.zeros((int(ancestors[-1]) - base) // 8 + 1, dtype=np.uint8)
+        offsets = ancestors - base
+        np.bitwise_or.at(
+            bits, offsets >> 3, np.left_shift(1, offsets & 7).astype(np.uint8)
+        )
+        return base, bits
+
+    def _walk_ancestors(self, i: int, min_generation: int,
+                        until: Optional[int] = None) -> Set[int]:
+        """Ancestors of ``i`` reached without going below ``min_generation``."""
+        seen: Set[int] = set()
+        stack = [i]
+        while stack:
+            node = stack.pop()
+            for parent in self._parents[node]:
+                parent = int(parent)
+                if (parent != NO_PARENT and parent not in seen
+                        and self._generation[parent] >= min_generation):
+                    seen.add(parent)
+                    if parent == until:
+                        return seen
+                    stack.append(parent)
+        return seen
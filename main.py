@@ -2,25 +2,37 @@
 """
 Cat Family Generator - Main Entry Point
 
+Only light modules (config, seeds, metrics, profiling) are imported at
+startup. Pillow, NumPy and the image_processing / cat stack load inside the
+functions that render, so metadata commands (--list-seeds, --show-seed,
+--validate-seeds) start in tens of milliseconds.
 """
 
+import io
 import os
 import sys
+import time
 import random
 import logging
 import argparse
-from typing import List, Tuple, Dict, Any, Optional
+from typing import TYPE_CHECKING, List, Tuple, Dict, Any, Optional
 
-from cats_colors import CATS_COLORS
+import metrics
 from config import (
-    OUTPUT_SETTINGS,
-    NAMES_FILE, LOGGING_CONFIG, RGB, SEEDS_FILE
+    OUTPUT_SETTINGS, GENERATION_PARAMS, SERVICE_SETTINGS, METRICS_SETTINGS,
+    MONTAGE_SETTINGS, ANIMATION_SETTINGS, NAMES_FILE, LOGGING_CONFIG, RGB, SEEDS_FILE
 )
-from image_processing import ImageLoader, CatImageBuilder, FamilyLayoutBuilder
-from cat import CatFamily, ParentCat
+from profiling import Profiler, add_hook, remove_hook, profiled, stage
 from seeds import (
-    append_seed, get_seed, list_seeds, make_cat_snapshot, format_seed_summary
+    append_seed, get_seed, list_seeds, make_cat_snapshot, format_seed_summary,
+    format_seed_details, validate_seeds
 )
+from seed_index import DuplicateSeedError, find_seeds
+
+if TYPE_CHECKING:
+    from cat import CatFamily, ParentCat
+    from genome_archive import GenomeArchive
+    from seeds import SeedWriter
 
 
 def setup_logging(verbose: bool = False, log_file: str = None) -> None:
@@ -56,12 +68,14 @@ def load_cat_names(filepath: str = NAMES_FILE) -> List[str]:
 
 
 def _random_gen0_cats(
-    family: CatFamily,
+    family: 'CatFamily',
     parts_images: Dict[str, Dict],
     colors: List[RGB],
     count: int = 8,
 ) -> List[Dict[str, Any]]:
     """Create random Gen 0 snapshots (name + color + part refs)."""
+    from image_processing import CatImageBuilder
+
     cats = []
     for _ in range(count):
         name = family.get_random_name()
@@ -72,11 +86,13 @@ def _random_gen0_cats(
 
 
 def _build_parents_from_snapshots(
-    family: CatFamily,
+    family: 'CatFamily',
     parts_images: Dict[str, Dict],
     snapshots: List[Dict[str, Any]],
-) -> List[ParentCat]:
+) -> List['ParentCat']:
     """Materialize ParentCat objects from Gen 0 seed snapshots."""
+    from image_processing import CatImageBuilder
+
     if len(snapshots) != 8:
         raise ValueError(f"Gen 0 seed must contain 8 cats, got {len(snapshots)}")
 
@@ -90,11 +106,15 @@ def _build_parents_from_snapshots(
     return parents
 
 
+@profiled('generate_cat_family')
 def generate_cat_family(
     gen0_snapshots: Optional[List[Dict[str, Any]]] = None,
     custom_colors: List[RGB] = None,
     save_new_seed: bool = True,
-) -> Tuple[Dict[str, Any], CatFamily, Optional[int]]:
+    parts_images: Optional[Dict[str, Dict]] = None,
+    names: Optional[List[str]] = None,
+    seed_writer: Optional['SeedWriter'] = None,
+) -> Tuple[Dict[str, Any], 'CatFamily', Optional[int]]:
     """
     Generate a complete cat family tree.
 
@@ -102,13 +122,22 @@ def generate_cat_family(
         gen0_snapshots: Optional Gen 0 cats from a saved seed. If None, random.
         custom_colors: Optional custom color palette (used only when random).
         save_new_seed: If True and Gen 0 was random, append it to seeds.json.
+        parts_images: Preloaded part library (loaded from disk if None).
+        names: Preloaded cat names (read from NAMES_FILE if None).
+        seed_writer: Group-commit writer for new seeds in batch runs
+            (appended directly if None).
 
     Returns:
-        (pedigree image data, CatFamily, new_seed_id or None)
+        (pedigree of cats to render, CatFamily, new_seed_id or None)
     """
-    names = load_cat_names()
-    image_loader = ImageLoader()
-    parts_images = image_loader.load_all_parts()
+    from cats_colors import CATS_COLORS
+    from image_processing import ImageLoader
+    from cat import CatFamily
+
+    if names is None:
+        names = load_cat_names()
+    if parts_images is None:
+        parts_images = ImageLoader().load_all_parts()
     family = CatFamily(names)
     colors = custom_colors or CATS_COLORS
 
@@ -116,8 +145,14 @@ def generate_cat_family(
     if gen0_snapshots is None:
         gen0_snapshots = _random_gen0_cats(family, parts_images, colors, count=8)
         if save_new_seed:
-            new_seed_id = append_seed(gen0_snapshots)
-            logging.info(f"Saved new Gen 0 seed #{new_seed_id} to {SEEDS_FILE}")
+            try:
+                if seed_writer is not None:
+                    new_seed_id = seed_writer.append(gen0_snapshots)
+                else:
+                    new_seed_id = append_seed(gen0_snapshots)
+                logging.info(f"Saved new Gen 0 seed #{new_seed_id} to {SEEDS_FILE}")
+            except DuplicateSeedError as e:
+                logging.info(f"Gen 0 not saved: {e}")
 
     parents = _build_parents_from_snapshots(family, parts_images, gen0_snapshots)
     (
@@ -151,25 +186,20 @@ def generate_cat_family(
         grandkitten1, grandkitten2, family.get_random_name()
     )
 
-    logging.info("\n--- Generating Images ---")
-    parent_imgs = [p.generate_image() for p in parents]
-    for kitten in (kitten1, kitten2, kitten3, kitten4):
-        kitten.generate_image()
-    grandkitten1_img = grandkitten1.generate_image()
-    grandkitten2_img = grandkitten2.generate_image()
-    great_grandkitten_img = great_grandkitten.generate_image()
-
+    # Cats are rendered lazily by the pedigree canvas, one at a time, so
+    # their images never need to be held together in memory.
     pedigree = {
         'pairs': [
-            (parent_imgs[0], parent_imgs[1], kitten1.image),
-            (parent_imgs[2], parent_imgs[3], kitten2.image),
-            (parent_imgs[4], parent_imgs[5], kitten3.image),
-            (parent_imgs[6], parent_imgs[7], kitten4.image),
+            (parent1, parent2, kitten1),
+            (parent3, parent4, kitten2),
+            (parent5, parent6, kitten3),
+            (parent7, parent8, kitten4),
         ],
-        'grandkittens': [grandkitten1_img, grandkitten2_img],
-        'great_grandkitten': great_grandkitten_img,
+        'grandkittens': [grandkitten1, grandkitten2],
+        'great_grandkitten': great_grandkitten,
     }
 
+    metrics.inc('families_total')
     logging.info(f"\nGenerated {len(family.all_cats)} cats across 4 generations")
     return pedigree, family, new_seed_id
 
@@ -177,6 +207,8 @@ def generate_cat_family(
 def save_family_image(pedigree: Dict[str, Any],
                       output_path: str = None) -> str:
     """Save the pedigree family image to a file."""
+    from image_processing import FamilyLayoutBuilder
+
     output_path = output_path or OUTPUT_SETTINGS['default_filename']
 
     output_dir = os.path.dirname(output_path)
@@ -184,17 +216,168 @@ def save_family_image(pedigree: Dict[str, Any],
         os.makedirs(output_dir)
 
     family_img = FamilyLayoutBuilder.create_pedigree_image(pedigree)
-    family_img.save(
-        output_path,
-        format=OUTPUT_SETTINGS['format'],
-        quality=OUTPUT_SETTINGS['quality']
-    )
+    start = time.perf_counter()
+    with stage('save_png', path=output_path):
+        family_img.save(
+            output_path,
+            format=OUTPUT_SETTINGS['format'],
+            quality=OUTPUT_SETTINGS['quality']
+        )
+    encode_ms = (time.perf_counter() - start) * 1000
 
+    metrics.inc('bytes_written_total', os.path.getsize(output_path))
     file_size = os.path.getsize(output_path) / 1024  # KB
-    logging.info(f"Saved family image to: {output_path} ({file_size:.1f} KB)")
+    logging.info(
+        f"Saved family image to: {output_path} "
+        f"({file_size:.1f} KB, encoded in {encode_ms:.0f} ms)"
+    )
     return output_path
 
 
+def save_family_animation(pedigree: Dict[str, Any], family: 'CatFamily',
+                          output_path: str, mode: str = 'reveal',
+                          frames: int = None, scale: float = None) -> str:
+    """Save the pedigree as an animation (GIF for .gif, otherwise APNG)."""
+    from animation import reroll_frames, reveal_frames, save_animation
+    from family_graph import FamilyGraph
+
+    scale = scale or ANIMATION_SETTINGS['scale']
+    output_dir = os.path.dirname(output_path)
+    if output_dir and not os.path.exists(output_dir):
+        os.makedirs(output_dir)
+
+    if mode == 'reveal':
+        frame_iter = reveal_frames(pedigree, scale)
+    else:
+        graph = FamilyGraph(family, pedigree)
+        frame_iter = reroll_frames(
+            graph, frames or ANIMATION_SETTINGS['frames'], scale=scale
+        )
+    with stage('save_animation', path=output_path, mode=mode):
+        path, count = save_animation(frame_iter, output_path)
+
+    metrics.inc('bytes_written_total', os.path.getsize(path))
+    logging.info(
+        f"Saved {count}-frame animation to: {path} "
+        f"({os.path.getsize(path) / 1024:.1f} KB)"
+    )
+    return path
+
+
+def render_montage(count: int, output_path: str,
+                   gen0_snapshots: Optional[List[Dict[str, Any]]] = None,
+                   save_new_seed: bool = False, scale: float = None,
+                   columns: int = None,
+                   archive: Optional['GenomeArchive'] = None,
+                   max_memory: Optional[int] = None) -> List[str]:
+    """
+    Generate ``count`` families straight into paged contact sheets.
+
+    Families use ``gen0_snapshots`` (re-rolled each time) or random Gen 0s,
+    and are queued on ``archive`` if given (the caller flushes it). With
+    ``max_memory`` a page that would not fit stops the run before it is
+    drawn. Returns the page paths.
+    """
+    from image_processing import ImageLoader
+    from montage import MontageWriter
+
+    parts_images = ImageLoader().load_all_parts()
+    names = load_cat_names()
+    writer = MontageWriter(
+        output_path,
+        scale=scale or MONTAGE_SETTINGS['scale'],
+        columns=columns or MONTAGE_SETTINGS['columns'],
+        budget=max_memory,
+    )
+    with writer:
+        for _ in range(count):
+            pedigree, _family, _seed_id = generate_cat_family(
+                gen0_snapshots=gen0_snapshots, save_new_seed=save_new_seed,
+                parts_images=parts_images, names=names,
+            )
+            if archive is not None:
+                archive.queue_pedigree(pedigree)
+            writer.add(pedigree)
+    return writer.pages
+
+
+def compare_layouts(pedigree: Dict[str, Any]) -> Dict[str, Dict[str, float]]:
+    """
+    Render and encode the same pedigree in grid and tight layout.
+
+    The RNG state is replayed for each mode so both canvases show the same
+    coats. Returns per-mode canvas size, area, encode time and PNG bytes.
+    """
+    from image_processing import FamilyLayoutBuilder
+
+    rng_state = random.getstate()
+    original_mode = GENERATION_PARAMS.get('layout_mode', 'grid')
+    report: Dict[str, Dict[str, float]] = {}
+    try:
+        for mode in ('grid', 'tight'):
+            GENERATION_PARAMS['layout_mode'] = mode
+            random.setstate(rng_state)
+            canvas = FamilyLayoutBuilder.create_pedigree_image(pedigree)
+            buffer = io.BytesIO()
+            start = time.perf_counter()
+            canvas.save(buffer, format=OUTPUT_SETTINGS['format'])
+            report[mode] = {
+                'width': canvas.width,
+                'height': canvas.height,
+                'area': canvas.width * canvas.height,
+                'encode_ms': (time.perf_counter() - start) * 1000,
+                'bytes': buffer.tell(),
+            }
+    finally:
+        GENERATION_PARAMS['layout_mode'] = original_mode
+    random.setstate(rng_state)
+    return report
+
+
+def format_layout_report(report: Dict[str, Dict[str, float]]) -> str:
+    """Human-readable grid vs tight comparison for --compare-layouts."""
+    lines = [f"{'layout':<8}{'canvas':>14}{'area (Mpx)':>12}"
+             f"{'encode (ms)':>13}{'size (KB)':>11}"]
+    for mode, row in report.items():
+        lines.append(
+            f"{mode:<8}{row['width']:>7}x{row['height']:<6}"
+            f"{row['area'] / 1e6:>12.2f}{row['encode_ms']:>13.0f}"
+            f"{row['bytes'] / 1024:>11.1f}"
+        )
+    grid, tight = report['grid'], report['tight']
+    lines.append(
+        f"tight saves {100 * (1 - tight['area'] / grid['area']):.1f}% area, "
+        f"{100 * (1 - tight['encode_ms'] / grid['encode_ms']):.1f}% encode time, "
+        f"{100 * (1 - tight['bytes'] / grid['bytes']):.1f}% file size"
+    )
+    return "\n".join(lines)
+
+
+def _finish_profile(profiler: Profiler, path: str, partial: bool = False) -> None:
+    """Unhook the profiler, write its Chrome trace and print the summary."""
+    remove_hook(profiler)
+    try:
+        profiler.write_chrome_trace(path)
+    except OSError as e:
+        logging.error(f"Could not write trace {path}: {e}")
+        return
+    print(profiler.format_summary())
+    print(f"{'Partial Chrome' if partial else 'Chrome'} trace written to: {path}")
+
+
+def _memory_size(text: str) -> int:
+    """argparse type for --max-memory."""
+    from memory import parse_size
+
+    try:
+        size = parse_size(text)
+    except ValueError as e:
+        raise argparse.ArgumentTypeError(str(e))
+    if size <= 0:
+        raise argparse.ArgumentTypeError("memory budget must be above 0")
+    return size
+
+
 def main():
     """Main entry point"""
     parser = argparse.ArgumentParser(
@@ -205,7 +388,18 @@ Examples:
   %(prog)s                       # Random Gen 0 (auto-saved to {SEEDS_FILE})
   %(prog)s --load-seed 3         # Replay Gen 0 from seed #3 (kids re-rolled)
   %(prog)s --list-seeds          # Show all saved Gen 0 seeds
+  %(prog)s --show-seed 3         # Names, colors and parts of seed #3
+  %(prog)s --find-seeds body_3 '#afeeee'  # Seeds using body_3 and that color
+  %(prog)s --validate-seeds      # Check seeds.json and its part files
   %(prog)s -o my_cats.png        # Custom output filename
+  %(prog)s --layout tight        # Pack cats by size (smaller canvas)
+  %(prog)s --montage 24 -o sheet.png  # 24 families on contact sheet(s)
+  %(prog)s --animate reveal -o family.gif  # Reveal Gen 0 -> Gen 3
+  %(prog)s --run-jobs batch.jsonl --workers 8  # Resumable batch
+  %(prog)s --montage 50 --archive cats.genomes  # Keep genomes for search
+  %(prog)s --serve --port 8765   # HTTP render service with warm part library
+  %(prog)s --profile trace.json  # Per-stage timings + Chrome trace
+  %(prog)s --max-memory 256M     # Fail early (or pack tighter) above 256 MB
   %(prog)s -v                    # Verbose logging
         """
     )
@@ -229,12 +423,162 @@ Examples:
         help=f"List saved Gen 0 seeds from {SEEDS_FILE} and exit"
     )
 
+    parser.add_argument(
+        '--show-seed',
+        type=int,
+        metavar='ID',
+        help=f"Show one saved Gen 0 seed from {SEEDS_FILE} and exit"
+    )
+
+    parser.add_argument(
+        '--find-seeds',
+        nargs='+',
+        metavar='TERM',
+        help="List seeds matching every term: a part ref (body_3), a founder "
+             "color (#afeeee or 175,238,238) or a name; prefix with part:, "
+             "color: or name: to be explicit"
+    )
+
+    parser.add_argument(
+        '--validate-seeds',
+        action='store_true',
+        help=f"Check {SEEDS_FILE} for invalid entries or missing part files and exit"
+    )
+
     parser.add_argument(
         '--no-save-seed',
         action='store_true',
         help="Do not append a new random Gen 0 to the seeds file"
     )
 
+    parser.add_argument(
+        '--layout',
+        choices=['grid', 'tight'],
+        default=GENERATION_PARAMS.get('layout_mode', 'grid'),
+        help="Pedigree layout: uniform grid cells or tight packing by cat size"
+    )
+
+    parser.add_argument(
+        '--compare-layouts',
+        action='store_true',
+        help="Also report canvas area, encode time and size for grid vs tight"
+    )
+
+    parser.add_argument(
+        '--animate',
+        choices=['reveal', 'rerolls'],
+        help="Save an animation instead of a still: reveal the pedigree "
+             "generation by generation, or step through re-rolls of the "
+             "descendants (GIF if -o ends in .gif, otherwise APNG)"
+    )
+
+    parser.add_argument(
+        '--frames',
+        type=int,
+        default=ANIMATION_SETTINGS['frames'],
+        help=f"Frames for --animate rerolls (default: {ANIMATION_SETTINGS['frames']})"
+    )
+
+    parser.add_argument(
+        '--montage',
+        type=int,
+        metavar='N',
+        help="Render N families into grid contact sheet(s) at -o instead of "
+             "one pedigree (with --load-seed, N re-rolls of that seed)"
+    )
+
+    parser.add_argument(
+        '--montage-scale',
+        type=float,
+        default=MONTAGE_SETTINGS['scale'],
+        help=f"Pedigree size on the sheet (default: {MONTAGE_SETTINGS['scale']})"
+    )
+
+    parser.add_argument(
+        '--montage-columns',
+        type=int,
+        default=MONTAGE_SETTINGS['columns'],
+        help=f"Families per sheet row (default: {MONTAGE_SETTINGS['columns']})"
+    )
+
+    parser.add_argument(
+        '--archive',
+        metavar='DIR',
+        help="Also append every generated family's genomes to the genome "
+             "archive in DIR (searchable with trait_index.py)"
+    )
+
+    parser.add_argument(
+        '--run-jobs',
+        metavar='JOBS_JSONL',
+        help="Run (or resume) a JSONL job file on --workers processes; "
+             "progress is journaled to JOBS_JSONL.journal"
+    )
+
+    parser.add_argument(
+        '--serve',
+        action='store_true',
+        help="Run the local HTTP render service instead of writing a file"
+    )
+
+    parser.add_argument(
+        '--host',
+        default=SERVICE_SETTINGS['host'],
+        help=f"Service bind address (default: {SERVICE_SETTINGS['host']})"
+    )
+
+    parser.add_argument(
+        '--port',
+        type=int,
+        default=SERVICE_SETTINGS['port'],
+        help=f"Service port (default: {SERVICE_SETTINGS['port']})"
+    )
+
+    parser.add_argument(
+        '--workers',
+        type=int,
+        default=SERVICE_SETTINGS['workers'],
+        help=f"Concurrent renders for --serve and --run-jobs "
+             f"(default: {SERVICE_SETTINGS['workers']})"
+    )
+
+    parser.add_argument(
+        '--max-queue',
+        type=int,
+        default=SERVICE_SETTINGS['max_queue'],
+        help="Renders allowed to wait for a worker before the service "
+             f"answers 503 (default: {SERVICE_SETTINGS['max_queue']})"
+    )
+
+    parser.add_argument(
+        '--profile',
+        metavar='TRACE_JSON',
+        help="Time every stage; write a Chrome trace (open in Perfetto) "
+             "and print a summary table"
+    )
+
+    parser.add_argument(
+        '--metrics-file',
+        metavar='PATH',
+        help="Write cumulative metrics (Prometheus text, or JSON if PATH ends "
+             "in .json); rewritten periodically while serving"
+    )
+
+    parser.add_argument(
+        '--memory-report',
+        action='store_true',
+        help="Track heap and RSS per stage and print the peak per phase"
+    )
+
+    parser.add_argument(
+        '--max-memory',
+        type=_memory_size,
+        metavar='SIZE',
+        help="Memory budget (e.g. 512M, 2G): switch to the tight layout "
+             "without render cache, or stop early, if the run would exceed it "
+             "(also checked per --montage page; not for --run-jobs/--serve)"
+    )
+
     parser.add_argument(
         '-v', '--verbose',
         action='store_true',
@@ -247,7 +591,15 @@ Examples:
     )
 
     args = parser.parse_args()
+    if args.max_memory is not None and (args.run_jobs or args.serve):
+        # Jobs and renders run in pool workers: no single RSS to budget
+        parser.error("--max-memory cannot be combined with --run-jobs or --serve")
     setup_logging(verbose=args.verbose, log_file=args.log)
+    GENERATION_PARAMS['layout_mode'] = args.layout
+    exporter = None
+    tracker = None
+    profiler = None
+    archive = None
 
     try:
         if args.list_seeds:
@@ -260,9 +612,56 @@ Examples:
                     print(f"  {format_seed_summary(seed)}")
             return 0
 
+        if args.show_seed is not None:
+            print(format_seed_details(get_seed(args.show_seed)))
+            return 0
+
+        if args.find_seeds:
+            matches = find_seeds(args.find_seeds)
+            for line in matches:
+                print(f"  {line}")
+            print(f"{len(matches)} matching seed(s) in {SEEDS_FILE}")
+            return 0
+
+        if args.validate_seeds:
+            problems = validate_seeds()
+            for problem in problems:
+                print(f"  {problem}")
+            if problems:
+                print(f"{len(problems)} problem(s) in {SEEDS_FILE}")
+                return 1
+            print(f"All {len(list_seeds())} seeds in {SEEDS_FILE} are valid")
+            return 0
+
+        if args.metrics_file:
+            exporter = metrics.MetricsExporter(
+                args.metrics_file, METRICS_SETTINGS['interval']
+            ).start()
+
+        if args.run_jobs:
+            from jobs import format_result, format_summary, run_jobs
+            summary = run_jobs(
+                args.run_jobs, args.workers,
+                on_result=lambda result: print(format_result(result), flush=True),
+            )
+            print(format_summary(summary))
+            return 1 if summary['failed'] else 0
+
+        if args.serve:
+            from service import serve
+            serve(args.host, args.port, args.workers, args.max_queue)
+            return 0
+
         logging.info("Cat Family Generator Started")
         logging.info(f"Output: {args.output}")
 
+        profiler = add_hook(Profiler()) if args.profile else None
+        if args.memory_report or args.max_memory is not None:
+            from memory import MemoryTracker
+            tracker = MemoryTracker(
+                budget=args.max_memory, trace_heap=args.memory_report,
+            ).start()
+
         gen0_snapshots = None
         if args.load_seed is not None:
             seed = get_seed(args.load_seed)
@@ -272,12 +671,61 @@ Examples:
                 f"({len(gen0_snapshots)} cats) from {SEEDS_FILE}"
             )
 
-        pedigree, family, new_seed_id = generate_cat_family(
-            gen0_snapshots=gen0_snapshots,
-            save_new_seed=not args.no_save_seed and gen0_snapshots is None,
-        )
+        if args.archive:
+            from genome_archive import GenomeArchive
+            archive = GenomeArchive(args.archive)
 
-        output_path = save_family_image(pedigree, args.output)
+        save_new_seed = not args.no_save_seed and gen0_snapshots is None
+        if args.montage:
+            pages = render_montage(
+                args.montage, args.output, gen0_snapshots, save_new_seed,
+                scale=args.montage_scale, columns=args.montage_columns,
+                archive=archive, max_memory=args.max_memory,
+            )
+        else:
+            pedigree, family, new_seed_id = generate_cat_family(
+                gen0_snapshots=gen0_snapshots,
+                save_new_seed=save_new_seed,
+            )
+            if archive is not None:
+                archive.queue_pedigree(pedigree)
+
+            if args.compare_layouts:
+                print(format_layout_report(compare_layouts(pedigree)))
+
+            from memory import budget_settings, plan_within_budget
+            plan = None
+            if args.max_memory is not None:
+                plan = plan_within_budget(pedigree, args.max_memory)
+
+            with budget_settings(plan):
+                if args.animate:
+                    output_path = save_family_animation(
+                        pedigree, family, args.output, args.animate, args.frames
+                    )
+                else:
+                    with stage('save_family_image'):
+                        output_path = save_family_image(pedigree, args.output)
+
+        if archive is not None:
+            archive.flush()
+            archive = None
+
+        if tracker is not None:
+            tracker.stop()
+            if args.memory_report:
+                print(tracker.format_report())
+
+        if profiler is not None:
+            _finish_profile(profiler, args.profile)
+            profiler = None
+
+        if args.montage:
+            print(f"\nSuccess! Packed {args.montage} families into "
+                  f"{len(pages)} contact sheet(s):")
+            for page in pages:
+                print(f"  {page}")
+            return 0
 
         print(f"\nSuccess! Generated family with {len(family.all_cats)} cats")
         print(f"Saved to: {output_path}")
@@ -288,6 +736,12 @@ Examples:
 
         return 0
 
+    except MemoryError as e:
+        # Includes memory.MemoryBudgetExceeded
+        logging.error(str(e))
+        print(f"\nError: {e}", file=sys.stderr)
+        return 1
+
     except KeyError as e:
         logging.error(str(e))
         print(f"\nError: {e}", file=sys.stderr)
@@ -303,6 +757,21 @@ Examples:
         print(f"\nError: {e}", file=sys.stderr)
         return 1
 
+    finally:
+        if archive is not None:
+            # The run failed: still keep the families generated so far
+            try:
+                archive.flush()
+            except Exception:
+                logging.exception("Could not write queued genomes")
+        if profiler is not None:
+            # The run failed: still unhook and keep the stages recorded so far
+            _finish_profile(profiler, args.profile, partial=True)
+        if tracker is not None:
+            tracker.stop()
+        if exporter is not None:
+            exporter.stop()
+
 
 if __name__ == "__main__":
     sys.exit(main())
@@ -0,0 +1,299 @@
+"""
+Memory instrumentation and peak-memory budgets.
+
+``MemoryTracker`` is a profiling hook that samples tracemalloc (Python heap,
+including NumPy arrays) and process RSS around every pipeline stage. Pillow
+allocates image buffers outside the Python allocator, so those only show up
+in RSS. Its report lists the peak per phase (load, compose, recolor, label,
+layout, encode) and the stage that set the overall peak.
+
+With a budget, the tracker raises ``MemoryBudgetExceeded`` as soon as RSS
+crosses it; ``trace_heap=False`` samples only RSS and leaves the slower
+tracemalloc off. Before rendering, ``plan_within_budget`` checks whether the
+pedigree fits and picks the lower-memory path (tight layout, no render
+cache) for ``budget_settings`` to apply, or fails early with a clear message.
+
+Stages nest (``render_cat`` inside ``create_pedigree_image``) and
+tracemalloc is process-wide, so reports are meant for single-threaded runs.
+"""
+
+import os
+import re
+import sys
+import logging
+import threading
+import tracemalloc
+from contextlib import contextmanager
+from dataclasses import dataclass
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple
+
+from config import GENERATION_PARAMS, RENDER_CACHE_SETTINGS
+from profiling import StageHook, add_hook, remove_hook
+
+logger = logging.getLogger(__name__)
+
+# Pipeline phase of each profiled stage
+STAGE_PHASES: Dict[str, str] = {
+    'load_all_parts': 'load',
+    'combine_parts': 'compose',
+    'apply_color_numpy': 'recolor',
+    'add_cat_label': 'label',
+    'create_pedigree_image': 'layout',
+    'save_png': 'encode',
+}
+PHASE_ORDER = ['load', 'compose', 'recolor', 'label', 'layout', 'encode']
+
+_SIZE_UNITS = {'': 1, 'K': 1024, 'M': 1024 ** 2, 'G': 1024 ** 3}
+
+
+class MemoryBudgetExceeded(MemoryError):
+    """Raised when a run exceeds (or would exceed) its memory budget."""
+
+
+def parse_size(text: str) -> int:
+    """Parse '512M', '2G', '300000K' or plain bytes into bytes."""
+    match = re.fullmatch(r'\s*(\d+(?:\.\d+)?)\s*([KMG]?)i?B?\s*', text.upper())
+    if not match:
+        raise ValueError(f"Invalid memory size: {text!r} (use e.g. 512M or 2G)")
+    return int(float(match.group(1)) * _SIZE_UNITS[match.group(2)])
+
+
+def format_size(num_bytes: float) -> str:
+    return f"{num_bytes / 1024 ** 2:.1f} MB"
+
+
+def current_rss() -> Optional[int]:
+    """Resident set size of this process in bytes (None if unavailable)."""
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError, AttributeError):
+        pass
+    return peak_rss()
+
+
+def peak_rss() -> Optional[int]:
+    """
+    RSS high-water mark of this process in bytes (None if unavailable):
+    since start, or since the last ``reset_peak_rss``.
+    """
+    try:
+        import resource
+    except ImportError:
+        return None
+    # ru_maxrss is in KB on Linux and bytes on macOS
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak if sys.platform == 'darwin' else peak * 1024
+
+
+def reset_peak_rss() -> bool:
+    """Restart the RSS high-water mark at the current RSS (Linux only)."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+@dataclass
+class _Frame:
+    name: str
+    depth: int
+    start_traced: int
+    peak_traced: int = 0
+
+
+@dataclass
+class StageMemory:
+    """Aggregated memory observations of one stage name."""
+    calls: int = 0
+    peak_traced: int = 0      # highest tracemalloc peak while the stage ran
+    max_growth: int = 0       # largest traced growth over one call
+    peak_rss: int = 0         # highest RSS sampled at the stage's end
+    depth: int = 0            # nesting depth (deeper = more specific)
+
+
+class MemoryTracker(StageHook):
+    """Profiling hook sampling tracemalloc and RSS per stage."""
+
+    def __init__(self, budget: Optional[int] = None, trace_heap: bool = True):
+        """
+        Args:
+            budget: RSS limit in bytes (None = no limit)
+            trace_heap: Also trace the Python heap with tracemalloc (needed
+                for reports; RSS-only budget checks are much cheaper)
+        """
+        self.budget = budget
+        self.trace_heap = trace_heap
+        self.stages: Dict[str, StageMemory] = {}
+        self._stack: List[_Frame] = []
+        self._lock = threading.Lock()
+        self._started_tracing = False
+
+    def start(self) -> 'MemoryTracker':
+        """Start tracemalloc (if needed) and listen to all stages."""
+        if self.trace_heap:
+            if not tracemalloc.is_tracing():
+                tracemalloc.start()
+                self._started_tracing = True
+            tracemalloc.reset_peak()
+        return add_hook(self)
+
+    def stop(self) -> None:
+        remove_hook(self)
+        if self._started_tracing:
+            tracemalloc.stop()
+            self._started_tracing = False
+
+    def __enter__(self) -> 'MemoryTracker':
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
+
+    def _fold_peak(self) -> int:
+        """Fold the peak since the last reset into all open stages."""
+        if not self.trace_heap:
+            return 0
+        current, peak = tracemalloc.get_traced_memory()
+        for frame in self._stack:
+            frame.peak_traced = max(frame.peak_traced, peak)
+        tracemalloc.reset_peak()
+        return current
+
+    def _check_budget(self, name: str) -> Optional[int]:
+        rss = current_rss()
+        if self.budget is not None and rss is not None and rss > self.budget:
+            raise MemoryBudgetExceeded(
+                f"Memory budget {format_size(self.budget)} exceeded during "
+                f"'{name}' (RSS {format_size(rss)})"
+            )
+        return rss
+
+    def stage_started(self, name: str, args: Dict[str, Any]) -> None:
+        with self._lock:
+            current = self._fold_peak()
+            self._stack.append(_Frame(name, len(self._stack), current, current))
+        self._check_budget(name)
+
+    def stage_finished(self, name: str, args: Dict[str, Any],
+                       start_ns: int, duration_ns: int) -> None:
+        with self._lock:
+            current = self._fold_peak()
+            frame = self._stack.pop() if self._stack else _Frame(name, 0, current)
+            stats = self.stages.setdefault(name, StageMemory(depth=frame.depth))
+            stats.calls += 1
+            stats.peak_traced = max(stats.peak_traced, frame.peak_traced)
+            stats.max_growth = max(
+                stats.max_growth, frame.peak_traced - frame.start_traced
+            )
+        rss = self._check_budget(name)
+        if rss is not None:
+            stats.peak_rss = max(stats.peak_rss, rss)
+
+    def culprit(self) -> Optional[str]:
+        """Most specific (deepest) stage that reached the overall traced peak."""
+        if not self.stages:
+            return None
+        top = max(s.peak_traced for s in self.stages.values())
+        candidates = [
+            (s.depth, name) for name, s in self.stages.items() if s.peak_traced == top
+        ]
+        return max(candidates)[1]
+
+    def phase_report(self) -> Dict[str, Dict[str, int]]:
+        """Peak traced memory, growth and RSS per pipeline phase."""
+        report: Dict[str, Dict[str, int]] = {}
+        for name, stats in self.stages.items():
+            phase = STAGE_PHASES.get(name)
+            if phase is None:
+                continue
+            row = report.setdefault(
+                phase, {'peak_traced': 0, 'max_growth': 0, 'peak_rss': 0}
+            )
+            row['peak_traced'] = max(row['peak_traced'], stats.peak_traced)
+            row['max_growth'] = max(row['max_growth'], stats.max_growth)
+            row['peak_rss'] = max(row['peak_rss'], stats.peak_rss)
+        return {phase: report[phase] for phase in PHASE_ORDER if phase in report}
+
+    def format_report(self) -> str:
+        lines = [f"{'phase':<10}{'peak heap':>12}{'max growth':>13}{'peak RSS':>12}"]
+        for phase, row in self.phase_report().items():
+            lines.append(
+                f"{phase:<10}{format_size(row['peak_traced']):>12}"
+                f"{format_size(row['max_growth']):>13}"
+                f"{format_size(row['peak_rss']):>12}"
+            )
+        culprit = self.culprit()
+        if culprit:
+            phase = STAGE_PHASES.get(culprit, culprit)
+            lines.append(
+                f"peak set by '{culprit}' ({phase}): "
+                f"{format_size(self.stages[culprit].peak_traced)} heap"
+            )
+        return "\n".join(lines)
+
+
+def estimate_render_bytes(layout_size: Tuple[int, int],
+                          cat_sizes: Sequence[Tuple[int, int]]) -> int:
+    """
+    Rough peak of pedigree rendering: the RGB canvas plus one cat in flight
+    (template, recolored body and composed image, plus NumPy temporaries).
+    """
+    width, height = layout_size
+    largest_cat = max(w * h for w, h in cat_sizes)
+    return width * height * 3 + largest_cat * 3 * 6
+
+
+def plan_within_budget(pedigree: Dict[str, Any], budget: int) -> Dict[str, Any]:
+    """
+    Choose a rendering path for a pedigree that fits ``budget`` bytes.
+
+    Returns ``{'layout_mode': ..., 'render_cache': ...}``: the configured
+    layout with the cache on if it fits, else the lower-memory path (tight
+    layout, render cache off). Raises MemoryBudgetExceeded before rendering
+    if even that does not fit. Nothing global is changed; apply the plan
+    with ``budget_settings``.
+    """
+    from image_processing import FamilyLayoutBuilder
+
+    entries = FamilyLayoutBuilder.flatten_pedigree(pedigree)
+    baseline = current_rss() or 0
+    mode = GENERATION_PARAMS.get('layout_mode', 'grid')
+    for candidate in dict.fromkeys([mode, 'tight']):
+        sizes = [FamilyLayoutBuilder.entry_size(e, candidate) for e in entries]
+        layout = FamilyLayoutBuilder.plan_layout(sizes, candidate)
+        needed = baseline + estimate_render_bytes((layout.width, layout.height), sizes)
+        if needed <= budget:
+            if candidate != mode:
+                logger.warning(
+                    f"Layout '{mode}' would exceed the memory budget; "
+                    f"using the low-memory path (tight layout, no render cache)"
+                )
+            return {
+                'layout_mode': candidate,
+                'render_cache': (candidate == mode
+                                 and RENDER_CACHE_SETTINGS.get('enabled', True)),
+            }
+    raise MemoryBudgetExceeded(
+        f"Pedigree needs about {format_size(needed)} "
+        f"(canvas {layout.width}x{layout.height}) but the memory budget is "
+        f"{format_size(budget)}"
+    )
+
+
+@contextmanager
+def budget_settings(plan: Optional[Dict[str, Any]]) -> Iterator[None]:
+    """Apply a ``plan_within_budget`` plan (None: no change) while inside."""
+    if plan is None:
+        yield
+        return
+    saved = GENERATION_PARAMS.get('layout_mode'), RENDER_CACHE_SETTINGS.get('enabled')
+    GENERATION_PARAMS['layout_mode'] = plan['layout_mode']
+    RENDER_CACHE_SETTINGS['enabled'] = plan['render_cache']
+    try:
+        yield
+    finally:
+        GENERATION_PARAMS['layout_mode'], RENDER_CACHE_SETTINGS['enabled'] = saved
@@ -0,0 +1,288 @@
+"""
+Cumulative metrics for batch and long-running use.
+
+Counters, gauges and histograms live in a ``MetricsRegistry``. Recording is
+lock-free: every thread writes into its own shard (a plain dict), and shards
+are only merged when a snapshot is taken. ``MetricsExporter`` rewrites a
+Prometheus text file or JSON snapshot periodically (atomic replace), and
+``StageMetrics`` feeds per-stage latencies from the profiling hooks.
+
+Metrics reported by the pipeline:
+  families_total, cats_rendered_total, bytes_written_total,
+  mutations_total, spillovers_total,
+  render_cache_hits_total / render_cache_misses_total {layer},
+  seed_store_seeds, seed_store_bytes (gauges),
+  stage_seconds {stage} (histogram, when StageMetrics is installed).
+"""
+
+import os
+import json
+import time
+import bisect
+import threading
+from typing import Any, Dict, List, Optional, Tuple
+
+from profiling import StageHook, add_hook, remove_hook
+
+LabelKey = Tuple[Tuple[str, str], ...]
+MetricKey = Tuple[str, LabelKey]
+
+# Histogram bucket upper bounds in seconds (1 ms .. 60 s, roughly x2 steps)
+DEFAULT_BUCKETS: Tuple[float, ...] = (
+    0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+    1.0, 2.5, 5.0, 10.0, 30.0, 60.0,
+)
+
+
+def _key(name: str, labels: Dict[str, Any]) -> MetricKey:
+    return name, tuple(sorted((k, str(v)) for k, v in labels.items()))
+
+
+class _Shard:
+    """One thread's private metric values."""
+
+    __slots__ = ('counters', 'histograms')
+
+    def __init__(self):
+        self.counters: Dict[MetricKey, float] = {}
+        # key -> [bucket counts..., +Inf count, sum]
+        self.histograms: Dict[MetricKey, List[float]] = {}
+
+
+class MetricsRegistry:
+    """Thread-sharded counters and histograms plus shared gauges."""
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        self.buckets = buckets
+        self.started = time.time()
+        self._local = threading.local()
+        self._shards: List[_Shard] = []
+        self._shards_lock = threading.Lock()
+        self._gauges: Dict[MetricKey, float] = {}
+
+    def _shard(self) -> _Shard:
+        shard = getattr(self._local, 'shard', None)
+        if shard is None:
+            shard = _Shard()
+            with self._shards_lock:
+                self._shards.append(shard)
+            self._local.shard = shard
+        return shard
+
+    def inc(self, name: str, value: float = 1, **labels: Any) -> None:
+        """Add to a monotonically increasing counter."""
+        counters = self._shard().counters
+        key = _key(name, labels)
+        counters[key] = counters.get(key, 0) + value
+
+    def observe(self, name: str, value: float, **labels: Any) -> None:
+        """Record one histogram sample (seconds for latencies)."""
+        histograms = self._shard().histograms
+        key = _key(name, labels)
+        row = histograms.get(key)
+        if row is None:
+            row = histograms[key] = [0.0] * (len(self.buckets) + 2)
+        row[bisect.bisect_left(self.buckets, value)] += 1
+        row[-1] += value
+
+    def set_gauge(self, name: str, value: float, **labels: Any) -> None:
+        """Set a point-in-time value (last write wins)."""
+        self._gauges[_key(name, labels)] = value
+
+    def reset(self) -> None:
+        """Forget every recorded value (mainly for tests)."""
+        with self._shards_lock:
+            for shard in self._shards:
+                shard.counters.clear()
+                shard.histograms.clear()
+        self._gauges.clear()
+        self.started = time.time()
+
+    def snapshot(self) -> Dict[str, Any]:
+        """Merge all shards into one consistent-enough view."""
+        counters: Dict[MetricKey, float] = {}
+        histograms: Dict[MetricKey, List[float]] = {}
+        with self._shards_lock:
+            shards = list(self._shards)
+        for shard in shards:
+            for key, value in list(shard.counters.items()):
+                counters[key] = counters.get(key, 0) + value
+            for key, row in list(shard.histograms.items()):
+                merged = histograms.setdefault(key, [0.0] * len(row))
+                for i, value in enumerate(row):
+                    merged[i] += value
+        return {
+            'uptime_seconds': time.time() - self.started,
+            'counters': counters,
+            'gauges': dict(self._gauges),
+            'histograms': histograms,
+        }
+
+    def percentile(self, row: List[float], q: float) -> float:
+        """Estimate a quantile (0..1) from a histogram row (bucket upper bound)."""
+        counts = row[:-1]
+        total = sum(counts)
+        if total == 0:
+            return 0.0
+        rank = q * total
+        seen = 0.0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            seen += count
+            if seen >= rank:
+                return bound
+        return float('inf')
+
+    def to_json(self) -> Dict[str, Any]:
+        """Snapshot as JSON-friendly data, with rates and percentiles."""
+        snap = self.snapshot()
+        uptime = max(snap['uptime_seconds'], 1e-9)
+
+        def name_of(key: MetricKey) -> str:
+            name, labels = key
+            if not labels:
+                return name
+            return name + '{' + ','.join(f'{k}={v}' for k, v in labels) + '}'
+
+        counters = {name_of(k): v for k, v in sorted(snap['counters'].items())}
+        histograms = {}
+        for key, row in sorted(snap['histograms'].items()):
+            count = sum(row[:-1])
+            histograms[name_of(key)] = {
+                'count': count,
+                'sum': row[-1],
+                'mean': row[-1] / count if count else 0.0,
+                'p50': self.percentile(row, 0.50),
+                'p90': self.percentile(row, 0.90),
+                'p99': self.percentile(row, 0.99),
+            }
+        return {
+            'uptime_seconds': snap['uptime_seconds'],
+            'families_per_second': counters.get('families_total', 0) / uptime,
+            'counters': counters,
+            'gauges': {name_of(k): v for k, v in sorted(snap['gauges'].items())},
+            'histograms': histograms,
+        }
+
+    def to_prometheus(self, prefix: str = 'catgen_') -> str:
+        """Snapshot in the Prometheus text exposition format."""
+        snap = self.snapshot()
+
+        def labels_text(labels: LabelKey, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            items = list(labels) + list(extra)
+            if not items:
+                return ''
+            return '{' + ','.join(f'{k}="{v}"' for k, v in items) + '}'
+
+        lines = [
+            f"# TYPE {prefix}uptime_seconds gauge",
+            f"{prefix}uptime_seconds {snap['uptime_seconds']:.3f}",
+        ]
+        typed = set()
+        for (name, labels), value in sorted(snap['counters'].items()):
+            if name not in typed:
+                lines.append(f"# TYPE {prefix}{name} counter")
+                typed.add(name)
+            lines.append(f"{prefix}{name}{labels_text(labels)} {value:g}")
+        for (name, labels), value in sorted(snap['gauges'].items()):
+            if name not in typed:
+                lines.append(f"# TYPE {prefix}{name} gauge")
+                typed.add(name)
+            lines.append(f"{prefix}{name}{labels_text(labels)} {value:g}")
+        for (name, labels), row in sorted(snap['histograms'].items()):
+            if name not in typed:
+                lines.append(f"# TYPE {prefix}{name} histogram")
+                typed.add(name)
+            cumulative = 0.0
+            for bound, count in zip(self.buckets + (float('inf'),), row[:-1]):
+                cumulative += count
+                le = '+Inf' if bound == float('inf') else f'{bound:g}'
+                lines.append(
+                    f"{prefix}{name}_bucket{labels_text(labels, (('le', le),))} "
+                    f"{cumulative:g}"
+                )
+            lines.append(f"{prefix}{name}_sum{labels_text(labels)} {row[-1]:.6f}")
+            lines.append(f"{prefix}{name}_count{labels_text(labels)} {cumulative:g}")
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str) -> str:
+        """Atomically write a snapshot; '.json' paths get JSON, else Prometheus."""
+        if path.endswith('.json'):
+            text = json.dumps(self.to_json(), indent=2)
+        else:
+            text = self.to_prometheus()
+        tmp_path = f"{path}.tmp{os.getpid()}"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+        return path
+
+
+REGISTRY = MetricsRegistry()
+
+
+def inc(name: str, value: float = 1, **labels: Any) -> None:
+    """Increment a counter in the default registry."""
+    REGISTRY.inc(name, value, **labels)
+
+
+def observe(name: str, value: float, **labels: Any) -> None:
+    """Record a histogram sample in the default registry."""
+    REGISTRY.observe(name, value, **labels)
+
+
+def set_gauge(name: str, value: float, **labels: Any) -> None:
+    """Set a gauge in the default registry."""
+    REGISTRY.set_gauge(name, value, **labels)
+
+
+class StageMetrics(StageHook):
+    """Profiling hook that records stage latencies as histograms."""
+
+    def __init__(self, registry: MetricsRegistry = None):
+        self.registry = registry or REGISTRY
+
+    def stage_finished(self, name: str, args: Dict[str, Any],
+                       start_ns: int, duration_ns: int) -> None:
+        self.registry.observe('stage_seconds', duration_ns / 1e9, stage=name)
+
+
+class MetricsExporter:
+    """Background thread that rewrites a metrics file every ``interval`` s."""
+
+    def __init__(self, path: str, interval: float = 10.0,
+                 registry: MetricsRegistry = None, stage_latencies: bool = True):
+        self.path = path
+        self.interval = interval
+        self.registry = registry or REGISTRY
+        self._hook: Optional[StageMetrics] = (
+            StageMetrics(self.registry) if stage_latencies else None
+        )
+        self._stop = threading.Event()
+        self._thread = threading.Thread(
+            target=self._loop, name='metrics-exporter', daemon=True
+        )
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            self.registry.write(self.path)
+
+    def start(self) -> 'MetricsExporter':
+        if self._hook is not None:
+            add_hook(self._hook)
+        self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        """Stop the thread and write a final snapshot."""
+        self._stop.set()
+        if self._thread.is_alive():
+            self._thread.join()
+        if self._hook is not None:
+            remove_hook(self._hook)
+        self.registry.write(self.path)
+
+    def __enter__(self) -> 'MetricsExporter':
+        return self.start()
+
+    def __exit__(self, *exc_info: Any) -> None:
+        self.stop()
@@ -0,0 +1,242 @@
+"""
+Contact sheets of many pedigrees.
+
+``MontageWriter`` renders families straight into a grid sheet at a chosen
+scale: each pedigree's layout is planned from cat sizes, scaled, and its
+connectors are drawn directly on the sheet; cats are rendered through a
+template-only render cache and downscaled into their slot. Full-size pedigree canvases are never
+built, written or decoded again.
+
+Memory stays bounded however many families are added: one sheet buffer is
+reused for every page, at most one page of pedigrees (cats, not pixels) is
+buffered, and part templates and scaled cats are kept in byte-bounded LRUs
+so cats repeated across families (e.g. replays of one seed) are only scaled
+once. Full-size bodies and labels are never cached.
+
+    python main.py --montage 24 --montage-scale 0.2 -o review.png
+"""
+
+import os
+import logging
+from typing import Any, Dict, Hashable, List, Optional, Tuple
+
+from PIL import Image, ImageDraw
+
+import metrics
+from config import GENERATION_PARAMS, MONTAGE_SETTINGS, RENDER_CACHE_SETTINGS, RGB
+from image_processing import FamilyLayoutBuilder, PedigreeLayout
+from profiling import stage
+from render_cache import (
+    LABEL_CONFIG_KEYS, RenderCache, _LRU, config_fingerprint, parts_key,
+)
+
+logger = logging.getLogger(__name__)
+
+
+def scale_layout(layout: PedigreeLayout, scale: float,
+                 origin: Tuple[int, int] = (0, 0)) -> PedigreeLayout:
+    """A pedigree layout scaled by ``scale`` and moved to ``origin``."""
+    ox, oy = origin
+    boxes = [
+        (ox + round(x * scale), oy + round(y * scale),
+         max(1, round(w * scale)), max(1, round(h * scale)))
+        for x, y, w, h in layout.boxes
+    ]
+    return PedigreeLayout(
+        max(1, round(layout.width * scale)), max(1, round(layout.height * scale)),
+        boxes, [ox + round(x * scale) for x in layout.stem_xs],
+    )
+
+
+def page_path(output_path: str, page: int) -> str:
+    """'montage.png' for page 1, then 'montage_2.png', 'montage_3.png', ..."""
+    if page == 1:
+        return output_path
+    root, ext = os.path.splitext(output_path)
+    return f"{root}_{page}{ext}"
+
+
+class MontageWriter:
+    """Packs pedigrees into paged grid contact sheets."""
+
+    def __init__(self, output_path: str,
+                 scale: float = MONTAGE_SETTINGS['scale'],
+                 columns: int = MONTAGE_SETTINGS['columns'],
+                 rows: int = MONTAGE_SETTINGS['rows'],
+                 gutter: int = MONTAGE_SETTINGS['gutter'],
+                 background_color: RGB = None,
+                 max_scaled_bytes: int = MONTAGE_SETTINGS['max_scaled_bytes'],
+                 cache: Optional[RenderCache] = None,
+                 budget: Optional[int] = None):
+        """
+        Args:
+            output_path: First page; later pages get a _2, _3 ... suffix
+            scale: Size of each pedigree relative to the full-size image
+            columns, rows: Families per sheet row / rows per page
+            gutter: Pixels between and around families
+            max_scaled_bytes: Pixel bytes kept in the scaled-cat LRU
+            cache: Render cache for full-size cats (default: templates only,
+                none if the render cache is disabled)
+            budget: RSS limit in bytes; a page that would not fit raises
+                MemoryBudgetExceeded before its sheet is allocated
+        """
+        if not 0 < scale <= 1:
+            raise ValueError(f"Montage scale must be in (0, 1], got {scale}")
+        self.output_path = output_path
+        self.scale = scale
+        self.columns = columns
+        self.rows = rows
+        self.gutter = gutter
+        self.background_color = (
+            background_color or GENERATION_PARAMS['background_color']
+        )
+        self.scaled_cats = _LRU(max_scaled_bytes, 'montage')
+        if cache is None and RENDER_CACHE_SETTINGS.get('enabled', True):
+            cache = RenderCache({
+                'max_template_bytes': RENDER_CACHE_SETTINGS.get('max_template_bytes', 0),
+            })
+        self.cache = cache
+        self.budget = budget
+        self.pages: List[str] = []
+        self._pending: List[Dict[str, Any]] = []
+        self._sheet: Optional[Image.Image] = None
+
+    @property
+    def per_page(self) -> int:
+        return self.columns * self.rows
+
+    def add(self, pedigree: Dict[str, Any]) -> None:
+        """Queue a pedigree; a full page is rendered and written at once."""
+        self._pending.append(pedigree)
+        if len(self._pending) >= self.per_page:
+            self.flush()
+
+    def close(self) -> List[str]:
+        """Write the last (partial) page; return all page paths."""
+        if self._pending:
+            self.flush()
+        self._sheet = None
+        return self.pages
+
+    def __enter__(self) -> 'MontageWriter':
+        return self
+
+    def __exit__(self, exc_type: Any, *exc: Any) -> None:
+        if exc_type is None:
+            self.close()
+
+    def _scaled_key(self, entry: Any) -> Optional[Hashable]:
+        if isinstance(entry, Image.Image):
+            return None
+        key = parts_key(entry.parts)
+        if key is None:
+            return None
+        return (
+            key,
+            tuple(sorted(entry.color_map.items())),
+            entry._label_title(),
+            tuple(entry._color_strengths()),
+            entry._text_padding(),
+            config_fingerprint(LABEL_CONFIG_KEYS),
+            self.scale,
+        )
+
+    def _scaled_entry(self, entry: Any, size: Tuple[int, int]) -> Image.Image:
+        """A cat rendered (through ``self.cache``) and scaled to ``size``."""
+        key = self._scaled_key(entry)
+        if key is not None:
+            cached = self.scaled_cats.get(key)
+            if cached is not None and cached.size == size:
+                return cached
+        img = FamilyLayoutBuilder.render_entry(entry, self.cache)
+        scaled = img.resize(size, Image.LANCZOS, reducing_gap=3.0)
+        del img
+        if key is not None:
+            self.scaled_cats.put(key, scaled)
+        return scaled
+
+    def _draw_family(self, sheet: Image.Image, draw: ImageDraw.ImageDraw,
+                     entries: List[Any], layout: PedigreeLayout,
+                     origin: Tuple[int, int]) -> None:
+        scaled = scale_layout(layout, self.scale, origin)
+        line_width = max(
+            1, round(GENERATION_PARAMS.get('connector_width', 2) * self.scale)
+        )
+        FamilyLayoutBuilder.draw_connectors(draw, scaled, line_width)
+        for entry, (x, y, w, h) in zip(entries, scaled.boxes):
+            sheet.paste(self._scaled_entry(entry, (w, h)), (x, y))
+
+    def _check_budget(self, families: List[Tuple[List[Any], PedigreeLayout]],
+                      new_sheet: Tuple[int, int]) -> None:
+        """Fail before rendering a page that would not fit ``self.budget``."""
+        from memory import (
+            MemoryBudgetExceeded, current_rss, estimate_render_bytes, format_size,
+        )
+
+        sizes = [(w, h) for _entries, layout in families for _x, _y, w, h in layout.boxes]
+        needed = (current_rss() or 0) + estimate_render_bytes(new_sheet, sizes)
+        if needed > self.budget:
+            raise MemoryBudgetExceeded(
+                f"Montage page {len(self.pages) + 1} needs about "
+                f"{format_size(needed)} but the memory budget is "
+                f"{format_size(self.budget)}"
+            )
+
+    def flush(self) -> Optional[str]:
+        """Render the queued pedigrees as one page and write it."""
+        if not self._pending:
+            return None
+        families = []
+        for pedigree in self._pending:
+            entries = FamilyLayoutBuilder.flatten_pedigree(pedigree)
+            layout = FamilyLayoutBuilder.plan_layout(
+                [FamilyLayoutBuilder.entry_size(entry) for entry in entries]
+            )
+            families.append((entries, layout))
+        self._pending = []
+
+        cell_w = max(round(layout.width * self.scale) for _, layout in families)
+        cell_h = max(round(layout.height * self.scale) for _, layout in families)
+        columns = min(self.columns, len(families))
+        rows = (len(families) + columns - 1) // columns
+        width = columns * (cell_w + self.gutter) + self.gutter
+        height = rows * (cell_h + self.gutter) + self.gutter
+
+        # One buffer for every page: grow it only when a page needs more room
+        grow = (self._sheet is None or self._sheet.width < width
+                or self._sheet.height < height)
+        if self.budget is not None:
+            self._check_budget(families, (width, height) if grow else (0, 0))
+        if grow:
+            self._sheet = Image.new(
+                'RGB',
+                (max(width, self._sheet.width if self._sheet else 0),
+                 max(height, self._sheet.height if self._sheet else 0)),
+                self.background_color,
+            )
+        else:
+            self._sheet.paste(self.background_color, (0, 0, width, height))
+        sheet = self._sheet
+        draw = ImageDraw.Draw(sheet)
+
+        page = len(self.pages) + 1
+        with stage('render_montage_page', page=page, families=len(families)):
+            for i, (entries, layout) in enumerate(families):
+                col, row = i % columns, i // columns
+                cell_x = self.gutter + col * (cell_w + self.gutter)
+                cell_y = self.gutter + row * (cell_h + self.gutter)
+                origin = (
+                    cell_x + (cell_w - round(layout.width * self.scale)) // 2,
+                    cell_y + (cell_h - round(layout.height * self.scale)) // 2,
+                )
+                self._draw_family(sheet, draw, entries, layout, origin)
+        del families
+
+        path = page_path(self.output_path, page)
+        out = sheet if sheet.size == (width, height) else sheet.crop((0, 0, width, height))
+        out.save(path)
+        del out
+        self.pages.append(path)
+        metrics.inc('montage_pages_total')
+        logger.info(f"Montage page {page}: {width}x{height} -> {path}")
+        return path
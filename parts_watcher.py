@@ -0,0 +1,181 @@
+"""
+Hot reload of the parts library for long-running processes.
+
+``PartsWatcher`` polls the part folders' file mtimes and sizes (no extra
+dependencies) and applies new, changed and removed PNGs incrementally:
+
+  * only changed files are decoded;
+  * the part index is rebuilt copy-on-write and swapped in with a single
+    attribute assignment, so in-flight renders keep the dict and images
+    they already hold and nothing is paused;
+  * only the render-cache templates/bodies built from changed parts are
+    invalidated. Cache keys carry each file's (mtime_ns, size), so a render
+    that started before the swap cannot put an old-part result where a
+    new render would find it.
+
+Readers always go through ``watcher.parts_images`` for the current index.
+"""
+
+import os
+import logging
+import threading
+from typing import Dict, List, Optional, Sequence, Tuple
+
+from PIL import Image
+
+from config import CAT_PARTS_FOLDERS
+from image_processing import CatImageBuilder, ImageLoader
+from render_cache import RenderCache, get_default_cache
+
+logger = logging.getLogger(__name__)
+
+FileStamp = Tuple[int, int, str]  # (mtime_ns, size, file name)
+PartsIndex = Dict[str, Dict[str, Image.Image]]
+
+
+class PartsWatcher:
+    """Polls parts/ folders and atomically swaps in an updated part index."""
+
+    def __init__(self, base_path: str = ".", interval: float = 2.0,
+                 caches: Optional[Sequence[RenderCache]] = None,
+                 parts_images: Optional[PartsIndex] = None):
+        """
+        Args:
+            base_path: Directory containing the parts/ folders
+            interval: Seconds between polls when running in the background
+            caches: Render caches to invalidate (default: the process cache)
+            parts_images: Already loaded index to start from (loaded if None)
+        """
+        self.loader = ImageLoader(base_path)
+        self.interval = interval
+        if caches is None:
+            default = get_default_cache()
+            caches = [default] if default is not None else []
+        self.caches = list(caches)
+        self.parts_images: PartsIndex = (
+            parts_images if parts_images is not None else self.loader.load_all_parts()
+        )
+        self._stamps = self._scan()
+        self._poll_lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+
+    def _folder(self, part_name: str) -> str:
+        return os.path.join(self.loader.base_path, CAT_PARTS_FOLDERS[part_name])
+
+    def _scan(self) -> Dict[str, Dict[str, FileStamp]]:
+        """
+        Current (mtime_ns, size, name) of every PNG, per locus and file id.
+
+        The extension matches in any case ('3.PNG'), so the real name is
+        kept for loading on case-sensitive filesystems.
+        """
+        stamps: Dict[str, Dict[str, FileStamp]] = {}
+        for part_name in CAT_PARTS_FOLDERS:
+            by_id: Dict[str, FileStamp] = {}
+            try:
+                entries = list(os.scandir(self._folder(part_name)))
+            except OSError as e:
+                logger.warning(f"Cannot scan parts folder for {part_name}: {e}")
+                entries = []
+            for entry in entries:
+                if entry.is_file() and entry.name.lower().endswith('.png'):
+                    stat = entry.stat()
+                    file_id = os.path.splitext(entry.name)[0]
+                    by_id[file_id] = (stat.st_mtime_ns, stat.st_size, entry.name)
+            stamps[part_name] = by_id
+        return stamps
+
+    def poll(self) -> Dict[str, List[str]]:
+        """
+        Apply any file changes since the last poll.
+
+        Returns:
+            {'added': [...], 'changed': [...], 'removed': [...]} part refs
+        """
+        with self._poll_lock:
+            current = self._scan()
+            changes: Dict[str, List[str]] = {'added': [], 'changed': [], 'removed': []}
+            new_index: PartsIndex = dict(self.parts_images)
+            new_stamps = dict(self._stamps)
+
+            for part_name, files in current.items():
+                old_files = self._stamps.get(part_name, {})
+                accepted = dict(files)
+                images = None  # copied lazily when this locus changes
+
+                for file_id, stamp in files.items():
+                    if old_files.get(file_id) == stamp:
+                        continue
+                    try:
+                        img = self.loader.load_part(part_name, file_id, stamp[2])
+                    except (IOError, ValueError) as e:
+                        # Likely still being written: retry on the next poll
+                        logger.debug(f"Skipping {part_name}/{stamp[2]}: {e}")
+                        if file_id in old_files:
+                            accepted[file_id] = old_files[file_id]
+                        else:
+                            del accepted[file_id]
+                        continue
+                    if images is None:
+                        images = dict(new_index.get(part_name, {}))
+                    kind = 'changed' if file_id in images else 'added'
+                    images[file_id] = img
+                    changes[kind].append(CatImageBuilder.part_ref(part_name, file_id))
+
+                removed = [fid for fid in old_files if fid not in files]
+                if removed:
+                    if images is None:
+                        images = dict(new_index.get(part_name, {}))
+                    if len(images) - len(removed) < 1:
+                        logger.warning(
+                            f"Not removing the last {part_name} parts; "
+                            f"a locus needs at least one variant"
+                        )
+                        accepted.update({fid: old_files[fid] for fid in removed})
+                        removed = []
+                    for file_id in removed:
+                        images.pop(file_id, None)
+                        changes['removed'].append(
+                            CatImageBuilder.part_ref(part_name, file_id)
+                        )
+
+                if images is not None:
+                    new_index[part_name] = images
+                new_stamps[part_name] = accepted
+
+            self._stamps = new_stamps
+            if any(changes.values()):
+                # Single reference swap: readers see the old or the new index
+                self.parts_images = new_index
+                stale = changes['changed'] + changes['removed']
+                for cache in self.caches:
+                    cache.invalidate_parts(stale)
+                logger.info(
+                    f"Parts reloaded: {len(changes['added'])} added, "
+                    f"{len(changes['changed'])} changed, "
+                    f"{len(changes['removed'])} removed"
+                )
+            return changes
+
+    def _loop(self) -> None:
+        while not self._stop.wait(self.interval):
+            try:
+                self.poll()
+            except Exception:
+                logger.exception("Parts poll failed")
+
+    def start(self) -> 'PartsWatcher':
+        """Poll in a daemon thread every ``interval`` seconds."""
+        if self._thread is None:
+            self._thread = threading.Thread(
+                target=self._loop, name='parts-watcher', daemon=True
+            )
+            self._thread.start()
+        return self
+
+    def stop(self) -> None:
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
@@ -0,0 +1,194 @@
+"""
+Per-stage profiling hooks.
+
+Pipeline stages (part loading, composition, recoloring, labels, layout,
+encoding) are wrapped with ``stage(...)`` or ``@profiled(...)``. Registered
+``StageHook`` objects are told when each stage starts and finishes. With no
+hooks registered, both wrappers cost one tuple check, so they stay in
+production code.
+
+``Profiler`` is the built-in hook: it records every stage per thread and
+writes Chrome trace-event JSON (open in https://ui.perfetto.dev or
+chrome://tracing) plus a per-stage summary table.
+"""
+
+import os
+import json
+import time
+import functools
+import threading
+from typing import Any, Callable, Dict, List, Tuple, TypeVar
+
+F = TypeVar('F', bound=Callable[..., Any])
+
+
+class StageHook:
+    """Receives stage start/finish events. Override what you need."""
+
+    def stage_started(self, name: str, args: Dict[str, Any]) -> None:
+        pass
+
+    def stage_finished(self, name: str, args: Dict[str, Any],
+                       start_ns: int, duration_ns: int) -> None:
+        pass
+
+
+_hooks: Tuple[StageHook, ...] = ()
+_hooks_lock = threading.Lock()
+
+
+def add_hook(hook: StageHook) -> StageHook:
+    """Register a hook for all stages (returns it for convenience)."""
+    global _hooks
+    with _hooks_lock:
+        if hook not in _hooks:
+            _hooks = _hooks + (hook,)
+    return hook
+
+
+def remove_hook(hook: StageHook) -> None:
+    """Unregister a hook (no-op if it was not registered)."""
+    global _hooks
+    with _hooks_lock:
+        _hooks = tuple(h for h in _hooks if h is not hook)
+
+
+def enabled() -> bool:
+    """True if any hook is listening."""
+    return bool(_hooks)
+
+
+class _Stage:
+    __slots__ = ('name', 'args', 'hooks', 'start_ns')
+
+    def __init__(self, name: str, args: Dict[str, Any],
+                 hooks: Tuple[StageHook, ...]):
+        self.name = name
+        self.args = args
+        self.hooks = hooks
+
+    def __enter__(self) -> '_Stage':
+        for hook in self.hooks:
+            hook.stage_started(self.name, self.args)
+        self.start_ns = time.perf_counter_ns()
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        duration_ns = time.perf_counter_ns() - self.start_ns
+        for hook in self.hooks:
+            hook.stage_finished(self.name, self.args, self.start_ns, duration_ns)
+
+
+class _NullStage:
+    __slots__ = ()
+
+    def __enter__(self) -> '_NullStage':
+        return self
+
+    def __exit__(self, *exc_info: Any) -> None:
+        pass
+
+
+_NULL_STAGE = _NullStage()
+
+
+def stage(name: str, **args: Any):
+    """Context manager timing one pipeline stage (no-op without hooks)."""
+    hooks = _hooks
+    if not hooks:
+        return _NULL_STAGE
+    return _Stage(name, args, hooks)
+
+
+def profiled(name: str) -> Callable[[F], F]:
+    """Decorator form of ``stage`` for whole functions."""
+    def decorate(fn: F) -> F:
+        @functools.wraps(fn)
+        def wrapper(*args: Any, **kwargs: Any) -> Any:
+            hooks = _hooks
+            if not hooks:
+                return fn(*args, **kwargs)
+            with _Stage(name, {}, hooks):
+                return fn(*args, **kwargs)
+        return wrapper  # type: ignore[return-value]
+    return decorate
+
+
+class Profiler(StageHook):
+    """Records stage timings and exports Chrome traces and summaries."""
+
+    def __init__(self):
+        self._events: List[Tuple[str, Dict[str, Any], int, int, int]] = []
+        self._lock = threading.Lock()
+        self._origin_ns = time.perf_counter_ns()
+
+    def __enter__(self) -> 'Profiler':
+        return add_hook(self)
+
+    def __exit__(self, *exc_info: Any) -> None:
+        remove_hook(self)
+
+    def stage_finished(self, name: str, args: Dict[str, Any],
+                       start_ns: int, duration_ns: int) -> None:
+        event = (name, args, threading.get_ident(), start_ns, duration_ns)
+        with self._lock:
+            self._events.append(event)
+
+    def trace_events(self) -> List[Dict[str, Any]]:
+        """Chrome trace 'complete' (ph=X) events, timestamps in microseconds."""
+        pid = os.getpid()
+        with self._lock:
+            events = list(self._events)
+        return [
+            {
+                'name': name,
+                'cat': 'stage',
+                'ph': 'X',
+                'ts': (start_ns - self._origin_ns) / 1000,
+                'dur': duration_ns / 1000,
+                'pid': pid,
+                'tid': tid,
+                'args': {k: str(v) for k, v in args.items()},
+            }
+            for name, args, tid, start_ns, duration_ns in events
+        ]
+
+    def write_chrome_trace(self, path: str) -> str:
+        """Write trace-event JSON viewable in Perfetto / chrome://tracing."""
+        with open(path, 'w', encoding='utf-8') as f:
+            json.dump(
+                {'traceEvents': self.trace_events(), 'displayTimeUnit': 'ms'}, f
+            )
+        return path
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Per-stage count, total, mean and max duration in milliseconds."""
+        with self._lock:
+            events = list(self._events)
+        stats: Dict[str, Dict[str, float]] = {}
+        for name, _args, _tid, _start, duration_ns in events:
+            row = stats.setdefault(
+                name, {'count': 0, 'total_ms': 0.0, 'max_ms': 0.0}
+            )
+            ms = duration_ns / 1e6
+            row['count'] += 1
+            row['total_ms'] += ms
+            row['max_ms'] = max(row['max_ms'], ms)
+        for row in stats.values():
+            row['mean_ms'] = row['total_ms'] / row['count']
+        return stats
+
+    def format_summary(self) -> str:
+        """Summary table, slowest stages (by total time) first."""
+        rows = sorted(
+            self.summary().items(), key=lambda item: item[1]['total_ms'],
+            reverse=True,
+        )
+        lines = [f"{'stage':<24}{'count':>7}{'total ms':>11}"
+                 f"{'mean ms':>10}{'max ms':>10}"]
+        for name, row in rows:
+            lines.append(
+                f"{name:<24}{row['count']:>7}{row['total_ms']:>11.1f}"
+                f"{row['mean_ms']:>10.2f}{row['max_ms']:>10.2f}"
+            )
+        return "\n".join(lines)
@@ -0,0 +1,310 @@
+"""
+Layered render cache for cat images.
+
+A rendered cat is composed from two independently cached layers:
+
+  * body  - the recolored cat (``combine_parts`` + ``apply_color_numpy``)
+            without the label area. Depends only on the part templates and
+            the cat's color map, so no GENERATION_PARAMS key invalidates it.
+  * label - the white strip under the cat holding the name and color
+            legend (``add_cat_label``). Invalidated whenever one of
+            ``LABEL_CONFIG_KEYS`` changes.
+
+Gray part templates (``combine_parts`` output) are cached too, so cats that
+share parts only pay for recoloring. Restyling labels (fonts, swatches,
+text color) therefore only redraws the cheap label strips.
+
+Every layer is bounded by the pixel bytes it holds. Random cats almost never
+repeat a body or label, so by default only templates are kept; replay
+workloads use ``RenderCache(REPLAY_CACHE_SETTINGS)`` to keep all three.
+"""
+
+import threading
+import logging
+from collections import OrderedDict
+from typing import (
+    Any, Callable, Collection, Dict, Hashable, Optional, Sequence, Tuple,
+)
+
+from PIL import Image
+
+import metrics
+from config import GENERATION_PARAMS, RENDER_CACHE_SETTINGS, RGB
+from image_processing import CatImageBuilder
+
+logger = logging.getLogger(__name__)
+
+# GENERATION_PARAMS keys each layer depends on
+BODY_CONFIG_KEYS: Tuple[str, ...] = ()
+LABEL_CONFIG_KEYS: Tuple[str, ...] = (
+    'font_name', 'font_size', 'gene_font_size', 'text_color',
+    'swatch_size', 'text_position', 'layout_mode',
+    'text_padding_bottom', 'label_margin_top',
+)
+
+
+def part_key(img: Image.Image) -> Optional[Hashable]:
+    """
+    Cache key of a part image loaded by ``ImageLoader``: its ref ('body_3')
+    and source file version. None for other images, which are never cached
+    (an ``id()`` could be reused by a new image once the old one is freed).
+
+    A reloaded part gets a new key, so a render still holding the old image
+    can only store results under the old key, which no new render uses.
+    """
+    ref, source = img.info.get('part_ref'), img.info.get('part_source')
+    return (ref, source) if ref and source else None
+
+
+def parts_key(parts: Dict[str, Image.Image]) -> Optional[Tuple[Tuple[str, Hashable], ...]]:
+    """Sorted (locus, part_key) pairs, or None if any part is uncacheable."""
+    keys = tuple(sorted((locus, part_key(img)) for locus, img in parts.items()))
+    return None if any(key is None for _locus, key in keys) else keys
+
+
+def config_fingerprint(keys: Sequence[str]) -> Tuple[Any, ...]:
+    """Current values of the given GENERATION_PARAMS keys."""
+    return tuple(repr(GENERATION_PARAMS.get(key)) for key in keys)
+
+
+def image_bytes(value: Any) -> int:
+    """Pixel bytes of a cached image (0 for non-image values such as flags)."""
+    if isinstance(value, Image.Image):
+        return value.width * value.height * len(value.getbands())
+    return 0
+
+
+class _LRU:
+    """
+    Small thread-safe LRU map with hit/miss counters.
+
+    Bounded by ``max_bytes`` as measured by ``sizeof`` (pixel bytes by
+    default); a value larger than the whole budget is not stored.
+    """
+
+    def __init__(self, max_bytes: int, layer: str,
+                 sizeof: Callable[[Any], int] = image_bytes):
+        self.max_bytes = max_bytes
+        self.layer = layer
+        self.sizeof = sizeof
+        self.bytes = 0
+        self._data: 'OrderedDict[Hashable, Tuple[Any, int]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        with self._lock:
+            entry = self._data.get(key)
+            value = None if entry is None else entry[0]
+            if value is None:
+                self.misses += 1
+            else:
+                self._data.move_to_end(key)
+                self.hits += 1
+        metrics.inc(
+            'render_cache_hits_total' if value is not None
+            else 'render_cache_misses_total',
+            layer=self.layer,
+        )
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        size = self.sizeof(value)
+        if size > self.max_bytes:
+            return
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.bytes -= old[1]
+            self._data[key] = (value, size)
+            self.bytes += size
+            while self.bytes > self.max_bytes:
+                _key, (_value, dropped) = self._data.popitem(last=False)
+                self.bytes -= dropped
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+            self.bytes = 0
+
+    def discard_where(self, predicate: Callable[[Hashable], bool]) -> int:
+        """Drop entries whose key matches; returns how many were dropped."""
+        with self._lock:
+            stale = [key for key in self._data if predicate(key)]
+            for key in stale:
+                self.bytes -= self._data.pop(key)[1]
+        return len(stale)
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+class RenderCache:
+    """
+    Caches part templates, recolored bodies and label strips.
+
+    ``settings`` defaults to ``RENDER_CACHE_SETTINGS`` (templates only); pass
+    ``REPLAY_CACHE_SETTINGS`` when the same cats are rendered repeatedly.
+    """
+
+    def __init__(self, settings: Dict[str, Any] = None):
+        settings = settings or RENDER_CACHE_SETTINGS
+        self.templates = _LRU(settings.get('max_template_bytes', 0), 'template')
+        self.bodies = _LRU(settings.get('max_body_bytes', 0), 'body')
+        self.labels = _LRU(settings.get('max_label_bytes', 0), 'label')
+        self._fingerprints = {
+            'body': config_fingerprint(BODY_CONFIG_KEYS),
+            'label': config_fingerprint(LABEL_CONFIG_KEYS),
+        }
+
+    def _check_config(self) -> None:
+        """Drop any layer whose config keys changed since it was filled."""
+        for layer, keys, store in (
+            ('body', BODY_CONFIG_KEYS, self.bodies),
+            ('label', LABEL_CONFIG_KEYS, self.labels),
+        ):
+            current = config_fingerprint(keys)
+            if current != self._fingerprints[layer]:
+                store.clear()
+                self._fingerprints[layer] = current
+                logger.info(f"Render cache: {layer} layer invalidated by config")
+
+    def clear(self) -> None:
+        """Drop every cached layer."""
+        self.templates.clear()
+        self.bodies.clear()
+        self.labels.clear()
+
+    def invalidate_parts(self, refs: Collection[str]) -> int:
+        """
+        Drop templates and bodies built from any of the given part refs.
+
+        Labels do not depend on parts and are kept. Returns entries dropped.
+        """
+        refs = set(refs)
+        if not refs:
+            return 0
+
+        def uses(key: Tuple[Tuple[str, Hashable], ...]) -> bool:
+            return any(ref in refs for _locus, (ref, *_source) in key)
+
+        dropped = self.templates.discard_where(uses)
+        dropped += self.bodies.discard_where(lambda key: uses(key[0]))
+        if dropped:
+            logger.info(f"Render cache: dropped {dropped} entries for changed parts")
+        return dropped
+
+    def template(self, parts: Dict[str, Image.Image]) -> Image.Image:
+        """Gray combined template (no label area) for a set of parts."""
+        key = parts_key(parts) if self.templates.enabled else None
+        if key is None:
+            return CatImageBuilder.combine_parts(parts, text_padding=0)
+        img = self.templates.get(key)
+        if img is None:
+            img = CatImageBuilder.combine_parts(parts, text_padding=0)
+            self.templates.put(key, img)
+        return img
+
+    def body(self, parts: Dict[str, Image.Image],
+             color_map: Dict[RGB, RGB]) -> Image.Image:
+        """Recolored body layer for parts + color map."""
+        key = parts_key(parts) if self.bodies.enabled else None
+        if key is None:
+            return CatImageBuilder.apply_color_numpy(self.template(parts), color_map)
+        key = (key, tuple(sorted(color_map.items())))
+        img = self.bodies.get(key)
+        if img is None:
+            img = CatImageBuilder.apply_color_numpy(self.template(parts), color_map)
+            self.bodies.put(key, img)
+        return img
+
+    def label(self, width: int, padding: int, title: str,
+              color_strengths: Sequence[Tuple[RGB, float]]) -> Optional[Image.Image]:
+        """
+        White label strip (width x padding) with name and color legend.
+
+        Returns None when the label is taller than its padding — it would
+        overlap the body, so the caller must draw it on the full image.
+        """
+        key = (width, padding, title, tuple(color_strengths))
+        strip = self.labels.get(key) if self.labels.enabled else None
+        if strip is None:
+            _block_w, block_h = CatImageBuilder.label_block_size(
+                title, color_strengths
+            )
+            _x_offset, y_offset = GENERATION_PARAMS['text_position']
+            if block_h + y_offset + 5 > padding:
+                strip = False
+            else:
+                strip = Image.new('RGB', (width, padding), (255, 255, 255))
+                CatImageBuilder.add_cat_label(strip, title, color_strengths)
+            if self.labels.enabled:
+                self.labels.put(key, strip)
+        return strip or None
+
+    def render(self, parts: Dict[str, Image.Image], color_map: Dict[RGB, RGB],
+               title: str, color_strengths: Sequence[Tuple[RGB, float]],
+               text_padding: int) -> Image.Image:
+        """
+        Compose a full cat image from the cached layers.
+
+        The result is pixel-identical to the reference path (combine_parts,
+        apply_color_numpy, add_cat_label).
+        """
+        self._check_config()
+        body = self.body(parts, color_map)
+        img = Image.new('RGB', (body.width, body.height + text_padding),
+                        (255, 255, 255))
+        img.paste(body, (0, 0))
+
+        strip = self.label(body.width, text_padding, title, color_strengths)
+        if strip is None:
+            CatImageBuilder.add_cat_label(img, title, color_strengths)
+        else:
+            img.paste(strip, (0, body.height))
+        return img
+
+    @property
+    def bytes(self) -> int:
+        """Pixel bytes held across all layers."""
+        return self.templates.bytes + self.bodies.bytes + self.labels.bytes
+
+    def stats(self) -> Dict[str, Dict[str, int]]:
+        """Entries, bytes, hits and misses per layer."""
+        return {
+            name: {'entries': len(store), 'bytes': store.bytes,
+                   'hits': store.hits, 'misses': store.misses}
+            for name, store in (
+                ('templates', self.templates),
+                ('bodies', self.bodies),
+                ('labels', self.labels),
+            )
+        }
+
+
+_default_cache: Optional[RenderCache] = None
+_default_lock = threading.Lock()
+
+
+def get_default_cache() -> Optional[RenderCache]:
+    """Process-wide cache used by ``Cat.generate_image`` (None if disabled)."""
+    global _default_cache
+    if not RENDER_CACHE_SETTINGS.get('enabled', True):
+        return None
+    if _default_cache is None:
+        with _default_lock:
+            if _default_cache is None:
+                _default_cache = RenderCache()
+    return _default_cache
+
+
+def reset_default_cache() -> None:
+    """Drop the process cache; the next use rebuilds it from current settings."""
+    global _default_cache
+    with _default_lock:
+        _default_cache = None
@@ -0,0 +1,92 @@
+"""
+Weighted sampling helpers for inheritance.
+
+* ``weighted_sample`` - k distinct items without replacement in O(n log k)
+  using Efraimidis–Spirakis exponential keys. It has the same distribution
+  (including the order of picks) as drawing one item at a time with
+  ``random.choices`` and removing it. Items with zero weight are only
+  picked, uniformly, once every positive-weight item is taken.
+* ``AliasTable`` - Vose alias tables for O(1) draws from a fixed weight
+  set; ``alias_table`` caches one table per distinct weight set.
+"""
+
+import math
+import heapq
+import random
+from functools import lru_cache
+from typing import Any, Dict, Hashable, List, Sequence, Tuple
+
+
+def weighted_sample(items: Sequence[Any], weights: Sequence[float], k: int,
+                    rng: random.Random = random) -> List[Any]:
+    """
+    Sample up to ``k`` distinct items, weighted, without replacement.
+
+    Negative weights count as zero. Returns picks in draw order.
+    """
+    k = min(k, len(items))
+    if k <= 0:
+        return []
+
+    keyed = []
+    zero = []
+    for item, weight in zip(items, weights):
+        if weight > 0:
+            # log(u) / w orders items like u ** (1 / w), without underflow
+            keyed.append((math.log(1.0 - rng.random()) / weight, item))
+        else:
+            zero.append(item)
+
+    chosen = [item for _key, item in heapq.nlargest(k, keyed, key=lambda p: p[0])]
+    if len(chosen) < k:
+        chosen.extend(rng.sample(zero, k - len(chosen)))
+    return chosen
+
+
+class AliasTable:
+    """Vose alias table: O(n) build, O(1) weighted draws."""
+
+    __slots__ = ('options', 'prob', 'alias')
+
+    def __init__(self, options: Sequence[Any], weights: Sequence[float]):
+        total = float(sum(weights))
+        if not options or total <= 0:
+            raise ValueError("Alias table needs at least one positive weight")
+        n = len(options)
+        self.options = list(options)
+        scaled = [w * n / total for w in weights]
+        self.prob = [0.0] * n
+        self.alias = list(range(n))
+
+        small = [i for i, p in enumerate(scaled) if p < 1.0]
+        large = [i for i, p in enumerate(scaled) if p >= 1.0]
+        while small and large:
+            s, l = small.pop(), large.pop()
+            self.prob[s] = scaled[s]
+            self.alias[s] = l
+            scaled[l] = scaled[l] + scaled[s] - 1.0
+            (small if scaled[l] < 1.0 else large).append(l)
+        # Leftovers are 1.0 up to rounding
+        for i in large + small:
+            self.prob[i] = 1.0
+
+    def sample(self, rng: random.Random = random) -> Any:
+        """One weighted draw (a single RNG call)."""
+        u = rng.random() * len(self.options)
+        # u < n always, but guard the index against float rounding
+        i = min(int(u), len(self.options) - 1)
+        return self.options[i] if u - i < self.prob[i] else self.options[self.alias[i]]
+
+
+@lru_cache(maxsize=64)
+def _cached_table(pairs: Tuple[Tuple[Hashable, float], ...]) -> AliasTable:
+    return AliasTable([option for option, _ in pairs], [w for _, w in pairs])
+
+
+def alias_table(weights: Dict[Hashable, float]) -> AliasTable:
+    """Alias table for ``{option: weight}``, cached per distinct weight set.
+
+    Options with weight <= 0 are dropped; options are ordered by key.
+    """
+    pairs = tuple(sorted((option, w) for option, w in weights.items() if w > 0))
+    return _cached_table(pairs)
@@ -0,0 +1,258 @@
+"""
+Inverted index over saved Gen 0 seeds.
+
+Kept in a sidecar JSON file next to the seeds file (``seeds.index.json``):
+
+  parts  - part ref ('body_3')           -> seed ids
+  colors - founder color ('#afeeee')     -> seed ids
+  names  - lower-cased founder name      -> seed ids
+  hashes - Gen 0 content hash            -> seed id
+  seeds  - seed id                       -> founder names (for listings)
+
+The content hash covers each founder's color and parts in order (not the
+names), so re-saving the same founders is caught with one dict lookup.
+``seeds.append_seeds`` updates the index under the store lock. The index
+records the store file's size, mtime and inode; when the store was changed
+outside ``append_seeds`` the index is rebuilt on the next load.
+"""
+
+import os
+import json
+import hashlib
+import logging
+from typing import Any, Dict, Iterable, List, Optional, Sequence
+
+from config import SEEDS_FILE
+from seeds import PART_ORDER, load_store, write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+INDEX_SUFFIX = '.index.json'
+INDEX_VERSION = 1
+
+
+class DuplicateSeedError(ValueError):
+    """Raised when a Gen 0 with the same colors and parts is already saved."""
+
+    def __init__(self, seed_id: int):
+        self.seed_id = seed_id
+        super().__init__(f"Gen 0 already saved as seed #{seed_id}")
+
+
+def content_hash(cats: Sequence[Dict[str, Any]]) -> str:
+    """Hash of the founders' colors and part refs, in order."""
+    canonical = [
+        [list(cat.get('color', ())),
+         [cat.get('parts', {}).get(locus) for locus in PART_ORDER]]
+        for cat in cats
+    ]
+    data = json.dumps(canonical, separators=(',', ':')).encode('utf-8')
+    return hashlib.sha1(data).hexdigest()
+
+
+def color_key(color: Sequence[int]) -> str:
+    """'#rrggbb' for an [R, G, B] color."""
+    return '#' + ''.join(f"{int(c):02x}" for c in color)
+
+
+def parse_color(text: str) -> str:
+    """Accept '#AFEEEE', 'afeeee' or '175,238,238'; return a color key."""
+    text = text.strip()
+    if ',' in text:
+        channels = [int(c) for c in text.split(',')]
+        if len(channels) != 3 or not all(0 <= c <= 255 for c in channels):
+            raise ValueError(f"Invalid color: {text!r}")
+        return color_key(channels)
+    hex_part = text.lstrip('#')
+    if len(hex_part) != 6:
+        raise ValueError(f"Invalid color: {text!r}")
+    int(hex_part, 16)
+    return '#' + hex_part.lower()
+
+
+def index_path(filepath: str = SEEDS_FILE) -> str:
+    root, _ext = os.path.splitext(filepath)
+    return root + INDEX_SUFFIX
+
+
+def store_stamp(filepath: str = SEEDS_FILE) -> Optional[List[int]]:
+    """[size, mtime_ns, inode] of the seeds file, or None if missing."""
+    try:
+        st = os.stat(filepath)
+    except FileNotFoundError:
+        return None
+    return [st.st_size, st.st_mtime_ns, st.st_ino]
+
+
+class SeedIndex:
+    """Posting lists from part refs, colors and names to seed ids."""
+
+    def __init__(self):
+        self.parts: Dict[str, List[int]] = {}
+        self.colors: Dict[str, List[int]] = {}
+        self.names: Dict[str, List[int]] = {}
+        self.hashes: Dict[str, int] = {}
+        self.seeds: Dict[int, List[str]] = {}
+        self.stamp: Optional[List[int]] = None
+
+    @classmethod
+    def from_seeds(cls, seeds: Iterable[Dict[str, Any]]) -> 'SeedIndex':
+        index = cls()
+        for seed in seeds:
+            index.add(seed)
+        return index
+
+    @staticmethod
+    def _post(postings: Dict[str, List[int]], key: str, seed_id: int) -> None:
+        ids = postings.setdefault(key, [])
+        if not ids or ids[-1] != seed_id:
+            ids.append(seed_id)
+
+    def add(self, seed: Dict[str, Any]) -> None:
+        """Index one seed ({'id', 'cats'}); ids must be added in order."""
+        seed_id = seed['id']
+        cats = seed.get('cats', [])
+        for cat in cats:
+            for ref in cat.get('parts', {}).values():
+                self._post(self.parts, ref, seed_id)
+            if cat.get('color'):
+                self._post(self.colors, color_key(cat['color']), seed_id)
+            if cat.get('name'):
+                self._post(self.names, cat['name'].lower(), seed_id)
+        self.hashes.setdefault(content_hash(cats), seed_id)
+        self.seeds[seed_id] = [cat.get('name', '?') for cat in cats]
+
+    def find_duplicate(self, cats: Sequence[Dict[str, Any]]) -> Optional[int]:
+        """Id of a saved seed with the same colors and parts, if any."""
+        return self.hashes.get(content_hash(cats))
+
+    def query(self, parts: Sequence[str] = (), colors: Sequence[str] = (),
+              names: Sequence[str] = ()) -> List[int]:
+        """
+        Ids of seeds matching every term (sorted).
+
+        Colors are color keys (see ``parse_color``); names are matched
+        case-insensitively. No terms matches every seed.
+        """
+        postings = (
+            [self.parts.get(ref, []) for ref in parts]
+            + [self.colors.get(color, []) for color in colors]
+            + [self.names.get(name.lower(), []) for name in names]
+        )
+        if not postings:
+            return sorted(self.seeds)
+        # Intersect starting from the shortest list
+        postings.sort(key=len)
+        result = set(postings[0])
+        for ids in postings[1:]:
+            if not result:
+                break
+            result.intersection_update(ids)
+        return sorted(result)
+
+    def to_json(self) -> Dict[str, Any]:
+        return {
+            'version': INDEX_VERSION,
+            'stamp': self.stamp,
+            'parts': self.parts,
+            'colors': self.colors,
+            'names': self.names,
+            'hashes': self.hashes,
+            'seeds': {str(k): v for k, v in self.seeds.items()},
+        }
+
+    @classmethod
+    def from_json(cls, data: Dict[str, Any]) -> 'SeedIndex':
+        if data.get('version') != INDEX_VERSION:
+            raise ValueError(f"Unsupported seed index version {data.get('version')}")
+        index = cls()
+        index.stamp = data.get('stamp')
+        index.parts = data['parts']
+        index.colors = data['colors']
+        index.names = data['names']
+        index.hashes = data['hashes']
+        index.seeds = {int(k): v for k, v in data['seeds'].items()}
+        return index
+
+
+def save_index(index: SeedIndex, filepath: str = SEEDS_FILE,
+               stamp: Optional[List[int]] = None) -> None:
+    """
+    Stamp the index and write it.
+
+    ``stamp`` is the store state the index was built from; it defaults to
+    the store's current state, which is only right under ``store_lock``.
+    """
+    index.stamp = stamp if stamp is not None else store_stamp(filepath)
+    write_json_atomic(index.to_json(), index_path(filepath), indent=None)
+
+
+def load_index(filepath: str = SEEDS_FILE,
+               seeds: Optional[List[Dict[str, Any]]] = None) -> SeedIndex:
+    """
+    Load the index for a seeds file, rebuilding it if missing or stale.
+
+    Args:
+        filepath: The seeds file
+        seeds: The store's seeds if already loaded (used for a rebuild)
+    """
+    stamp = store_stamp(filepath)
+    try:
+        with open(index_path(filepath), 'r', encoding='utf-8') as f:
+            index = SeedIndex.from_json(json.load(f))
+        if index.stamp == stamp:
+            return index
+        logger.info(f"Seed index for {filepath} is stale; rebuilding")
+    except FileNotFoundError:
+        pass
+    except (OSError, ValueError, KeyError) as e:
+        logger.warning(f"Ignoring unreadable seed index: {e}")
+
+    if seeds is None:
+        seeds = load_store(filepath)['seeds']
+    index = SeedIndex.from_seeds(seeds)
+    if stamp is not None:
+        try:
+            # Stamped with the state read before loading: if a writer
+            # committed since, the index reads as stale and is rebuilt
+            save_index(index, filepath, stamp)
+        except OSError as e:
+            logger.warning(f"Could not write seed index: {e}")
+    return index
+
+
+def parse_terms(terms: Sequence[str]) -> Dict[str, List[str]]:
+    """
+    Split CLI terms into parts / colors / names.
+
+    Terms may be prefixed ('part:body_3', 'color:#afeeee', 'name:Luna');
+    otherwise a '<locus>_<id>' term is a part ref, '#rrggbb' or 'r,g,b' is
+    a color and anything else is a name.
+    """
+    query: Dict[str, List[str]] = {'parts': [], 'colors': [], 'names': []}
+    for term in terms:
+        kind, sep, value = term.partition(':')
+        if not sep:
+            kind, value = '', term
+            if any(term.startswith(f"{locus}_") for locus in PART_ORDER):
+                kind = 'part'
+            elif term.startswith('#') or ',' in term:
+                kind = 'color'
+            else:
+                kind = 'name'
+        if kind == 'part':
+            query['parts'].append(value)
+        elif kind == 'color':
+            query['colors'].append(parse_color(value))
+        elif kind == 'name':
+            query['names'].append(value)
+        else:
+            raise ValueError(f"Unknown search field {kind!r} in {term!r}")
+    return query
+
+
+def find_seeds(terms: Sequence[str], filepath: str = SEEDS_FILE) -> List[str]:
+    """One summary line per seed matching all terms (for --find-seeds)."""
+    index = load_index(filepath)
+    ids = index.query(**parse_terms(terms))
+    return [f"#{seed_id}: {', '.join(index.seeds[seed_id])}" for seed_id in ids]
@@ -4,16 +4,34 @@ Gen 0 seed storage.
 A "seed" here is a snapshot of Generation 0 only: each cat's name, solid color,
 and body-part references (body_1, ear_2, ...). Later generations are never saved —
 they are re-rolled (and re-named) by inheritance every run.
+
+Writers are safe across threads and processes: every read-modify-write holds
+an exclusive lock on ``<seeds file>.lock`` and the new store is written to a
+temporary file and renamed over the old one, so readers never see a partial
+file and a crash leaves the previous store intact. ``SeedWriter`` groups
+appends from many threads into one locked write for batch runs. Appends
+also keep the query index (``seed_index``) in sync and reject duplicates.
 """
 
 from __future__ import annotations
 
+import os
 import json
 import logging
+import threading
+from concurrent.futures import Future
+from contextlib import contextmanager
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import Any, Dict, Iterator, List, Optional, Sequence, Tuple, Union
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
 
-from config import SEEDS_FILE, RGB
+import metrics
+from config import CAT_PARTS_FOLDERS, SEEDS_FILE, RGB
 
 logger = logging.getLogger(__name__)
 
@@ -36,12 +54,62 @@ def load_store(filepath: str = SEEDS_FILE) -> Dict[str, Any]:
     return data
 
 
-def save_store(store: Dict[str, Any], filepath: str = SEEDS_FILE) -> None:
-    """Write the seeds store to disk (pretty-printed)."""
+# flock() is per open file, but other platforms lock per process
+_thread_lock = threading.RLock()
+
+
+@contextmanager
+def store_lock(filepath: str = SEEDS_FILE) -> Iterator[None]:
+    """Hold the exclusive inter-process lock for a seeds file."""
+    with _thread_lock:
+        with open(f"{filepath}.lock", 'a+b') as lock_file:
+            if fcntl is not None:
+                fcntl.flock(lock_file.fileno(), fcntl.LOCK_EX)
+            else:
+                lock_file.seek(0)
+                msvcrt.locking(lock_file.fileno(), msvcrt.LK_LOCK, 1)
+            try:
+                yield
+            finally:
+                if fcntl is not None:
+                    fcntl.flock(lock_file.fileno(), fcntl.LOCK_UN)
+                else:
+                    lock_file.seek(0)
+                    msvcrt.locking(lock_file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+def write_json_atomic(data: Any, filepath: str, indent: Optional[int] = 2) -> None:
+    """
+    Write JSON via a temporary file in the same directory, fsync and rename.
+
+    Readers see the old or the new file, never a partial one.
+    """
     path = Path(filepath)
-    with open(path, 'w', encoding='utf-8') as f:
-        json.dump(store, f, indent=2, ensure_ascii=False)
-        f.write('\n')
+    tmp_path = path.with_name(
+        f".{path.name}.{os.getpid()}.{threading.get_ident()}.tmp"
+    )
+    try:
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(data, f, indent=indent, ensure_ascii=False)
+            f.write('\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def save_store(store: Dict[str, Any], filepath: str = SEEDS_FILE) -> None:
+    """
+    Write the seeds store to disk (pretty-printed) atomically.
+
+    Call under ``store_lock`` when the store was read first.
+    """
+    write_json_atomic(store, filepath)
     logger.info(f"Saved seeds to {filepath}")
 
 
@@ -58,6 +126,75 @@ def get_seed(seed_id: int, filepath: str = SEEDS_FILE) -> Dict[str, Any]:
     raise KeyError(f"Seed id {seed_id} not found in {filepath}")
 
 
+def _commit(
+    batch: Sequence[List[Dict[str, Any]]],
+    filepath: str,
+    strict: bool,
+) -> List[Union[int, Exception]]:
+    """
+    Append a batch under the store lock, keeping the seed index in sync.
+
+    Duplicates (of saved seeds or of earlier seeds in the batch) come back
+    as DuplicateSeedError in place of an id; with ``strict`` the first one
+    is raised and nothing is written.
+    """
+    # seed_index imports this module
+    from seed_index import DuplicateSeedError, load_index, save_index
+
+    with store_lock(filepath):
+        store = load_store(filepath)
+        index = load_index(filepath, store['seeds'])
+        next_id = 1
+        if store['seeds']:
+            next_id = max(s['id'] for s in store['seeds']) + 1
+
+        results: List[Union[int, Exception]] = []
+        entries = []
+        for cats in batch:
+            duplicate_of = index.find_duplicate(cats)
+            if duplicate_of is not None:
+                error = DuplicateSeedError(duplicate_of)
+                if strict:
+                    raise error
+                results.append(error)
+                continue
+            entry = {'id': next_id, 'cats': cats}
+            index.add(entry)
+            entries.append(entry)
+            results.append(next_id)
+            next_id += 1
+
+        if not entries:
+            return results
+        store['seeds'].extend(entries)
+        save_store(store, filepath)
+        save_index(index, filepath)
+        size = Path(filepath).stat().st_size
+
+    metrics.inc('seed_store_commits_total')
+    metrics.set_gauge('seed_store_seeds', len(store['seeds']))
+    metrics.set_gauge('seed_store_bytes', size)
+    for entry in entries:
+        logger.info(f"Appended Gen 0 seed #{entry['id']} ({len(entry['cats'])} cats)")
+    return results
+
+
+def append_seeds(
+    batch: Sequence[List[Dict[str, Any]]],
+    filepath: str = SEEDS_FILE,
+) -> List[int]:
+    """
+    Append several Gen 0 seeds in one locked write; return their ids.
+
+    Each seed is a list of cat dicts (see ``append_seed``). Raises
+    ``seed_index.DuplicateSeedError`` (and writes nothing) if any seed has
+    the same colors and parts as a saved one.
+    """
+    if not batch:
+        return []
+    return _commit(batch, filepath, strict=True)
+
+
 def append_seed(
     cats: List[Dict[str, Any]],
     filepath: str = SEEDS_FILE,
@@ -69,17 +206,100 @@ def append_seed(
       - name: str
       - color: [R, G, B]
       - parts: {ear, eyes, body, tail, legs} -> refs like 'body_1'
+
+    Raises ``seed_index.DuplicateSeedError`` if the same Gen 0 is saved.
+    """
+    return append_seeds([cats], filepath)[0]
+
+
+class SeedWriter:
+    """
+    Group commit for seed appends.
+
+    ``submit`` queues a seed and returns a Future for its id; a background
+    thread writes everything queued since the last commit in one locked
+    read-modify-write (waiting up to ``max_delay`` seconds for more seeds
+    to arrive, at most ``max_batch`` per commit). ``append`` blocks until
+    the seed is on disk.
+
+        with SeedWriter() as writer:
+            seed_id = writer.append(snapshots)
     """
-    store = load_store(filepath)
-    next_id = 1
-    if store['seeds']:
-        next_id = max(s['id'] for s in store['seeds']) + 1
 
-    entry = {'id': next_id, 'cats': cats}
-    store['seeds'].append(entry)
-    save_store(store, filepath)
-    logger.info(f"Appended Gen 0 seed #{next_id} ({len(cats)} cats)")
-    return next_id
+    def __init__(self, filepath: str = SEEDS_FILE, max_batch: int = 64,
+                 max_delay: float = 0.05):
+        self.filepath = filepath
+        self.max_batch = max_batch
+        self.max_delay = max_delay
+        self._pending: List[Tuple[List[Dict[str, Any]], Future]] = []
+        self._cond = threading.Condition()
+        self._closed = False
+        self._thread = threading.Thread(
+            target=self._run, name='seed-writer', daemon=True
+        )
+        self._thread.start()
+
+    def submit(self, cats: List[Dict[str, Any]]) -> Future:
+        """Queue a seed; the Future resolves to its id once written."""
+        future: Future = Future()
+        with self._cond:
+            if self._closed:
+                raise RuntimeError("SeedWriter is closed")
+            self._pending.append((cats, future))
+            self._cond.notify_all()
+        return future
+
+    def append(self, cats: List[Dict[str, Any]]) -> int:
+        """Queue a seed and wait until it is committed; return its id."""
+        return self.submit(cats).result()
+
+    def _take_batch(self) -> Optional[List[Tuple[List[Dict[str, Any]], Future]]]:
+        with self._cond:
+            while not self._pending and not self._closed:
+                self._cond.wait()
+            if not self._pending:
+                return None
+            if len(self._pending) < self.max_batch and not self._closed:
+                # Let concurrent writers join this commit
+                self._cond.wait_for(
+                    lambda: len(self._pending) >= self.max_batch or self._closed,
+                    timeout=self.max_delay,
+                )
+            batch = self._pending[:self.max_batch]
+            del self._pending[:self.max_batch]
+            return batch
+
+    def _run(self) -> None:
+        while True:
+            batch = self._take_batch()
+            if batch is None:
+                return
+            try:
+                results = _commit([cats for cats, _ in batch], self.filepath,
+                                  strict=False)
+            except Exception as e:
+                logger.error(f"Seed commit of {len(batch)} seed(s) failed: {e}")
+                for _, future in batch:
+                    future.set_exception(e)
+                continue
+            for result, (_, future) in zip(results, batch):
+                if isinstance(result, Exception):
+                    future.set_exception(result)
+                else:
+                    future.set_result(result)
+
+    def close(self) -> None:
+        """Commit everything still queued and stop the writer thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+        self._thread.join()
+
+    def __enter__(self) -> 'SeedWriter':
+        return self
+
+    def __exit__(self, *exc: Any) -> None:
+        self.close()
 
 
 def make_cat_snapshot(
@@ -103,3 +323,73 @@ def format_seed_summary(seed: Dict[str, Any]) -> str:
     cats = seed.get('cats', [])
     names = [c.get('name', '?') for c in cats]
     return f"#{seed['id']}: {', '.join(names)}"
+
+
+def format_seed_details(seed: Dict[str, Any]) -> str:
+    """Multi-line description of a seed for --show-seed."""
+    lines = [f"Seed #{seed['id']} ({len(seed.get('cats', []))} cats)"]
+    for i, cat in enumerate(seed.get('cats', []), start=1):
+        color = tuple(cat.get('color', ()))
+        parts = ', '.join(f"{p}={ref}" for p, ref in cat.get('parts', {}).items())
+        lines.append(f"  {i}. {cat.get('name', '?'):<12} color={color}  {parts}")
+    return "\n".join(lines)
+
+
+def validate_seeds(filepath: str = SEEDS_FILE, base_path: str = ".") -> List[str]:
+    """
+    Check every seed for structural problems and missing part files.
+
+    Only reads JSON and stats files under ``base_path`` (no images are
+    decoded). Returns human-readable problems; empty means valid.
+    """
+    try:
+        seeds = list_seeds(filepath)
+    except (OSError, ValueError) as e:
+        return [f"{filepath}: {e}"]
+
+    problems: List[str] = []
+    seen_ids = set()
+    for index, seed in enumerate(seeds):
+        if not isinstance(seed, dict):
+            problems.append(f"seed [{index}]: must be an object")
+            continue
+        seed_id = seed.get('id')
+        where = f"seed #{seed_id}" if seed_id is not None else f"seed [{index}]"
+        if not isinstance(seed_id, int):
+            problems.append(f"{where}: id must be an integer")
+        elif seed_id in seen_ids:
+            problems.append(f"{where}: duplicate id")
+        seen_ids.add(seed_id)
+
+        cats = seed.get('cats')
+        if not isinstance(cats, list) or len(cats) != 8:
+            problems.append(f"{where}: must contain 8 cats")
+            continue
+        for n, cat in enumerate(cats, start=1):
+            label = f"{where} cat {n}"
+            if not isinstance(cat, dict):
+                problems.append(f"{label}: must be an object")
+                continue
+            # Names are optional (loading falls back to a random name)
+            if cat.get('name') is not None and not isinstance(cat['name'], str):
+                problems.append(f"{label}: name must be a string")
+            color = cat.get('color')
+            if (not isinstance(color, list) or len(color) != 3
+                    or not all(isinstance(c, int) and 0 <= c <= 255 for c in color)):
+                problems.append(f"{label}: color must be [R, G, B] in 0-255")
+            parts = cat.get('parts')
+            if not isinstance(parts, dict):
+                problems.append(f"{label}: parts must be an object")
+                continue
+            for locus in PART_ORDER:
+                ref = parts.get(locus)
+                if not isinstance(ref, str) or not ref.startswith(f"{locus}_"):
+                    problems.append(f"{label}: invalid {locus} ref {ref!r}")
+                    continue
+                file_id = ref[len(locus) + 1:]
+                part_file = os.path.join(
+                    base_path, CAT_PARTS_FOLDERS[locus], f"{file_id}.png"
+                )
+                if not os.path.exists(part_file):
+                    problems.append(f"{label}: part file not found for {ref}")
+    return problems
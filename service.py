@@ -0,0 +1,280 @@
+"""
+Local HTTP render service.
+
+Keeps the part library, names and fonts loaded in one process so a web
+backend does not pay Python startup, imports and PNG decoding per request.
+Built on the standard library only (``http.server`` + a thread pool).
+Part files added or edited under parts/ are picked up while serving (see
+``parts_watcher``; ``SERVICE_SETTINGS['parts_poll_interval']``).
+
+Endpoints (all return ``image/png`` on success):
+  GET  /family/random        random Gen 0, full pedigree (not saved to seeds)
+  GET  /family/seed/<id>     Gen 0 from seeds.json, later generations re-rolled
+  POST /cat                  single cat from a JSON genome (see cat_from_genome);
+                             bodies over SERVICE_SETTINGS['max_body_bytes'] get 413
+  GET  /health               JSON status: workers, in-flight and queued renders
+"""
+
+import io
+import json
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError as FutureTimeout
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Callable, Dict, Optional
+
+from PIL import Image
+
+from config import OUTPUT_SETTINGS, SERVICE_SETTINGS
+from image_processing import FamilyLayoutBuilder
+from cat import cat_from_genome
+from parts_watcher import PartsWatcher
+from seeds import get_seed
+
+logger = logging.getLogger(__name__)
+
+
+class ServiceBusy(Exception):
+    """Raised when the render queue is full."""
+
+
+class SeedNotFound(Exception):
+    """Raised when a requested seed id is not saved."""
+
+
+def encode_png(img: Image.Image) -> bytes:
+    """Encode an image with the configured output format, in memory."""
+    buffer = io.BytesIO()
+    img.save(buffer, format=OUTPUT_SETTINGS['format'])
+    return buffer.getvalue()
+
+
+class RenderService:
+    """Warm part library + bounded worker pool for rendering requests."""
+
+    def __init__(self, base_path: str = ".", workers: int = None,
+                 max_queue: int = None, timeout: float = None):
+        """
+        Load the part library and names once and start the worker pool.
+
+        Args:
+            base_path: Directory containing the parts/ folders
+            workers: Renders running at once
+            max_queue: Renders allowed to wait for a worker (beyond that: busy)
+            timeout: Seconds a caller waits for its render
+        """
+        # Imported here: main imports this module lazily for --serve
+        from main import load_cat_names
+
+        self.workers = workers or SERVICE_SETTINGS['workers']
+        self.max_queue = (
+            SERVICE_SETTINGS['max_queue'] if max_queue is None else max_queue
+        )
+        self.timeout = timeout or SERVICE_SETTINGS['timeout']
+
+        # New / changed / removed part files are picked up without a restart
+        poll_interval = SERVICE_SETTINGS.get('parts_poll_interval', 0)
+        self.parts_watcher = PartsWatcher(base_path, poll_interval or 2.0)
+        if poll_interval:
+            self.parts_watcher.start()
+        self.names = load_cat_names()
+
+        self._pool = ThreadPoolExecutor(
+            max_workers=self.workers, thread_name_prefix='render'
+        )
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_queue)
+        self._lock = threading.Lock()
+        self._pending = 0
+        logger.info(
+            f"Render service ready: {self.workers} workers, "
+            f"queue limit {self.max_queue}"
+        )
+
+    @property
+    def parts_images(self) -> Dict[str, Dict[str, Image.Image]]:
+        """Current part index (each render reads it once and keeps it)."""
+        return self.parts_watcher.parts_images
+
+    def _run(self, fn: Callable[..., bytes], *args: Any) -> bytes:
+        """Run a render on the pool, rejecting it if the queue is full."""
+        if not self._slots.acquire(blocking=False):
+            raise ServiceBusy("Render queue is full")
+        with self._lock:
+            self._pending += 1
+
+        def release(_future) -> None:
+            with self._lock:
+                self._pending -= 1
+            self._slots.release()
+
+        future = self._pool.submit(fn, *args)
+        future.add_done_callback(release)
+        return future.result(timeout=self.timeout)
+
+    def _family_png(self, gen0_snapshots) -> bytes:
+        from main import generate_cat_family
+
+        pedigree, _family, _seed_id = generate_cat_family(
+            gen0_snapshots=gen0_snapshots,
+            save_new_seed=False,
+            parts_images=self.parts_images,
+            names=self.names,
+        )
+        return encode_png(FamilyLayoutBuilder.create_pedigree_image(pedigree))
+
+    def _cat_png(self, genome: Dict[str, Any]) -> bytes:
+        try:
+            cat = cat_from_genome(genome, self.parts_images)
+        except KeyError as e:
+            raise ValueError(f"Invalid genome: missing key {e}") from None
+        return encode_png(cat.generate_image(retain=False))
+
+    def random_family(self) -> bytes:
+        """PNG of a family with random founders."""
+        return self._run(self._family_png, None)
+
+    def seed_family(self, seed_id: int) -> bytes:
+        """PNG of a family replayed from a saved Gen 0 seed (SeedNotFound if missing)."""
+        try:
+            seed = get_seed(seed_id)
+        except KeyError as e:
+            raise SeedNotFound(str(e).strip("'\"")) from None
+        return self._run(self._family_png, seed['cats'])
+
+    def single_cat(self, genome: Dict[str, Any]) -> bytes:
+        """PNG of one cat rendered from a genome."""
+        return self._run(self._cat_png, genome)
+
+    def status(self) -> Dict[str, int]:
+        with self._lock:
+            pending = self._pending
+        return {
+            'workers': self.workers,
+            'max_queue': self.max_queue,
+            'in_flight': min(pending, self.workers),
+            'queued': max(pending - self.workers, 0),
+        }
+
+    def shutdown(self) -> None:
+        self.parts_watcher.stop()
+        self._pool.shutdown(wait=True)
+
+
+class RenderRequestHandler(BaseHTTPRequestHandler):
+    """Maps HTTP routes onto a RenderService (set on the server)."""
+
+    server_version = "CatRender/1.0"
+
+    @property
+    def service(self) -> RenderService:
+        return self.server.render_service
+
+    def log_message(self, format: str, *args: Any) -> None:
+        logger.info(f"{self.address_string()} - {format % args}")
+
+    def _send(self, status: int, body: bytes, content_type: str,
+              headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for name, value in (headers or {}).items():
+            self.send_header(name, value)
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_json(self, status: int, payload: Dict[str, Any],
+                   headers: Optional[Dict[str, str]] = None) -> None:
+        body = json.dumps(payload).encode('utf-8')
+        self._send(status, body, 'application/json', headers)
+
+    def _handle(self, render: Callable[[], bytes]) -> None:
+        try:
+            png = render()
+        except ServiceBusy as e:
+            self._send_json(503, {'error': str(e)}, {'Retry-After': '1'})
+        except FutureTimeout:
+            self._send_json(504, {'error': 'Render timed out'})
+        except SeedNotFound as e:
+            self._send_json(404, {'error': str(e)})
+        except (ValueError, TypeError) as e:
+            self._send_json(400, {'error': str(e)})
+        except Exception as e:
+            logger.exception("Render failed")
+            self._send_json(500, {'error': str(e)})
+        else:
+            self._send(200, png, 'image/png')
+
+    @staticmethod
+    def _is_number(text: str) -> bool:
+        # str.isdigit() also accepts e.g. '²', which int() rejects
+        return text.isascii() and text.isdecimal()
+
+    def do_GET(self) -> None:
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path == '/health':
+            self._send_json(200, dict(status='ok', **self.service.status()))
+        elif path == '/family/random':
+            self._handle(self.service.random_family)
+        elif path.startswith('/family/seed/'):
+            raw_id = path.rsplit('/', 1)[-1]
+            if not self._is_number(raw_id):
+                self._send_json(400, {'error': f"Invalid seed id: {raw_id!r}"})
+                return
+            self._handle(lambda: self.service.seed_family(int(raw_id)))
+        else:
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+
+    def do_POST(self) -> None:
+        path = self.path.split('?', 1)[0].rstrip('/')
+        if path != '/cat':
+            self._send_json(404, {'error': f"Unknown path: {self.path}"})
+            return
+        raw_length = self.headers.get('Content-Length') or '0'
+        if not self._is_number(raw_length):
+            # The body cannot be skipped without its length
+            self.close_connection = True
+            self._send_json(400, {'error': f"Invalid Content-Length: {raw_length!r}"})
+            return
+        length = int(raw_length)
+        max_length = SERVICE_SETTINGS['max_body_bytes']
+        if length > max_length:
+            self.close_connection = True
+            self._send_json(413, {'error': f"Body over {max_length} bytes"})
+            return
+        try:
+            genome = json.loads(self.rfile.read(length) or b'{}')
+        except ValueError as e:  # JSONDecodeError, or bytes that are not UTF-8
+            self._send_json(400, {'error': f"Invalid JSON: {e}"})
+            return
+        if not isinstance(genome, dict):
+            self._send_json(400, {'error': 'Genome must be a JSON object'})
+            return
+        self._handle(lambda: self.service.single_cat(genome))
+
+
+def make_server(service: RenderService, host: str = None,
+                port: int = None) -> ThreadingHTTPServer:
+    """Bind an HTTP server to a render service (port 0 picks a free port)."""
+    host = host or SERVICE_SETTINGS['host']
+    port = SERVICE_SETTINGS['port'] if port is None else port
+    server = ThreadingHTTPServer((host, port), RenderRequestHandler)
+    server.daemon_threads = True
+    server.render_service = service
+    return server
+
+
+def serve(host: str = None, port: int = None, workers: int = None,
+          max_queue: int = None) -> None:
+    """Run the render service until interrupted."""
+    service = RenderService(workers=workers, max_queue=max_queue)
+    server = make_server(service, host, port)
+    bound_host, bound_port = server.server_address[:2]
+    print(f"Serving cat renders on http://{bound_host}:{bound_port} (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        service.shutdown()
+
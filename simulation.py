@@ -0,0 +1,361 @@
+"""
+Open-population breeding simulator.
+
+Evolves a population of ``population`` cats for many generations using the
+inheritance rules of cat.py (``PairInheritance`` litters, mutations from
+lineage colors). Each generation is paired by a mating strategy:
+
+  * random       - shuffled pairs
+  * assortative  - each cat takes the candidate with the closest main color
+  * kinship      - each cat avoids relatives: the first candidate whose
+                   kinship (lineage.py) is at most ``max_kinship``, else
+                   the least related one
+
+Memory stays bounded by one generation: every generation is streamed to a
+``GenomeArchive`` and the ``Lineage``, each kitten caches its lineage
+color pool, and parent links are then cut so older generations are freed.
+Every ``checkpoint_every`` generations the lineage, the current generation's
+genomes and the RNG state are saved; rerunning the same command resumes
+from the last checkpoint (and drops generations archived after it), so an
+interrupted run continues exactly as if it never stopped. Only sampled
+cats are rendered.
+
+    python simulation.py --generations 200 --population 500 --mating kinship
+"""
+
+import os
+import sys
+import json
+import time
+import random
+import logging
+import argparse
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import metrics
+from cat import (
+    Cat, OffspringCat, PairInheritance, ParentCat, cat_from_genome, cat_to_genome,
+    collect_lineage_colors,
+)
+from config import NAMES_FILE, RGB, SIMULATION_SETTINGS
+from genome_archive import GenomeArchive
+from lineage import Lineage
+from profiling import stage
+from seeds import write_json_atomic
+
+logger = logging.getLogger(__name__)
+
+ARCHIVE_DIR = 'population.genomes'
+LINEAGE_FILE = 'lineage.npz'
+CHECKPOINT_FILE = 'checkpoint.json'
+SAMPLES_DIR = 'samples'
+CHECKPOINT_VERSION = 1
+# Settings a resumed run must keep (the rest may change between runs)
+FIXED_SETTINGS = ('population', 'litter_size')
+
+
+def _color_distance(a: RGB, b: RGB) -> int:
+    return sum((x - y) ** 2 for x, y in zip(a, b))
+
+
+def _mate_random(sim: 'Simulation', cat: int, candidates: Sequence[int]) -> int:
+    return candidates[0]
+
+
+def _mate_assortative(sim: 'Simulation', cat: int, candidates: Sequence[int]) -> int:
+    color = sim.current[cat].color
+    return min(candidates, key=lambda c: _color_distance(color, sim.current[c].color))
+
+
+def _mate_kinship(sim: 'Simulation', cat: int, candidates: Sequence[int]) -> int:
+    own_id = sim.current_ids[cat]
+    best, best_kinship = candidates[0], None
+    for c in candidates:
+        kinship = sim.lineage.kinship(own_id, sim.current_ids[c])
+        if kinship <= sim.settings['max_kinship']:
+            return c
+        if best_kinship is None or kinship < best_kinship:
+            best, best_kinship = c, kinship
+    return best
+
+
+# Strategy: (simulation, cat position, candidate positions) -> chosen position
+MATING_STRATEGIES: Dict[str, Callable[['Simulation', int, Sequence[int]], int]] = {
+    'random': _mate_random,
+    'assortative': _mate_assortative,
+    'kinship': _mate_kinship,
+}
+
+
+class Simulation:
+    """A resumable population run stored in ``out_dir``."""
+
+    def __init__(self, out_dir: str = SIMULATION_SETTINGS['out_dir'],
+                 parts_images: Optional[Dict[str, Dict[str, Any]]] = None,
+                 names: Optional[List[str]] = None, **settings: Any):
+        """
+        Open ``out_dir``, resuming its last checkpoint if there is one.
+
+        Args:
+            out_dir: Run directory (archive, lineage, checkpoint, samples)
+            parts_images: Preloaded part library (loaded from disk if None)
+            names: Cat names (read from NAMES_FILE if None)
+            **settings: Overrides of SIMULATION_SETTINGS
+        """
+        unknown = set(settings) - set(SIMULATION_SETTINGS)
+        if unknown:
+            raise ValueError(f"Unknown simulation settings: {sorted(unknown)}")
+        self.settings = {**SIMULATION_SETTINGS, **settings, 'out_dir': out_dir}
+        if self.settings['mating'] not in MATING_STRATEGIES:
+            raise ValueError(
+                f"Unknown mating strategy {self.settings['mating']!r} "
+                f"(choose from {', '.join(MATING_STRATEGIES)})"
+            )
+        if self.settings['population'] < 2 or self.settings['litter_size'] < 1:
+            raise ValueError("Need a population of 2+ and litters of 1+")
+        if parts_images is None:
+            from image_processing import ImageLoader
+            parts_images = ImageLoader().load_all_parts()
+        if names is None:
+            with open(NAMES_FILE, 'r', encoding='utf-8') as f:
+                names = f.read().splitlines()
+        self.parts_images = parts_images
+        self.names = [name.split(' ')[-1] for name in names if name.strip()] or ['Cat']
+
+        os.makedirs(out_dir, exist_ok=True)
+        self.archive = GenomeArchive(os.path.join(out_dir, ARCHIVE_DIR))
+        self.generation = -1
+        self.current: List[Cat] = []
+        self.current_ids: List[int] = []
+        self.lineage = Lineage()
+        self.resumed = self._resume()
+
+    def _path(self, name: str) -> str:
+        return os.path.join(self.settings['out_dir'], name)
+
+    def _name(self) -> str:
+        return random.choice(self.names)
+
+    # -- checkpoints -----------------------------------------------------
+
+    def _resume(self) -> bool:
+        try:
+            with open(self._path(CHECKPOINT_FILE), 'r', encoding='utf-8') as f:
+                checkpoint = json.load(f)
+        except FileNotFoundError:
+            # Nothing to resume: drop what a run that never checkpointed left
+            self.archive.truncate(0)
+            return False
+        if checkpoint.get('version') != CHECKPOINT_VERSION:
+            raise ValueError(f"Unsupported checkpoint version {checkpoint.get('version')}")
+        for key in FIXED_SETTINGS:
+            if checkpoint['settings'][key] != self.settings[key]:
+                raise ValueError(
+                    f"{self.settings['out_dir']} was run with {key}="
+                    f"{checkpoint['settings'][key]}, not {self.settings[key]}"
+                )
+
+        length = checkpoint['archive_length']
+        self.archive.truncate(length)
+        self.lineage = Lineage.load(self._path(LINEAGE_FILE), size=length)
+        self.generation = checkpoint['generation']
+        self.current, self.current_ids = [], []
+        for entry in checkpoint['current']:
+            cat = cat_from_genome(entry['genome'], self.parts_images)
+            # The parents are gone; restore the pool they gave this cat
+            cat._lineage_colors[1] = frozenset(tuple(c) for c in entry['lineage_colors'])
+            self.current.append(cat)
+            self.current_ids.append(entry['id'])
+        version, state, gauss = checkpoint['random_state']
+        random.setstate((version, tuple(state), gauss))
+        logger.info(
+            f"Resumed {self.settings['out_dir']} at generation {self.generation} "
+            f"({length} cats archived)"
+        )
+        return True
+
+    def checkpoint(self) -> None:
+        """Save lineage, current generation and RNG state (checkpoint last)."""
+        with stage('simulation_checkpoint', generation=self.generation):
+            self.lineage.save(self._path(LINEAGE_FILE), rows=self.current_ids)
+            write_json_atomic({
+                'version': CHECKPOINT_VERSION,
+                'generation': self.generation,
+                'archive_length': len(self.archive),
+                'settings': {k: v for k, v in self.settings.items() if k != 'out_dir'},
+                'current': [
+                    {
+                        'id': cat_id,
+                        'genome': cat_to_genome(cat),
+                        'lineage_colors': sorted(collect_lineage_colors(cat)),
+                    }
+                    for cat, cat_id in zip(self.current, self.current_ids)
+                ],
+                'random_state': random.getstate(),
+            }, self._path(CHECKPOINT_FILE), indent=None)
+        logger.info(f"Checkpoint at generation {self.generation}")
+
+    # -- breeding --------------------------------------------------------
+
+    def _commit(self, cats: List[Cat], parents: List[Tuple[int, int]]) -> None:
+        """Archive a generation, register it and free the previous one."""
+        ids = [self.lineage.add(p1, p2) for p1, p2 in parents]
+        archived = self.archive.append_generation(cats, parents=parents)
+        assert ids == list(archived), "lineage ids and archive indices diverged"
+        for cat in cats:
+            collect_lineage_colors(cat)  # cached before the parents go
+            cat.parent1 = cat.parent2 = None
+        self.lineage.release(self.current_ids)
+        self.current, self.current_ids = cats, ids
+        self.generation += 1
+        metrics.inc('simulated_cats_total', len(cats))
+
+    def _founders(self) -> None:
+        from cats_colors import CATS_COLORS
+        from image_processing import CatImageBuilder
+
+        cats = [
+            ParentCat(self._name(), random.choice(CATS_COLORS),
+                      CatImageBuilder.choose_random_parts(self.parts_images)[0])
+            for _ in range(self.settings['population'])
+        ]
+        self._commit(cats, [(-1, -1)] * len(cats))
+
+    def pair(self) -> List[Tuple[int, int]]:
+        """Pairs (positions in ``current``) for the next generation."""
+        population = self.settings['population']
+        pairs_needed = -(-population // self.settings['litter_size'])
+        choose = MATING_STRATEGIES[self.settings['mating']]
+        candidates = max(1, self.settings['candidates'])
+        pairs: List[Tuple[int, int]] = []
+        pool: List[int] = []
+        while len(pairs) < pairs_needed:
+            if len(pool) < 2:
+                # Everyone has mated: start another round
+                pool = list(range(len(self.current)))
+                random.shuffle(pool)
+            cat = pool.pop()
+            offered = pool[-candidates:]
+            mate = choose(self, cat, offered)
+            pool.remove(mate)
+            pairs.append((cat, mate))
+        return pairs
+
+    def step(self) -> None:
+        """Breed one generation from the current one."""
+        generation = self.generation + 1
+        kittens: List[Cat] = []
+        parents: List[Tuple[int, int]] = []
+        litter_size = self.settings['litter_size']
+        for a, b in self.pair():
+            parent1, parent2 = self.current[a], self.current[b]
+            inheritance = PairInheritance(parent1, parent2, generation)
+            for _ in range(min(litter_size, self.settings['population'] - len(kittens))):
+                kittens.append(
+                    OffspringCat(self._name(), parent1, parent2, generation, inheritance)
+                )
+                parents.append((self.current_ids[a], self.current_ids[b]))
+        self._commit(kittens, parents)
+
+    def render_samples(self) -> List[str]:
+        """Render ``samples`` random cats of the current generation."""
+        out_dir = self._path(SAMPLES_DIR)
+        os.makedirs(out_dir, exist_ok=True)
+        picks = random.sample(range(len(self.current)),
+                              min(self.settings['samples'], len(self.current)))
+        paths = []
+        for pos in picks:
+            path = os.path.join(
+                out_dir, f"gen_{self.generation:05d}_cat_{self.current_ids[pos]}.png"
+            )
+            self.current[pos].generate_image(retain=False).save(path)
+            paths.append(path)
+        return paths
+
+    def run(self, generations: int = SIMULATION_SETTINGS['generations'],
+            on_generation: Optional[Callable[[Dict[str, Any]], None]] = None
+            ) -> Dict[str, Any]:
+        """
+        Breed until ``generations`` generations follow the founders.
+
+        Returns a summary of the final generation.
+        """
+        started = time.perf_counter()
+        if self.generation < 0:
+            self._founders()
+        while self.generation < generations:
+            t0 = time.perf_counter()
+            with stage('simulate_generation', generation=self.generation + 1):
+                self.step()
+            every = self.settings['sample_every']
+            samples = self.render_samples() if every and self.generation % every == 0 else []
+            if (self.generation % self.settings['checkpoint_every'] == 0
+                    or self.generation == generations):
+                self.checkpoint()
+            info = self.summary()
+            info.update(seconds=time.perf_counter() - t0, samples=samples)
+            logger.info(
+                f"Gen {info['generation']}: {info['cats']} cats, "
+                f"mean F {info['mean_inbreeding']:.4f}, {info['seconds']:.2f}s"
+            )
+            if on_generation is not None:
+                on_generation(info)
+        summary = self.summary()
+        summary['seconds'] = time.perf_counter() - started
+        return summary
+
+    def summary(self) -> Dict[str, Any]:
+        inbreeding = [self.lineage.inbreeding(i) for i in self.current_ids]
+        return {
+            'generation': self.generation,
+            'cats': len(self.current),
+            'archived': len(self.archive),
+            'mean_inbreeding': sum(inbreeding) / len(inbreeding) if inbreeding else 0.0,
+            'main_colors': len({cat.color for cat in self.current}),
+        }
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Simulate an open cat population over many generations "
+                    "(rerun to resume from the last checkpoint)"
+    )
+    parser.add_argument('--out-dir', default=SIMULATION_SETTINGS['out_dir'],
+                        help=f"Run directory (default: {SIMULATION_SETTINGS['out_dir']})")
+    parser.add_argument('--generations', type=int,
+                        default=SIMULATION_SETTINGS['generations'],
+                        help="Generations after the founders "
+                             f"(default: {SIMULATION_SETTINGS['generations']})")
+    parser.add_argument('--population', type=int,
+                        default=SIMULATION_SETTINGS['population'],
+                        help=f"Cats per generation (default: {SIMULATION_SETTINGS['population']})")
+    parser.add_argument('--mating', choices=list(MATING_STRATEGIES),
+                        default=SIMULATION_SETTINGS['mating'],
+                        help=f"Mate selection (default: {SIMULATION_SETTINGS['mating']})")
+    parser.add_argument('--samples', type=int, default=SIMULATION_SETTINGS['samples'],
+                        help="Cats rendered every --sample-every generations "
+                             f"(default: {SIMULATION_SETTINGS['samples']})")
+    parser.add_argument('--sample-every', type=int,
+                        default=SIMULATION_SETTINGS['sample_every'],
+                        help=f"(default: {SIMULATION_SETTINGS['sample_every']}; 0 = never)")
+    parser.add_argument('--rng-seed', type=int, default=None,
+                        help="Random seed for a new run (ignored when resuming)")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    for name in ('cat', 'image_processing', 'genome_archive'):
+        logging.getLogger(name).setLevel(logging.WARNING)
+    if args.rng_seed is not None:
+        random.seed(args.rng_seed)
+    sim = Simulation(args.out_dir, population=args.population, mating=args.mating,
+                     samples=args.samples, sample_every=args.sample_every)
+    summary = sim.run(args.generations)
+    print(f"Generation {summary['generation']}: {summary['cats']} cats, "
+          f"{summary['archived']} archived, mean inbreeding "
+          f"{summary['mean_inbreeding']:.4f}, {summary['main_colors']} main colors "
+          f"({summary['seconds']:.1f}s)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
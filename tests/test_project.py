@@ -1,3 +1,4 @@
+import random
 from pathlib import Path
 from cats_colors import CATS_COLORS
 from config import (
@@ -340,3 +341,1413 @@ class TestSeeds:
         assert loaded['cats'][0]['color'] == [10, 20, 30]
         assert loaded['cats'][0]['parts']['body'] == 'body_3'
 
+    def test_concurrent_appends_get_unique_ids(self, tmp_path):
+        import multiprocessing
+        from concurrent.futures import ThreadPoolExecutor
+        from seeds import SeedWriter, append_seed, list_seeds
+
+        path = str(tmp_path / 'seeds.json')
+        def cats(i):
+            return [{'name': 'Cat', 'color': [i, 2, 3], 'parts': {}}]
+
+        ctx = multiprocessing.get_context('spawn')
+        procs = [ctx.Process(target=append_seed, args=(cats(100 + i), path))
+                 for i in range(4)]
+        for p in procs:
+            p.start()
+        with SeedWriter(path, max_delay=0.01) as writer:
+            with ThreadPoolExecutor(8) as pool:
+                ids = list(pool.map(lambda i: writer.append(cats(i)), range(40)))
+        for p in procs:
+            p.join()
+            assert p.exitcode == 0
+
+        seeds = list_seeds(path)
+        assert len(set(ids)) == 40
+        assert sorted(s['id'] for s in seeds) == list(range(1, 45))
+        assert not list(tmp_path.glob('*.tmp'))
+
+    def test_seed_index_queries_and_rejects_duplicates(self, tmp_path):
+        import json
+        import pytest
+        from unittest.mock import patch
+        import seed_index
+        from seed_index import DuplicateSeedError, find_seeds, load_index
+        from seeds import append_seed, load_store, make_cat_snapshot, save_store
+
+        path = str(tmp_path / 'seeds.json')
+
+        def gen0(body, color, first_name):
+            refs = {'ear': 'ear_1', 'eyes': 'eyes_1', 'body': body,
+                    'tail': 'tail_1', 'legs': 'legs_1'}
+            return [make_cat_snapshot(first_name if i == 0 else f'Cat{i}',
+                                      color, refs) for i in range(8)]
+
+        append_seed(gen0('body_3', (175, 238, 238), 'Luna'), filepath=path)
+        append_seed(gen0('body_3', (230, 230, 250), 'Milo'), filepath=path)
+        append_seed(gen0('body_2', (175, 238, 238), 'Luna'), filepath=path)
+
+        assert find_seeds(['body_3', '#AFEEEE'], path) == ['#1: Luna, ' + ', '.join(
+            f'Cat{i}' for i in range(1, 8))]
+        assert load_index(path).query(names=['luna']) == [1, 3]
+        assert load_index(path).query(parts=['body_3'], names=['Nobody']) == []
+
+        # Same colors and parts (names don't matter) is a duplicate
+        with pytest.raises(DuplicateSeedError) as excinfo:
+            append_seed(gen0('body_2', (175, 238, 238), 'Other'), filepath=path)
+        assert excinfo.value.seed_id == 3
+        assert len(load_store(path)['seeds']) == 3
+
+        # Editing the store by hand makes the index rebuild itself
+        store = load_store(path)
+        store['seeds'].pop()
+        save_store(store, path)
+        assert load_index(path).query(names=['Luna']) == [1]
+        with open(str(tmp_path / 'seeds.index.json'), encoding='utf-8') as f:
+            assert '3' not in json.load(f)['seeds']
+
+        # A writer committing while an unlocked reader rebuilds is not lost
+        real_load_store = seed_index.load_store
+
+        def racing_load_store(filepath):
+            store = real_load_store(filepath)
+            append_seed(gen0('body_4', (1, 2, 3), 'Late'), filepath=path)
+            return store
+
+        save_store(load_store(path), path)  # index now stale
+        with patch('seed_index.load_store', racing_load_store):
+            find_seeds(['Late'], path)
+        assert load_index(path).query(names=['Late']) == [3]
+
+    def test_validate_seeds_reports_problems(self, tmp_path):
+        from seeds import (
+            append_seed, load_store, make_cat_snapshot, save_store, validate_seeds,
+        )
+
+        path = str(tmp_path / 'seeds.json')
+        refs = {
+            'ear': 'ear_1', 'eyes': 'eyes_2', 'body': 'body_3',
+            'tail': 'tail_4', 'legs': 'legs_5',
+        }
+        cats = [make_cat_snapshot(f'Cat{i}', (10, 20, 30), refs) for i in range(8)]
+        append_seed(cats, filepath=path)
+        assert validate_seeds(path) == []
+
+        cats[0]['color'] = [300, 0, 0]
+        cats[1]['parts']['body'] = 'body_999'
+        append_seed(cats, filepath=path)
+        problems = validate_seeds(path)
+        assert len(problems) == 2
+        assert 'seed #2 cat 1: color' in problems[0]
+        assert 'body_999' in problems[1]
+
+        # Unnamed cats load fine; non-object seeds and cats are reported
+        store = load_store(path)
+        for cat in store['seeds'][0]['cats']:
+            del cat['name']
+        store['seeds'][0]['cats'][2] = 'Cat2'
+        store['seeds'].append(['not', 'a', 'seed'])
+        save_store(store, path)
+        assert validate_seeds(path)[0] == 'seed #1 cat 3: must be an object'
+        assert validate_seeds(path)[-1] == 'seed [2]: must be an object'
+        assert len(validate_seeds(path)) == 4
+
+    def test_seed_commands_skip_heavy_imports(self):
+        from benchmarks.startup import measure_command
+
+        row = measure_command(['--list-seeds'])
+        assert row['returncode'] == 0
+        assert row['heavy'] == []
+
+
+
+def _make_family(seed=7):
+    """Build a real 15-cat pedigree from the bundled parts (not rendered)."""
+    from image_processing import ImageLoader, CatImageBuilder
+    from cat import CatFamily
+
+    random.seed(seed)
+    parts_images = ImageLoader().load_all_parts()
+    family = CatFamily([f"{i} Cat{i}" for i in range(40)])
+    parents = [
+        family.create_parent(
+            (100 + i, 150, 200),
+            CatImageBuilder.choose_random_parts(parts_images)[0],
+        )
+        for i in range(8)
+    ]
+    kittens = [
+        family.create_kitten(parents[i], parents[i + 1])
+        for i in range(0, 8, 2)
+    ]
+    gk1 = family.create_grandkitten(kittens[0], kittens[1])
+    gk2 = family.create_grandkitten(kittens[2], kittens[3])
+    ggk = family.create_grandkitten(gk1, gk2)
+    pedigree = {
+        'pairs': [
+            (parents[i * 2], parents[i * 2 + 1], kittens[i])
+            for i in range(4)
+        ],
+        'grandkittens': [gk1, gk2],
+        'great_grandkitten': ggk,
+    }
+    return family, pedigree, parts_images
+
+
+class TestPedigreeRendering:
+    """Test memory-bounded pedigree rendering"""
+
+    def test_image_size_matches_render(self):
+        """Planned size from part metadata equals the rendered size"""
+        from image_processing import FamilyLayoutBuilder
+
+        _family, pedigree, _parts = _make_family()
+        for cat in FamilyLayoutBuilder.flatten_pedigree(pedigree):
+            assert cat.image_size() == cat.generate_image(retain=False).size
+            assert cat.image is None
+
+    def test_lazy_pedigree_matches_eager(self):
+        """Rendering cats lazily gives the same canvas as pre-rendered images"""
+        from image_processing import FamilyLayoutBuilder
+
+        _family, pedigree, _parts = _make_family()
+
+        random.seed(11)
+        lazy = FamilyLayoutBuilder.create_pedigree_image(pedigree)
+        entries = FamilyLayoutBuilder.flatten_pedigree(pedigree)
+        assert all(cat.image is None for cat in entries)
+
+        random.seed(11)
+        images = [cat.generate_image() for cat in entries]
+        eager = FamilyLayoutBuilder.create_pedigree_image({
+            'pairs': [tuple(images[i * 3:i * 3 + 3]) for i in range(4)],
+            'grandkittens': images[12:14],
+            'great_grandkitten': images[14],
+        })
+        assert lazy.size == eager.size
+        assert lazy.tobytes() == eager.tobytes()
+
+    def test_tight_layout_packs_without_overlap(self):
+        """Tight layout is smaller than the grid and never overlaps cats"""
+        from image_processing import FamilyLayoutBuilder, PEDIGREE_COLUMNS
+
+        sizes = [(400, 500 + 20 * (i % 4)) for i in range(15)]
+        sizes[14] = (420, 900)  # one tall cat must not inflate every slot
+        grid = FamilyLayoutBuilder.plan_layout(sizes, 'grid')
+        tight = FamilyLayoutBuilder.plan_layout(sizes, 'tight')
+
+        assert tight.width * tight.height < grid.width * grid.height
+        for column in PEDIGREE_COLUMNS:
+            boxes = sorted((tight.boxes[i] for i in column), key=lambda b: b[1])
+            for upper, lower in zip(boxes, boxes[1:]):
+                assert upper[1] + upper[3] <= lower[1]
+        assert all(y >= 0 and y + h <= tight.height for _x, y, _w, h in tight.boxes)
+
+
+class TestFamilyGraph:
+    """Test incremental pedigree recomputation"""
+
+    def test_founder_change_recomputes_only_descendants(self):
+        from family_graph import FamilyGraph
+
+        family, pedigree, _parts = _make_family()
+        graph = FamilyGraph(family, pedigree)
+        first = graph.render().copy()
+        before = list(graph.nodes)
+
+        graph.set_founder(0, color=(10, 200, 30))
+        assert graph.dirty == {0, 2, 12, 14}
+        canvas = graph.render()
+
+        changed = {i for i, cat in enumerate(graph.nodes) if cat is not before[i]}
+        assert changed == {0, 2, 12, 14}
+        assert graph.nodes[0].color == (10, 200, 30)
+        assert graph.nodes[2].parent1 is graph.nodes[0]
+        assert graph.nodes[0] in family.all_cats and before[0] not in family.all_cats
+        # Untouched cells keep their pixels
+        x, y, w, h = graph.layout.boxes[1]
+        assert canvas.crop((x, y, x + w, y + h)).tobytes() == \
+            first.crop((x, y, x + w, y + h)).tobytes()
+
+    def test_reroll_generation_keeps_ancestors(self):
+        from family_graph import FamilyGraph
+
+        family, pedigree, _parts = _make_family()
+        graph = FamilyGraph(family, pedigree)
+        graph.render()
+        before = list(graph.nodes)
+
+        graph.reroll_generation(3)
+        assert graph.recompute() == {14}
+        assert all(graph.nodes[i] is before[i] for i in range(14))
+
+
+class TestRenderCache:
+    """Test the layered (body + label) render cache"""
+
+    def test_cached_render_matches_reference(self):
+        from render_cache import RenderCache
+        from image_processing import FamilyLayoutBuilder
+
+        _family, pedigree, _parts = _make_family()
+        cache = RenderCache()
+        for cat in FamilyLayoutBuilder.flatten_pedigree(pedigree):
+            reference = cat.render_reference()
+            cached = cat.generate_image(retain=False, cache=cache)
+            assert cached.size == reference.size
+            assert cached.tobytes() == reference.tobytes()
+
+    def test_label_restyle_keeps_body_layer(self):
+        from unittest.mock import patch
+        from config import GENERATION_PARAMS, REPLAY_CACHE_SETTINGS
+        from render_cache import RenderCache
+
+        _family, pedigree, _parts = _make_family()
+        cat = pedigree['great_grandkitten']
+        cache = RenderCache(REPLAY_CACHE_SETTINGS)
+        cat.generate_image(retain=False, cache=cache)
+        assert cache.bodies.misses == 1 and cache.labels.misses == 1
+
+        restyled = dict(GENERATION_PARAMS, swatch_size=30, text_color=(200, 0, 0))
+        with patch.dict(GENERATION_PARAMS, restyled):
+            img = cat.generate_image(retain=False, cache=cache)
+            assert img.tobytes() == cat.render_reference().tobytes()
+        assert cache.bodies.hits == 1, "Body pixels must be reused"
+        assert cache.labels.misses == 2, "Label layer must be redrawn"
+
+    def test_byte_footprint_stays_under_limit(self):
+        from image_processing import FamilyLayoutBuilder
+        from render_cache import RenderCache
+
+        settings = {'max_template_bytes': 4 * 1024 ** 2,
+                    'max_body_bytes': 6 * 1024 ** 2,
+                    'max_label_bytes': 1024 ** 2}
+        cache = RenderCache(settings)
+        default = RenderCache()
+        for seed in range(6):
+            _family, pedigree, _parts = _make_family(seed)
+            for cat in FamilyLayoutBuilder.flatten_pedigree(pedigree):
+                for target in (cache, default):
+                    cat.generate_image(retain=False, cache=target)
+                assert cache.templates.bytes <= settings['max_template_bytes']
+                assert cache.bodies.bytes <= settings['max_body_bytes']
+                assert cache.labels.bytes <= settings['max_label_bytes']
+        assert len(cache.bodies) > 0 and cache.bodies.misses > len(cache.bodies), \
+            "Body layer must have evicted entries"
+        assert cache.bytes == sum(s['bytes'] for s in cache.stats().values())
+        assert len(default.bodies) == len(default.labels) == 0, \
+            "Bodies and labels are opt-in"
+        assert default.templates.misses > 0
+
+    def test_libraries_sharing_refs_do_not_share_entries(self, tmp_path):
+        import shutil
+        from PIL import Image, ImageOps
+        from image_processing import ImageLoader
+        from render_cache import RenderCache
+
+        shutil.copytree('parts', tmp_path / 'parts')
+        path = tmp_path / 'parts' / 'body' / '1.png'
+        with Image.open(path) as img:
+            ImageOps.invert(img.convert('RGB')).save(path)
+
+        cache = RenderCache()
+        templates = []
+        for library in (ImageLoader(), ImageLoader(str(tmp_path))):
+            parts = {locus: images['1'] for locus, images in library.load_all_parts().items()}
+            templates.append(cache.template(parts))
+        assert cache.templates.misses == 2
+        assert templates[0].tobytes() != templates[1].tobytes()
+
+        untagged = {
+            locus: Image.frombytes('RGB', img.size, img.tobytes())
+            for locus, img in parts.items()
+        }
+        assert cache.template(untagged).tobytes() == templates[1].tobytes()
+        assert len(cache.templates) == 2, "Images without a source are not cached"
+
+
+class TestRenderService:
+    """Test the local HTTP render service"""
+
+    @staticmethod
+    def _genome():
+        return {
+            'name': 'Luna',
+            'generation': 1,
+            'parts': {
+                'ear': 'ear_1', 'eyes': 'eyes_2', 'body': 'body_3',
+                'tail': 'tail_4', 'legs': 'legs_5',
+            },
+            'colors': [
+                {'color': [114, 207, 190], 'strength': 3.5},
+                {'color': [255, 182, 193], 'strength': 1.5},
+            ],
+        }
+
+    def test_endpoints_return_png(self):
+        import http.client
+        import json
+        import socket
+        import threading
+        import urllib.request
+        from service import RenderService, make_server
+
+        service = RenderService(workers=2, max_queue=2)
+        server = make_server(service, '127.0.0.1', 0)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        base = f"http://127.0.0.1:{server.server_address[1]}"
+        try:
+            request = urllib.request.Request(
+                f"{base}/cat",
+                data=json.dumps(self._genome()).encode('utf-8'),
+                headers={'Content-Type': 'application/json'},
+            )
+            with urllib.request.urlopen(request) as response:
+                assert response.headers['Content-Type'] == 'image/png'
+                assert response.read().startswith(b'\x89PNG')
+
+            with urllib.request.urlopen(f"{base}/family/random") as response:
+                assert response.read().startswith(b'\x89PNG')
+
+            with urllib.request.urlopen(f"{base}/health") as response:
+                assert json.load(response)['status'] == 'ok'
+
+            no_strength = dict(self._genome(), colors=[{'color': [1, 2, 3]}])
+            for bad in (dict(self._genome(), parts={'ear': 'ear_1'}), no_strength):
+                request = urllib.request.Request(
+                    f"{base}/cat", data=json.dumps(bad).encode('utf-8'),
+                )
+                try:
+                    urllib.request.urlopen(request)
+                    assert False, "Malformed genome must be rejected"
+                except urllib.error.HTTPError as e:
+                    assert e.code == 400
+
+            try:
+                urllib.request.urlopen(f"{base}/family/seed/999999")
+                assert False, "Unknown seed must be 404"
+            except urllib.error.HTTPError as e:
+                assert e.code == 404
+
+            for length, status in (('lots', 400), ('\u00b2', 400), ('10000000', 413)):
+                conn = http.client.HTTPConnection('127.0.0.1', server.server_address[1])
+                conn.putrequest('POST', '/cat')
+                conn.putheader('Content-Length', length)
+                conn.endheaders()
+                assert conn.getresponse().status == status
+                conn.close()
+
+            # A superscript digit passes str.isdigit() but not int()
+            with socket.create_connection(server.server_address[:2]) as sock:
+                sock.sendall(b"GET /family/seed/\xb2 HTTP/1.0\r\n\r\n")
+                assert sock.makefile('rb').readline().split()[1] == b'400'
+        finally:
+            server.shutdown()
+            server.server_close()
+            service.shutdown()
+
+    def test_full_queue_is_rejected(self):
+        import threading
+        from service import RenderService, ServiceBusy
+
+        service = RenderService(workers=1, max_queue=0)
+        release = threading.Event()
+        started = threading.Event()
+
+        def slow() -> bytes:
+            started.set()
+            release.wait(5)
+            return b''
+
+        worker = threading.Thread(target=service._run, args=(slow,))
+        worker.start()
+        started.wait(5)
+        try:
+            try:
+                service.single_cat(self._genome())
+                assert False, "Second render must be rejected while queue is full"
+            except ServiceBusy:
+                pass
+        finally:
+            release.set()
+            worker.join()
+            service.shutdown()
+
+
+class TestProfiling:
+    """Test per-stage profiling hooks"""
+
+    def test_profiler_records_stages_and_writes_trace(self, tmp_path):
+        import json
+        from profiling import Profiler, enabled
+        from image_processing import FamilyLayoutBuilder
+
+        _family, pedigree, _parts = _make_family()
+        assert not enabled()
+        with Profiler() as profiler:
+            FamilyLayoutBuilder.create_pedigree_image(pedigree)
+        assert not enabled()
+
+        summary = profiler.summary()
+        assert summary['render_cat']['count'] == 15
+        assert summary['create_pedigree_image']['count'] == 1
+
+        trace = json.loads(
+            Path(profiler.write_chrome_trace(str(tmp_path / 'trace.json'))).read_text()
+        )
+        names = {event['name'] for event in trace['traceEvents']}
+        assert {'render_cat', 'create_pedigree_image'} <= names
+        assert all(event['ph'] == 'X' for event in trace['traceEvents'])
+
+    def test_failed_run_still_writes_partial_trace(self, tmp_path, capsys):
+        import json
+        import sys
+        from unittest.mock import patch
+        import main
+        from profiling import enabled
+
+        trace_path = tmp_path / 'trace.json'
+        argv = ['main.py', '--no-save-seed', '--profile', str(trace_path),
+                '-o', str(tmp_path / 'out.png')]
+        with patch.object(sys, 'argv', argv), \
+                patch('main.save_family_image', side_effect=RuntimeError('disk full')):
+            assert main.main() == 1
+        assert not enabled(), "Profiler hook must be removed"
+        names = {e['name'] for e in json.loads(trace_path.read_text())['traceEvents']}
+        assert 'generate_cat_family' in names or 'load_all_parts' in names
+        assert 'Partial Chrome trace' in capsys.readouterr().out
+
+    def test_disabled_stage_is_shared_noop(self):
+        from profiling import stage
+
+        assert stage('a') is stage('b', cat='x')
+
+
+class TestMetrics:
+    """Test the cumulative metrics registry"""
+
+    def test_counters_merge_across_threads(self):
+        import threading
+        from metrics import MetricsRegistry
+
+        registry = MetricsRegistry()
+
+        def work():
+            for _ in range(1000):
+                registry.inc('families_total')
+                registry.observe('stage_seconds', 0.02, stage='render_cat')
+
+        threads = [threading.Thread(target=work) for _ in range(4)]
+        for t in threads:
+            t.start()
+        for t in threads:
+            t.join()
+
+        snap = registry.to_json()
+        assert snap['counters']['families_total'] == 4000
+        latency = snap['histograms']['stage_seconds{stage=render_cat}']
+        assert latency['count'] == 4000
+        assert latency['p50'] == 0.025  # upper bound of the 20 ms bucket
+
+        text = registry.to_prometheus()
+        assert 'catgen_families_total 4000' in text
+        assert 'catgen_stage_seconds_count{stage="render_cat"} 4000' in text
+
+    def test_mutation_is_counted(self):
+        from cat import Cat, Gene, maybe_add_mutation_gene
+        from metrics import REGISTRY
+        from unittest.mock import MagicMock, patch
+
+        def fake_cat(generation, colors):
+            cat = MagicMock(spec=Cat)
+            cat.generation = generation
+            cat.color_genes = [Gene(c, 1.0) for c in colors]
+            cat.parent1 = None
+            cat.parent2 = None
+            return cat
+
+        def mutations():
+            return REGISTRY.to_json()['counters'].get('mutations_total', 0)
+
+        before = mutations()
+        with patch('cat.random.random', return_value=0.0):
+            maybe_add_mutation_gene(
+                [Gene((1, 1, 1), 2.0)], fake_cat(0, [(2, 2, 2)]),
+                fake_cat(0, [(3, 3, 3)]),
+            )
+        assert mutations() == before + 1
+
+
+class TestMemory:
+    """Test memory instrumentation and budgets"""
+
+    def test_tracker_attributes_peak_to_inner_stage(self):
+        import numpy as np
+        from memory import MemoryTracker, parse_size
+        from profiling import stage
+
+        assert parse_size('512M') == 512 * 1024 ** 2
+        assert parse_size('2g') == 2 * 1024 ** 3
+
+        with MemoryTracker() as tracker:
+            with stage('create_pedigree_image'):
+                with stage('apply_color_numpy'):
+                    big = np.ones(4 * 1024 ** 2, dtype=np.uint8)
+                    del big
+                with stage('add_cat_label'):
+                    small = np.ones(1024, dtype=np.uint8)
+                    del small
+
+        report = tracker.phase_report()
+        assert report['recolor']['max_growth'] >= 4 * 1024 ** 2
+        assert report['label']['max_growth'] < 1024 ** 2
+        assert report['layout']['peak_traced'] >= report['recolor']['peak_traced']
+        assert tracker.culprit() == 'apply_color_numpy'
+
+    def test_budget_switches_layout_or_fails_early(self, tmp_path):
+        import pytest
+        from config import GENERATION_PARAMS, RENDER_CACHE_SETTINGS
+        from image_processing import FamilyLayoutBuilder
+        from memory import (
+            MemoryBudgetExceeded, budget_settings, current_rss,
+            estimate_render_bytes, peak_rss, plan_within_budget,
+        )
+        from unittest.mock import patch
+
+        _family, pedigree, _parts = _make_family()
+        saved = GENERATION_PARAMS['layout_mode'], RENDER_CACHE_SETTINGS['enabled']
+        try:
+            GENERATION_PARAMS['layout_mode'] = 'grid'
+            with patch('memory.current_rss', return_value=0):
+                with pytest.raises(MemoryBudgetExceeded):
+                    plan_within_budget(pedigree, 1024)
+                assert GENERATION_PARAMS['layout_mode'] == 'grid'
+
+                # Budget between the tight and grid estimates -> tight, no cache
+                entries = FamilyLayoutBuilder.flatten_pedigree(pedigree)
+                needed = {}
+                for mode in ('grid', 'tight'):
+                    sizes = [FamilyLayoutBuilder.entry_size(e, mode) for e in entries]
+                    layout = FamilyLayoutBuilder.plan_layout(sizes, mode)
+                    needed[mode] = estimate_render_bytes(
+                        (layout.width, layout.height), sizes
+                    )
+                assert needed['tight'] < needed['grid']
+                plan = plan_within_budget(pedigree, needed['tight'])
+                assert plan == {'layout_mode': 'tight', 'render_cache': False}
+                assert GENERATION_PARAMS['layout_mode'] == 'grid', \
+                    "Planning must not change the global settings"
+                with budget_settings(plan):
+                    assert GENERATION_PARAMS['layout_mode'] == 'tight'
+                    assert RENDER_CACHE_SETTINGS['enabled'] is False
+                assert GENERATION_PARAMS['layout_mode'] == 'grid'
+                assert RENDER_CACHE_SETTINGS['enabled'] == saved[1]
+
+                # A montage page that would not fit stops before drawing
+                from montage import MontageWriter
+                writer = MontageWriter(str(tmp_path / 'sheet.png'), budget=1024)
+                writer.add(pedigree)
+                with pytest.raises(MemoryBudgetExceeded):
+                    writer.close()
+                assert writer.pages == []
+            assert current_rss() is None or current_rss() > 0
+            assert peak_rss() is None or peak_rss() >= (current_rss() or 0) - 2 ** 20
+        finally:
+            GENERATION_PARAMS['layout_mode'], RENDER_CACHE_SETTINGS['enabled'] = saved
+
+    def test_budget_alone_checks_rss_without_tracemalloc(self):
+        import argparse
+        import tracemalloc
+        import pytest
+        from main import _memory_size
+        from memory import MemoryBudgetExceeded, MemoryTracker
+        from profiling import stage
+        from unittest.mock import patch
+
+        with pytest.raises(argparse.ArgumentTypeError):
+            _memory_size('0')
+        tracker = MemoryTracker(budget=1024, trace_heap=False).start()
+        try:
+            assert not tracemalloc.is_tracing()
+            with patch('memory.current_rss', return_value=512):
+                with stage('save_png'):
+                    pass
+            with patch('memory.current_rss', return_value=2048):
+                with pytest.raises(MemoryBudgetExceeded):
+                    with stage('save_png'):
+                        pass
+        finally:
+            tracker.stop()
+
+
+class TestBenchmarks:
+    """Test the benchmark suite's baseline comparison"""
+
+    def test_compare_flags_regressions_beyond_threshold(self):
+        from benchmarks.suite import compare
+
+        def report(**medians):
+            return {'results': {k: {'median_ms': v} for k, v in medians.items()}}
+
+        rows = compare(
+            report(combine_parts=10.0, apply_color_numpy=100.0, add_cat_label=2.0),
+            report(combine_parts=10.5, apply_color_numpy=125.0, add_cat_label=1.0,
+                   build_color_map=0.02),
+            threshold=10.0,
+        )
+        status = {row['name']: row['status'] for row in rows}
+        assert status == {
+            'combine_parts': 'ok',
+            'apply_color_numpy': 'regression',
+            'add_cat_label': 'improved',
+            'build_color_map': 'new',
+        }
+
+    def test_suite_runs_selected_benchmarks(self):
+        from benchmarks.suite import run_suite
+
+        report = run_suite(['build_color_map', 'inherit_color_genes'], repeat=1)
+        assert set(report['results']) == {'build_color_map', 'inherit_color_genes'}
+        assert all(r['median_ms'] > 0 for r in report['results'].values())
+
+    def test_synthetic_library_uses_only_template_grays(self, tmp_path):
+        import numpy as np
+        from benchmarks.synthetic_parts import BACKGROUND, OUTLINE, generate_library
+        from image_processing import ImageLoader
+
+        generate_library(str(tmp_path), count=3, scale=0.25, distribution='skewed')
+        parts_images = ImageLoader(str(tmp_path)).load_all_parts()
+
+        allowed = set(GRAY_COLORS) | {BACKGROUND, OUTLINE}
+        assert {locus: len(by_id) for locus, by_id in parts_images.items()} == {
+            locus: 3 for locus in CAT_PARTS_FOLDERS
+        }
+        for by_id in parts_images.values():
+            for img in by_id.values():
+                pixels = np.unique(np.array(img).reshape(-1, 3), axis=0)
+                assert {tuple(p) for p in pixels.tolist()} <= allowed
+
+
+class TestGoldenImages:
+    """Test the golden-image equivalence checker"""
+
+    def test_fast_paths_match_reference(self, tmp_path):
+        from golden import build_corpus, run_check
+        from main import load_cat_names
+
+        _family, _pedigree, parts_images = _make_family()
+        corpus = build_corpus(parts_images, load_cat_names(), seed_ids=[],
+                              random_families=1)
+        report = run_check(corpus, ['render_cache', 'pedigree_canvas'],
+                           out_dir=str(tmp_path))
+        assert report.passed, [c.case for c in report.failures]
+        assert len(report.comparisons) == 16  # 15 cats + 1 canvas
+        assert not list(tmp_path.iterdir())
+
+    def test_mismatch_writes_diff_image(self, tmp_path):
+        from PIL import ImageDraw
+        from golden import ENGINES, Engine, compare_images, run_check
+        from unittest.mock import patch
+
+        def broken(cat):
+            img = cat.render_reference()
+            ImageDraw.Draw(img).rectangle((0, 0, 9, 9), fill=(255, 0, 0))
+            return img
+
+        _family, pedigree, _parts = _make_family()
+        with patch.dict(ENGINES, {'broken': Engine('broken', 'cat', broken)}):
+            report = run_check([('fam', pedigree)], ['broken'], out_dir=str(tmp_path))
+
+        assert len(report.failures) == 15
+        failure = report.failures[0]
+        assert failure.mismatched > 0 and failure.max_diff > 0
+        assert Path(failure.diff_path).exists()
+
+        img = pedigree['great_grandkitten'].render_reference()
+        lossy = Engine('lossy', 'cat', broken, lossy=True, tolerance=1.0)
+        assert compare_images(img, broken(pedigree['great_grandkitten']),
+                              'ggk', lossy).passed
+
+
+class TestPartsWatcher:
+    """Test hot reload of the parts library"""
+
+    def test_poll_swaps_index_and_invalidates_dependents(self, tmp_path):
+        import os
+        import shutil
+        from PIL import ImageDraw
+        from parts_watcher import PartsWatcher
+        from render_cache import RenderCache
+
+        shutil.copytree('parts', tmp_path / 'parts')
+        cache = RenderCache()
+        watcher = PartsWatcher(str(tmp_path), caches=[cache])
+        old_index = watcher.parts_images
+
+        def parts_with(body_id):
+            parts = {locus: next(iter(by_id.values()))
+                     for locus, by_id in old_index.items()}
+            parts['body'] = old_index['body'][body_id]
+            return parts
+
+        cache.template(parts_with('1'))
+        cache.template(parts_with('2'))
+        assert watcher.poll() == {'added': [], 'changed': [], 'removed': []}
+
+        body_path = tmp_path / 'parts' / 'body' / '1.png'
+        edited = old_index['body']['1'].copy()
+        ImageDraw.Draw(edited).rectangle((0, 0, 20, 20), fill=(0, 0, 0))
+        edited.save(body_path)
+        stat = os.stat(body_path)
+        os.utime(body_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10 ** 9))
+        shutil.copy(tmp_path / 'parts' / 'ear' / '1.png',
+                    tmp_path / 'parts' / 'ear' / '99.png')
+        shutil.copy(tmp_path / 'parts' / 'ear' / '1.png',
+                    tmp_path / 'parts' / 'ear' / '77.PNG')
+        os.remove(tmp_path / 'parts' / 'eyes' / '8.png')
+        (tmp_path / 'parts' / 'tail' / '50.png').write_bytes(b'not a png yet')
+
+        changes = watcher.poll()
+        changes['added'].sort()
+        assert changes == {
+            'added': ['ear_77', 'ear_99'], 'changed': ['body_1'], 'removed': ['eyes_8'],
+        }
+        new_index = watcher.parts_images
+        assert new_index is not old_index
+        assert '8' in old_index['eyes'] and '8' not in new_index['eyes']
+        assert new_index['ear']['99'].info['part_ref'] == 'ear_99'
+        assert new_index['ear']['77'].info['part_ref'] == 'ear_77'
+        assert new_index['legs'] is old_index['legs']  # untouched loci shared
+        assert '50' not in new_index['tail']
+        # Only the template built from body_1 was dropped
+        assert len(cache.templates) == 1
+        assert watcher.poll()['added'] == []
+
+        # A render that still holds the old body_1 stores under the old key
+        stale = cache.template(parts_with('1'))
+        fresh_parts = dict(parts_with('1'), body=new_index['body']['1'])
+        assert cache.template(fresh_parts).tobytes() != stale.tobytes()
+
+
+class TestLitters:
+    """Test batch litter generation"""
+
+    def test_litter_matches_single_kitten_sampling(self):
+        from cat import CatFamily, cat_to_genome
+        from main import load_cat_names
+
+        family, pedigree, _parts = _make_family()
+        parent1, parent2 = pedigree['grandkittens']
+        names = load_cat_names()
+
+        random.seed(11)
+        single = CatFamily(names).create_grandkitten(parent1, parent2, 'Solo')
+        random.seed(11)
+        litter = CatFamily(names).create_litter(parent1, parent2, 3, ['Solo'])
+
+        assert len(litter) == 3
+        assert {cat.generation for cat in litter} == {3}
+        first = cat_to_genome(litter[0])
+        assert first == cat_to_genome(single)
+        assert all(cat.parent1 is parent1 for cat in litter)
+
+    def test_litter_and_grandkitten_agree_on_mixed_generations(self):
+        from cat import CatFamily, cat_to_genome
+        from main import load_cat_names
+
+        _family, pedigree, _parts = _make_family()
+        parent, _mate, kitten = pedigree['pairs'][0]
+        grandkitten, ggk = pedigree['grandkittens'][0], pedigree['great_grandkitten']
+        names = load_cat_names()
+
+        for pair, expected in (((parent, kitten), 2), ((kitten, grandkitten), 2),
+                               ((grandkitten, ggk), 3), ((ggk, ggk), 3)):
+            single_family, litter_family = CatFamily(names), CatFamily(names)
+            random.seed(5)
+            single = single_family.create_grandkitten(*pair)
+            random.seed(5)
+            litter = litter_family.create_litter(*pair, 1)
+            assert single.generation == litter[0].generation == expected
+            assert cat_to_genome(single) == cat_to_genome(litter[0])
+            assert single.name.startswith('GrandKitten ')
+            assert single_family.grandkittens == [single]
+            assert litter_family.grandkittens == litter
+
+    def test_render_litter_shares_templates(self):
+        from cat import CatFamily, render_litter
+        from main import load_cat_names
+        from render_cache import RenderCache
+
+        family, pedigree, _parts = _make_family()
+        parent1, parent2, _kitten = pedigree['pairs'][0]
+        random.seed(5)
+        litter = CatFamily(load_cat_names()).create_litter(parent1, parent2, 6)
+
+        cache = RenderCache()
+        images = render_litter(litter, cache)
+        for cat, img in zip(litter, images):
+            assert img.tobytes() == cat.render_reference().tobytes()
+        distinct_parts = {tuple(sorted(cat.part_genes[l].value.info['part_ref']
+                                       for l in cat.part_genes)) for cat in litter}
+        assert cache.stats()['templates']['misses'] == len(distinct_parts)
+
+
+class TestSampling:
+    """Statistical checks: new samplers match the original algorithms"""
+
+    @staticmethod
+    def _chi_square(counts, expected_probs, n):
+        return sum(
+            (counts.get(outcome, 0) - n * p) ** 2 / (n * p)
+            for outcome, p in expected_probs.items()
+        ) + sum(
+            1e9 for outcome in counts if outcome not in expected_probs
+        )
+
+    def test_weighted_sample_matches_sequential_draws(self):
+        from collections import Counter
+        from itertools import permutations
+        from sampling import weighted_sample
+
+        weights = {'a': 5.0, 'b': 3.0, 'c': 1.0, 'd': 0.5, 'z1': 0.0, 'z2': -1.0}
+        k = 4
+
+        # Exact ordered-outcome probabilities of the original algorithm:
+        # one random.choices draw at a time, uniform once weights run out
+        expected = {}
+        for order in permutations(weights, k):
+            p, left = 1.0, dict(weights)
+            for item in order:
+                total = sum(max(w, 0.0) for w in left.values())
+                if total > 0:
+                    p *= max(left[item], 0.0) / total
+                else:
+                    p /= len(left)
+                del left[item]
+            if p > 0:
+                expected[order] = p
+
+        rng = random.Random(2024)
+        n = 40000
+        counts = Counter(
+            tuple(weighted_sample(list(weights), list(weights.values()), k, rng))
+            for _ in range(n)
+        )
+        df = len(expected) - 1
+        # Far beyond the 99.9% quantile for this df; catches real bias
+        assert self._chi_square(counts, expected, n) < df + 6 * (2 * df) ** 0.5
+
+    def test_alias_table_matches_color_count_weights(self):
+        from collections import Counter
+        from cat import pick_child_color_count
+        from sampling import alias_table
+
+        weights = dict(CHILD_COLOR_COUNT_WEIGHTS)
+        total = sum(weights.values())
+        expected = {n: w / total for n, w in weights.items() if w > 0}
+        assert alias_table(weights) is alias_table(dict(weights))  # cached
+
+        random.seed(99)
+        n = 40000
+        counts = Counter(pick_child_color_count() for _ in range(n))
+        df = len(expected) - 1
+        assert self._chi_square(counts, expected, n) < df + 6 * (2 * df) ** 0.5
+
+        skewed = alias_table({'x': 1.0, 'y': 0.0, 'w': 1e-9, 'v': 1000.0})
+        rng = random.Random(3)
+        draws = Counter(skewed.sample(rng) for _ in range(20000))
+        assert 'y' not in draws
+        assert draws['v'] > 19900
+
+    def test_color_count_table_is_rebuilt_only_on_edits(self):
+        from unittest.mock import patch
+        import cat
+        from sampling import _cached_table
+
+        weights = GENETICS_PARAMS['child_color_count_weights']
+        cat.pick_child_color_count()
+        built = _cached_table.cache_info().misses
+        for _ in range(100):
+            cat.pick_child_color_count()
+        assert _cached_table.cache_info().misses == built
+        with patch.dict(weights, {n: 0 for n in weights}):
+            weights[3] = 1
+            assert {cat.pick_child_color_count() for _ in range(50)} == {3}
+            weights[3] = 0
+            assert cat.pick_child_color_count() == 4
+        assert cat.pick_child_color_count() in weights
+        assert _cached_table.cache_info().misses <= built + 1
+
+
+class TestGallery:
+    """Incremental seed gallery export"""
+
+    def test_rerun_renders_only_changed_seeds(self, tmp_path):
+        import json
+        from gallery import export_gallery
+        from seeds import list_seeds, save_store
+
+        seeds_file = str(tmp_path / 'seeds.json')
+        seeds = list_seeds()[:2]
+        save_store({'seeds': seeds}, seeds_file)
+        out_dir = str(tmp_path / 'gallery')
+
+        stats = export_gallery(out_dir, seeds_file, workers=1, thumb_width=160)
+        assert (stats['rendered'], stats['reused']) == (2, 0)
+        stats = export_gallery(out_dir, seeds_file, workers=1, thumb_width=160)
+        assert (stats['rendered'], stats['reused']) == (0, 2)
+
+        # A renamed founder re-renders that seed; a dropped seed is removed
+        seeds[0]['cats'][0]['name'] = 'Renamed'
+        save_store({'seeds': seeds[:1]}, seeds_file)
+        stats = export_gallery(out_dir, seeds_file, workers=1, thumb_width=160)
+        assert (stats['rendered'], stats['reused'], stats['removed']) == (1, 0, 2)
+
+        with open(tmp_path / 'gallery' / 'manifest.json', encoding='utf-8') as f:
+            entries = json.load(f)['entries']
+        assert list(entries) == [str(seeds[0]['id'])]
+        assert len(list((tmp_path / 'gallery').glob('*.png'))) == 1
+        assert 'Renamed' in (tmp_path / 'gallery' / 'index.html').read_text()
+
+        # A failed re-render keeps the previous thumbnail and card
+        from unittest.mock import patch
+        seeds[0]['cats'][0]['name'] = 'Again'
+        save_store({'seeds': seeds[:1]}, seeds_file)
+        with patch('gallery.render_thumbnail', side_effect=RuntimeError('boom')):
+            stats = export_gallery(out_dir, seeds_file, workers=1, thumb_width=160)
+        assert (stats['failed'], stats['removed']) == (1, 0)
+        kept = list((tmp_path / 'gallery').glob('*.png'))
+        assert len(kept) == 1
+        assert kept[0].name in (tmp_path / 'gallery' / 'index.html').read_text()
+        stats = export_gallery(out_dir, seeds_file, workers=1, thumb_width=160)
+        assert (stats['rendered'], stats['removed']) == (1, 1)
+
+
+class TestMontage:
+    """Contact sheets rendered without full-size intermediates"""
+
+    def test_pages_match_downscaled_pedigrees(self, tmp_path):
+        import numpy as np
+        from PIL import Image
+        from image_processing import FamilyLayoutBuilder
+        from montage import MontageWriter
+
+        _family, pedigree, _parts = _make_family(seed=3)
+        _family, other, _parts = _make_family(seed=4)
+        out = str(tmp_path / 'sheet.png')
+        writer = MontageWriter(out, scale=0.25, columns=2, rows=1, gutter=10)
+        with writer:
+            writer.add(pedigree)
+            writer.add(pedigree)
+            writer.add(other)
+        assert writer.pages == [out, str(tmp_path / 'sheet_2.png')]
+        # The repeated family reuses every scaled cat
+        assert writer.scaled_cats.hits == 15
+
+        full = FamilyLayoutBuilder.create_pedigree_image(pedigree)
+        cell = (round(full.width * 0.25), round(full.height * 0.25))
+        with Image.open(out) as page:
+            assert page.size == (2 * (cell[0] + 10) + 10, cell[1] + 20)
+            tile = page.crop((10, 10, 10 + cell[0], 10 + cell[1])).convert('RGB')
+        expected = full.resize(cell, Image.LANCZOS)
+        diff = np.abs(np.asarray(tile, dtype=np.int16)
+                      - np.asarray(expected, dtype=np.int16))
+        assert diff.mean() < 6
+
+    def test_peak_memory_does_not_grow_with_family_count(self, tmp_path):
+        from memory import peak_rss
+        from montage import MontageWriter
+        from render_cache import RenderCache
+
+        if peak_rss() is None:
+            return
+        cache = RenderCache({'max_template_bytes': 8 * 1024 ** 2})
+        writer = MontageWriter(str(tmp_path / 'sheet.png'), scale=0.25,
+                               columns=2, rows=1, gutter=10,
+                               max_scaled_bytes=2 * 1024 ** 2, cache=cache)
+        peaks = []
+        with writer:
+            for seed in range(8):
+                _family, pedigree, _parts = _make_family(seed)
+                writer.add(pedigree)
+                if seed in (2, 7):
+                    peaks.append(peak_rss())
+                assert cache.bytes <= 8 * 1024 ** 2
+        assert len(cache.bodies) == len(cache.labels) == 0
+        assert writer.scaled_cats.bytes <= 2 * 1024 ** 2
+        # Caching every full-size cat would add ~80 MB over 5 more families
+        assert peaks[1] - peaks[0] < 32 * 1024 ** 2, \
+            f"Peak RSS grew by {(peaks[1] - peaks[0]) / 1024 ** 2:.0f} MB"
+
+
+class TestAnimation:
+    """Palette animations built from incremental frames"""
+
+    def test_reveal_ends_on_the_full_pedigree(self, tmp_path):
+        from PIL import Image
+        from animation import build_palette, reveal_frames, save_animation
+        from image_processing import FamilyLayoutBuilder
+
+        _family, pedigree, _parts = _make_family(seed=8)
+        frames = list(reveal_frames(pedigree, scale=1.0))
+        assert len(frames) == 4
+
+        full = FamilyLayoutBuilder.create_pedigree_image(pedigree)
+        expected = full.quantize(palette=build_palette(full),
+                                 dither=Image.Dither.NONE)
+        assert frames[-1].tobytes() == expected.tobytes()
+
+        path, count = save_animation(iter(frames), str(tmp_path / 'reveal.gif'))
+        with Image.open(path) as gif:
+            assert (gif.n_frames, gif.size) == (4, full.size)
+
+    def test_rerolls_render_only_changed_cats(self, monkeypatch):
+        from cat import Cat
+        from animation import reroll_frames
+        from family_graph import FamilyGraph
+
+        family, pedigree, _parts = _make_family(seed=9)
+        rendered = []
+        original = Cat.generate_image
+
+        def counting(self, *args, **kwargs):
+            rendered.append(self)
+            return original(self, *args, **kwargs)
+
+        monkeypatch.setattr(Cat, 'generate_image', counting)
+        frames = list(reroll_frames(FamilyGraph(family, pedigree), 4,
+                                    generation=2, scale=0.25))
+        assert len(frames) == 4
+        assert len({frame.size for frame in frames}) == 1
+        # 15 cats once, then the 3 Gen 2-3 cats per re-roll
+        assert len(rendered) == 15 + 3 * 3
+
+
+class TestJobs:
+    """Resumable JSONL job runner"""
+
+    def test_run_resumes_from_journal(self, tmp_path):
+        import json
+        from config import GENERATION_PARAMS
+        from jobs import journal_path, read_journal, run_jobs
+
+        jobs_file = tmp_path / 'jobs.jsonl'
+        lines = [
+            {'id': 'a', 'seed': 1, 'output': str(tmp_path / 'a.png'), 'rng_seed': 1},
+            {'id': 'b', 'output': str(tmp_path / 'b.jpg'), 'rng_seed': 2,
+             'overrides': {'layout_mode': 'tight'}},
+            {'id': 'bad', 'output': str(tmp_path / 'c.png'), 'colour': 1},
+        ]
+        jobs_file.write_text('\n'.join(json.dumps(job) for job in lines) + '\n')
+
+        # Interrupted after the first job: only it is journaled
+        seen = []
+
+        def stop_after_first(result):
+            seen.append(result.id)
+            raise KeyboardInterrupt
+
+        try:
+            run_jobs(str(jobs_file), workers=1, on_result=stop_after_first)
+        except KeyboardInterrupt:
+            pass
+        assert seen == ['a']
+        assert read_journal(journal_path(str(jobs_file))) == (2, set())
+
+        summary = run_jobs(str(jobs_file), workers=1)
+        assert (summary['ok'], summary['failed'], summary['skipped']) == (1, 1, 1)
+        assert (tmp_path / 'a.png').exists() and (tmp_path / 'b.jpg').exists()
+        assert read_journal(journal_path(str(jobs_file)))[0] == 4
+        assert GENERATION_PARAMS['layout_mode'] == 'grid'  # overrides undone
+
+    def test_mistyped_fields_are_rejected_per_line(self):
+        import pytest
+        from jobs import validate_job
+
+        bad = [
+            {'output': 'a.png', 'encoder': 5},
+            {'output': 'a.png', 'overrides': 3},
+            {'output': 'a.png', 'rng_seed': 'x'},
+            {'output': 'a.png', 'rng_seed': True},
+            {'output': 'a.png', 'seed': True},
+            {'output': 'a.png', 'animate': ['reveal']},
+            {'output': 'a.gif'},
+            {'output': 'a.png', 'encoder': 'bmp'},
+        ]
+        for job in bad:
+            with pytest.raises(ValueError):
+                validate_job(job)
+        assert validate_job({'output': 'a.gif', 'animate': 'reveal'})
+        assert validate_job({'output': 'a', 'encoder': 'WebP'})
+
+
+class TestGenomeArchive:
+    """Columnar population archive"""
+
+    def test_roundtrip_per_generation(self, tmp_path):
+        import numpy as np
+        from cat import cat_to_genome
+        from genome_archive import GenomeArchive
+        from image_processing import FamilyLayoutBuilder
+
+        _family, pedigree, parts = _make_family()
+        cats = FamilyLayoutBuilder.flatten_pedigree(pedigree)
+        generations = [
+            [cat for cat in cats if cat.generation == g] for g in range(4)
+        ]
+        archive = GenomeArchive(str(tmp_path / 'pop.genomes'))
+        indices = {}
+        for generation in generations:
+            for cat, idx in zip(generation, archive.append_generation(generation)):
+                indices[id(cat)] = idx
+
+        reopened = GenomeArchive(str(tmp_path / 'pop.genomes'))
+        assert len(reopened) == 15
+        assert isinstance(reopened.chunk(0)['parts'], np.memmap)
+        for cat in cats:
+            idx = indices[id(cat)]
+            assert reopened.genome(idx) == cat_to_genome(cat)
+            expected = tuple(
+                indices[id(p)] if p is not None else -1
+                for p in (cat.parent1, cat.parent2)
+            )
+            assert reopened.parents(idx) == expected
+
+        ggk = pedigree['great_grandkitten']
+        rebuilt = reopened.cat(indices[id(ggk)], parts)
+        random.seed(3)
+        expected = ggk.render_reference()
+        random.seed(3)
+        assert rebuilt.render_reference().tobytes() == expected.tobytes()
+
+    def test_queued_pedigrees_share_chunks_and_failures_roll_back(self, tmp_path):
+        import json
+        from unittest.mock import patch
+        from cat import Gene, cat_to_genome
+        from genome_archive import GenomeArchive
+        from image_processing import FamilyLayoutBuilder
+
+        archive = GenomeArchive(str(tmp_path / 'cats.genomes'), chunk_cats=40)
+        pedigrees = [_make_family(seed)[1] for seed in range(5)]
+        for pedigree in pedigrees:
+            archive.queue_pedigree(pedigree)
+        assert [c['count'] for c in archive.meta['chunks']] == [45]
+        assert archive.flush() == range(45, 75)
+        reopened = GenomeArchive(archive.path)
+        assert len(reopened) == 75 and len(reopened.meta['chunks']) == 2
+        ggk = pedigrees[4]['great_grandkitten']
+        index = 60 + [id(c) for c in sorted(
+            FamilyLayoutBuilder.flatten_pedigree(pedigrees[4]),
+            key=lambda cat: cat.generation)].index(id(ggk))
+        assert reopened.genome(index) == cat_to_genome(ggk)
+        assert reopened.parents(index)[0] >= 60
+
+        # A failed append leaves meta (in memory and on disk) unchanged
+        before = json.dumps(archive.meta)
+        fresh = _make_family(9)[1]
+        # The last cat written brings a new color, after the others interned theirs
+        genes = fresh['great_grandkitten'].color_genes
+        genes.append(Gene((1, 2, 3), 0.5))
+        with patch('genome_archive.NO_COLOR', len(archive.meta['palette'])):
+            try:
+                archive.append_pedigree(fresh)
+                assert False, "A full palette must be rejected"
+            except ValueError:
+                pass
+        assert json.dumps(archive.meta) == before
+        assert json.dumps(GenomeArchive(archive.path).meta) == before
+        genes.pop()
+        assert archive.append_pedigree(fresh) == range(75, 90)
+        assert archive.genome(89) == cat_to_genome(fresh['great_grandkitten'])
+
+
+class TestLineage:
+    """Kinship, inbreeding and ancestor queries over DAG pedigrees"""
+
+    def test_kinship_and_inbreeding_of_a_sib_mating(self):
+        from lineage import Lineage
+
+        lineage = Lineage()
+        a, b, c = lineage.add(), lineage.add(), lineage.add()
+        d, e = lineage.add(a, b), lineage.add(a, b)  # full sibs
+        f = lineage.add(d, e)
+        g = lineage.add(c, d)
+        h = lineage.add(f, g)
+
+        assert lineage.kinship(a, b) == 0
+        assert lineage.kinship(a, d) == 0.25
+        assert lineage.kinship(d, e) == 0.25
+        assert lineage.inbreeding(f) == 0.25
+        assert lineage.kinship(f, f) == 0.625
+        assert lineage.inbreeding(h) == lineage.kinship(f, g) == 0.1875
+        assert lineage.ancestors(h) == [a, b, c, d, e, f, g]
+
+        # Rows and bitsets dropped by release() are rebuilt on demand
+        lineage.release(range(len(lineage)))
+        lineage._kinship.clear()
+        assert lineage.kinship(f, g) == 0.1875
+        assert lineage.is_ancestor(a, h) and not lineage.is_ancestor(h, a)
+
+    def test_ancestor_bitsets_match_walk_beyond_window(self):
+        from lineage import Lineage
+
+        random.seed(4)
+        lineage = Lineage(depth=2)
+        generation = [lineage.add() for _ in range(12)]
+        for _ in range(6):
+            generation = [
+                lineage.add(*random.sample(generation, 2)) for _ in range(12)
+            ]
+        for b in generation:
+            walked = lineage._walk_ancestors(b, 0)
+            for a in range(b):
+                assert lineage.is_ancestor(a, b) == (a in walked)
+
+    def test_bitsets_of_unrelated_families_stay_small(self):
+        from lineage import Lineage
+
+        lineage = Lineage()
+        kittens = []
+        for _ in range(2000):
+            # A 15-cat pedigree: 8 founders, 4 kittens, 2 grandkittens, 1
+            level = [lineage.add() for _ in range(8)]
+            while len(level) > 1:
+                level = [lineage.add(level[k], level[k + 1])
+                         for k in range(0, len(level), 2)]
+            kittens.append(level[0])
+        assert len(lineage) == 30000
+        assert max(len(bits) for _base, bits in lineage._bits.values()) <= 3
+        for b in kittens[-3:]:
+            walked = lineage._walk_ancestors(b, 0)
+            for a in range(b - 30, b):
+                assert lineage.is_ancestor(a, b) == (a in walked)
+
+    def test_register_cats(self):
+        from lineage import Lineage
+
+        _family, pedigree, _parts = _make_family()
+        lineage = Lineage()
+        ggk = pedigree['great_grandkitten']
+        ggk_id = lineage.register(ggk)
+        assert len(lineage) == 15
+        founders = [lineage.register(cat) for cat, _, _ in pedigree['pairs']]
+        assert all(lineage.is_ancestor(i, ggk_id) for i in founders)
+        assert lineage.generation(ggk_id) == ggk.generation
+        assert lineage.inbreeding(ggk_id) == 0
+
+
+class TestSimulation:
+    """Open-population simulator with checkpoints"""
+
+    def test_resume_matches_uninterrupted_run(self, tmp_path):
+        from image_processing import ImageLoader
+        from simulation import Simulation
+
+        parts = ImageLoader().load_all_parts()
+        settings = dict(population=12, checkpoint_every=2, sample_every=3,
+                        samples=1, mating='kinship')
+
+        random.seed(9)
+        straight = Simulation(str(tmp_path / 'a'), parts, **settings)
+        assert straight.run(4)['archived'] == 5 * 12
+
+        def crash(info):
+            if info['generation'] == 3:
+                raise KeyboardInterrupt
+
+        random.seed(9)
+        try:
+            Simulation(str(tmp_path / 'b'), parts, **settings).run(4, crash)
+        except KeyboardInterrupt:
+            pass
+        resumed = Simulation(str(tmp_path / 'b'), parts, **settings)
+        assert resumed.resumed and resumed.generation == 2
+        resumed.run(4)
+
+        a, b = straight.archive, resumed.archive
+        assert len(a) == len(b) == 60
+        assert all(a.genome(i) == b.genome(i) and a.parents(i) == b.parents(i)
+                   for i in range(len(a)))
+        assert len(list((tmp_path / 'b' / 'samples').glob('*.png'))) == 1
+
+
+    def test_resume_after_many_generations_restores_kinship_rows(self, tmp_path):
+        from lineage import Lineage
+        from simulation import LINEAGE_FILE, Simulation
+
+        settings = dict(population=10, checkpoint_every=12, sample_every=0,
+                        mating='kinship')
+        random.seed(4)
+        straight = Simulation(str(tmp_path), **settings)
+        straight.run(12)
+        resumed = Simulation(str(tmp_path), **settings)
+        assert resumed.resumed and resumed.generation == 12
+
+        ids = resumed.current_ids
+        assert set(ids) <= set(resumed.lineage._rows)  # saved, not rebuilt
+        bare = Lineage.load(str(tmp_path / LINEAGE_FILE))  # rows rebuilt
+        bare._rows.clear()
+        for a in ids:
+            for b in ids:
+                expected = straight.lineage.kinship(a, b)
+                assert abs(resumed.lineage.kinship(a, b) - expected) < 1e-12
+                assert abs(bare.kinship(a, b) - expected) < 1e-12
+
+class TestTraitIndex:
+    """Part / color search over genome archives"""
+
+    def test_queries_match_a_full_scan_and_update_incrementally(self, tmp_path):
+        import math
+        from genome_archive import GenomeArchive
+        from trait_index import TraitIndex
+
+        archive = GenomeArchive(str(tmp_path / 'cats.genomes'))
+        archive.append_pedigree(_make_family(1)[1])
+        index = TraitIndex(archive)
+        assert index.update() == 15
+        archive.append_pedigree(_make_family(2)[1])
+        assert index.update() == 15 and index.update() == 0
+        reloaded = TraitIndex(GenomeArchive(archive.path))
+        assert len(reloaded) == 30
+
+        genomes = [archive.genome(i) for i in range(len(archive))]
+
+        def main_color(genome):
+            return max(genome['colors'], key=lambda c: c['strength'])
+
+        probe = genomes[17]
+        part = probe['parts']['eyes']
+        color = tuple(main_color(probe)['color'])
+        queries = [
+            dict(parts=[part]),
+            dict(parts=[part, probe['parts']['tail']], main=color),
+            dict(main=color, max_distance=60),
+            dict(accent=tuple(probe['colors'][-1]['color'])),
+        ]
+        for query in queries:
+            distance = query.get('max_distance', 40)
+            expected = [
+                i for i, g in enumerate(genomes)
+                if all(p in g['parts'].values() for p in query.get('parts', []))
+                and ('main' not in query
+                     or math.dist(main_color(g)['color'], query['main']) <= distance)
+                and ('accent' not in query or any(
+                    math.dist(c['color'], query['accent']) <= distance
+                    for c in g['colors'] if c is not main_color(g)))
+            ]
+            assert list(index.query(**query)) == expected
+            assert list(reloaded.query(**query)) == expected
+        assert 17 in index.query(**queries[1])
+        assert index.nearest(color, 1, [part])[0][1] == 0.0
+
+        # Truncate and re-append (a simulation resume): the replaced chunk's
+        # postings must go, even though it has the same file name and size
+        archive.truncate(15)
+        archive.append_pedigree(_make_family(3)[1])
+        assert index.update() == 30  # rebuilt
+        part = archive.genome(20)['parts']['eyes']
+        assert list(index.query([part])) == [
+            i for i in range(30) if archive.genome(i)['parts']['eyes'] == part
+        ]
+        assert list(TraitIndex(archive).query([part])) == list(index.query([part]))
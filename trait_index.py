@@ -0,0 +1,289 @@
+"""
+Trait search over a genome archive.
+
+Finds cats by body parts and colors without re-reading every genome:
+
+  * inverted lists: part ref ('eyes_7') -> ascending archive indices
+  * main color: palette index of each cat's strongest color gene
+  * accent colors: (cat, palette index) pairs for every other color gene
+
+Color queries are answered on the palette first (a few hundred entries
+compared against the query color), then mapped onto every cat with one
+vectorized lookup; part terms intersect their lists, shortest first.
+
+The index lives next to the archive (``trait_index.npz``) and remembers
+which chunks it covers (file, start, count, epoch): ``update`` indexes
+only the chunks appended since (new simulation generations, families
+archived with ``main.py --archive``) and rebuilds if any covered chunk was
+dropped or replaced, e.g. by a simulation resume that truncated and re-bred.
+
+    python trait_index.py simulation/population.genomes eyes_7 tail_1 \\
+        --main 64,224,208 --distance 40 --render matches/
+"""
+
+import os
+import sys
+import json
+import logging
+import argparse
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from config import RGB, TRAIT_INDEX_SETTINGS
+from genome_archive import LOCI, NO_COLOR, GenomeArchive
+from seed_index import parse_color
+
+logger = logging.getLogger(__name__)
+
+INDEX_FILE = 'trait_index.npz'
+INDEX_VERSION = 2
+
+# (file, start, count, epoch) of an indexed chunk
+ChunkStamp = List[Any]
+
+
+def parse_rgb(text: str) -> RGB:
+    """'#40e0d0', '40e0d0' or '64,224,208' -> (64, 224, 208)."""
+    key = parse_color(text)
+    return tuple(int(key[i:i + 2], 16) for i in (1, 3, 5))
+
+
+class TraitIndex:
+    """Part and color index over one ``GenomeArchive``."""
+
+    def __init__(self, archive: GenomeArchive, path: Optional[str] = None):
+        """
+        Load the saved index of ``archive`` (if any); call ``update`` to
+        cover cats appended since.
+        """
+        self.archive = archive
+        self.path = path or os.path.join(archive.path, INDEX_FILE)
+        self._clear()
+        if os.path.exists(self.path):
+            self._load()
+
+    def _clear(self) -> None:
+        self.length = 0
+        self._chunks: List[ChunkStamp] = []
+        self._main = np.empty(0, dtype=np.uint16)
+        self._accent_owner = np.empty(0, dtype=np.int64)
+        self._accent_color = np.empty(0, dtype=np.uint16)
+        # ref -> ascending id arrays, one per indexed chunk (merged on use)
+        self._postings: Dict[str, List[np.ndarray]] = {}
+
+    def __len__(self) -> int:
+        return self.length
+
+    # -- building --------------------------------------------------------
+
+    @staticmethod
+    def _chunk_stamp(chunk: Dict[str, Any]) -> ChunkStamp:
+        return [chunk['file'], chunk['start'], chunk['count'], chunk.get('epoch', 0)]
+
+    def update(self, save: bool = True) -> int:
+        """
+        Index the chunks appended since the last update; return the cats
+        indexed (all of them after a rebuild).
+        """
+        chunks = self.archive.meta['chunks']
+        covered = [self._chunk_stamp(chunk) for chunk in chunks[:len(self._chunks)]]
+        if covered != self._chunks:
+            logger.info(f"{self.archive.path} was truncated or rewritten; "
+                        f"rebuilding trait index")
+            self._clear()
+            rebuilt = True
+        else:
+            rebuilt = False
+        before = self.length
+        main, owners, accents = [self._main], [self._accent_owner], [self._accent_color]
+        part_ids = self.archive.meta['part_ids']
+        for number in range(len(self._chunks), len(chunks)):
+            start, columns = chunks[number]['start'], self.archive.chunk(number)
+            colors = np.asarray(columns['colors'])
+            strengths = np.asarray(columns['color_strength'])
+            n = len(colors)
+            ids = start + np.arange(n, dtype=np.int64)
+
+            # Strongest gene is the main color (first one on ties, like Cat.color)
+            main_col = np.argmax(strengths, axis=1)
+            main.append(colors[np.arange(n), main_col])
+            accent = colors != NO_COLOR
+            accent[np.arange(n), main_col] = False
+            rows, cols = np.nonzero(accent)
+            owners.append(ids[rows])
+            accents.append(colors[rows, cols])
+
+            parts = np.asarray(columns['parts'])
+            for col, locus in enumerate(LOCI):
+                order = np.argsort(parts[:, col], kind='stable')
+                values, firsts = np.unique(parts[order, col], return_index=True)
+                for value, group in zip(values, np.split(ids[order], firsts[1:])):
+                    ref = f"{locus}_{part_ids[locus][value]}"
+                    self._postings.setdefault(ref, []).append(group)
+            self.length = start + n
+            self._chunks.append(self._chunk_stamp(chunks[number]))
+
+        added = self.length - before
+        if added or rebuilt:
+            self._main = np.concatenate(main)
+            self._accent_owner = np.concatenate(owners)
+            self._accent_color = np.concatenate(accents)
+            if save:
+                self.save()
+            logger.info(f"Trait index: {added} cats added ({self.length} total)")
+        return added
+
+    def save(self) -> None:
+        refs = sorted(self._postings)
+        lists = [self.postings(ref) for ref in refs]
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, 'wb') as f:
+            np.savez(
+                f, version=np.array(INDEX_VERSION), length=np.array(self.length),
+                chunks=np.array(json.dumps(self._chunks)),
+                main=self._main, accent_owner=self._accent_owner,
+                accent_color=self._accent_color, refs=np.array(refs, dtype=str),
+                offsets=np.cumsum([0] + [len(ids) for ids in lists]),
+                ids=np.concatenate(lists) if lists else np.empty(0, dtype=np.int64),
+            )
+        os.replace(tmp_path, self.path)
+
+    def _load(self) -> None:
+        with np.load(self.path) as data:
+            if int(data['version']) != INDEX_VERSION:
+                logger.info(f"Ignoring trait index {self.path} (old version)")
+                return
+            self.length = int(data['length'])
+            self._chunks = json.loads(str(data['chunks']))
+            self._main = data['main']
+            self._accent_owner = data['accent_owner']
+            self._accent_color = data['accent_color']
+            offsets, ids = data['offsets'], data['ids']
+            self._postings = {
+                str(ref): [ids[offsets[i]:offsets[i + 1]]]
+                for i, ref in enumerate(data['refs'])
+            }
+
+    # -- queries ---------------------------------------------------------
+
+    def postings(self, ref: str) -> np.ndarray:
+        """Ascending ids of cats carrying part ``ref`` (e.g. 'eyes_7')."""
+        locus = ref.rsplit('_', 1)[0]
+        if locus not in LOCI:
+            raise ValueError(f"Unknown part ref {ref!r}")
+        segments = self._postings.get(ref)
+        if not segments:
+            return np.empty(0, dtype=np.int64)
+        if len(segments) > 1:
+            segments[:] = [np.concatenate(segments)]
+        return segments[0]
+
+    def _palette_distances(self, color: RGB) -> np.ndarray:
+        """Distance from ``color`` to every palette entry (NO_COLOR: inf)."""
+        palette = np.asarray(self.archive.meta['palette'], dtype=np.float64).reshape(-1, 3)
+        distances = np.full(NO_COLOR + 1, np.inf)
+        distances[:len(palette)] = np.sqrt(
+            ((palette - np.asarray(color, dtype=np.float64)) ** 2).sum(axis=1)
+        )
+        return distances
+
+    def query(self, parts: Sequence[str] = (), main: Optional[RGB] = None,
+              accent: Optional[RGB] = None,
+              max_distance: float = TRAIT_INDEX_SETTINGS['max_distance'],
+              limit: Optional[int] = None) -> np.ndarray:
+        """
+        Ascending ids of cats with every part in ``parts``, a main color
+        within ``max_distance`` of ``main`` and an accent color within
+        ``max_distance`` of ``accent`` (each criterion optional).
+        """
+        candidates: Optional[np.ndarray] = None
+        for ids in sorted((self.postings(ref) for ref in parts), key=len):
+            candidates = ids if candidates is None else np.intersect1d(
+                candidates, ids, assume_unique=True,
+            )
+            if not len(candidates):
+                return candidates
+        if main is not None:
+            match = self._palette_distances(main) <= max_distance
+            if candidates is None:
+                candidates = np.flatnonzero(match[self._main])
+            else:
+                candidates = candidates[match[self._main[candidates]]]
+        if accent is not None:
+            match = self._palette_distances(accent) <= max_distance
+            owners = np.unique(self._accent_owner[match[self._accent_color]])
+            candidates = owners if candidates is None else np.intersect1d(
+                candidates, owners, assume_unique=True,
+            )
+        if candidates is None:
+            candidates = np.arange(self.length, dtype=np.int64)
+        return candidates[:limit] if limit is not None else candidates
+
+    def nearest(self, color: RGB, k: int = 10,
+                parts: Sequence[str] = ()) -> List[Tuple[int, float]]:
+        """The ``k`` cats (with ``parts``) whose main color is closest to ``color``."""
+        candidates = self.query(parts) if parts else np.arange(self.length)
+        distances = self._palette_distances(color)[self._main[candidates]]
+        if len(candidates) > k:
+            top = np.argpartition(distances, k)[:k]
+            candidates, distances = candidates[top], distances[top]
+        order = np.argsort(distances, kind='stable')
+        return [(int(candidates[i]), float(distances[i])) for i in order]
+
+
+def format_match(archive: GenomeArchive, index: int) -> str:
+    genome = archive.genome(index)
+    main = max(genome['colors'], key=lambda c: c['strength'])
+    parts = ' '.join(genome['parts'][locus] for locus in LOCI)
+    return (f"#{index}: {genome['name']} (Gen {genome['generation']}) "
+            f"main {'#%02x%02x%02x' % tuple(main['color'])}  {parts}")
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Find cats in a genome archive by parts and colors"
+    )
+    parser.add_argument('archive', help="Genome archive directory")
+    parser.add_argument('parts', nargs='*', metavar='PART',
+                        help="Part refs that must all match (e.g. eyes_7 tail_1)")
+    parser.add_argument('--main', type=parse_rgb, metavar='COLOR',
+                        help="Main color ('#40e0d0' or '64,224,208')")
+    parser.add_argument('--accent', type=parse_rgb, metavar='COLOR',
+                        help="Accent (non-main) color")
+    parser.add_argument('--distance', type=float,
+                        default=TRAIT_INDEX_SETTINGS['max_distance'],
+                        help="Max RGB distance for color matches "
+                             f"(default: {TRAIT_INDEX_SETTINGS['max_distance']})")
+    parser.add_argument('--limit', type=int, default=TRAIT_INDEX_SETTINGS['limit'],
+                        help=f"Matches listed (default: {TRAIT_INDEX_SETTINGS['limit']})")
+    parser.add_argument('--render', metavar='DIR',
+                        help="Render the listed matches as PNGs into DIR")
+    args = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format='%(message)s')
+    if not os.path.exists(os.path.join(args.archive, 'meta.json')):
+        print(f"Error: no genome archive at {args.archive}", file=sys.stderr)
+        return 1
+    archive = GenomeArchive(args.archive)
+    index = TraitIndex(archive)
+    index.update()
+    matches = index.query(args.parts, args.main, args.accent, args.distance)
+    for i in matches[:args.limit]:
+        print(f"  {format_match(archive, int(i))}")
+    print(f"{len(matches)} matching cat(s) of {len(index)} in {args.archive}")
+
+    if args.render and len(matches):
+        from image_processing import ImageLoader
+
+        os.makedirs(args.render, exist_ok=True)
+        parts_images = ImageLoader().load_all_parts()
+        for i in matches[:args.limit]:
+            path = os.path.join(args.render, f"cat_{int(i)}.png")
+            archive.cat(int(i), parts_images).generate_image(retain=False).save(path)
+        print(f"Rendered {min(len(matches), args.limit)} cat(s) into {args.render}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())